@@ -0,0 +1,79 @@
+"""
+Compare pages/sec of the HTML parser engines on a fixed corpus of generated pages.
+
+Usage: `$ python benchmarks/parsers_benchmark.py [--pages 200] [--rounds 3]`
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spider.crawler.parsing import (   # noqa: E402
+    ENGINES,
+    ParserEngines,
+)
+
+
+def build_corpus(pages: int, seed: int = 42) -> List[str]:
+    """
+    Generate :param pages: HTML pages that look like a typical site: navigation,
+    nested blocks with text, inline scripts and lots of links. The same seed always
+    gives the same corpus.
+    """
+    rnd = random.Random(seed)
+    words = ['spider', 'web', 'crawler', 'page', 'link', 'async', 'lxml', 'soup']
+    corpus = []
+    for page in range(pages):
+        blocks = []
+        for block in range(rnd.randint(20, 400)):
+            text = ' '.join(rnd.choice(words) for _ in range(rnd.randint(5, 60)))
+            links = ''.join(
+                f'<a href="/section-{rnd.randint(0, 999)}/page-{rnd.randint(0, 9999)}" '
+                f'class="link">{rnd.choice(words)}</a> '
+                for _ in range(rnd.randint(0, 8))
+            )
+            blocks.append(
+                f'<div class="block-{block}"><p>{text}</p><ul><li>{links}</li></ul>'
+                f'<script>var x{block} = "{text[:30]}";</script></div>'
+            )
+        corpus.append(
+            f'<!DOCTYPE html><html><head><meta charset="utf-8">'
+            f'<title>Page {page} | {rnd.choice(words)}</title></head>'
+            f'<body><nav><a href="/">Home</a><a href="https://example.com/about">'
+            f'About</a></nav>{"".join(blocks)}</body></html>'
+        )
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML parser engines benchmark.')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.pages)
+    size = sum(len(html) for html in corpus) / 1024 / 1024
+    print(f'Corpus: {len(corpus)} pages, {size:.1f} MiB')
+
+    for engine in ParserEngines.all():
+        best = None
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            links = 0
+            for html in corpus:
+                title, hrefs = ENGINES[engine].parse(html)
+                links += len(hrefs)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(
+            f'{engine:>5}: {len(corpus) / best:8.1f} pages/sec '
+            f'({size / best:.1f} MiB/sec, {links} links)'
+        )
+
+
+if __name__ == '__main__':
+    main()
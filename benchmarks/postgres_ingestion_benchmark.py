@@ -0,0 +1,99 @@
+"""
+Compare rows/sec of the PostgreSQL ingestion paths on a local database: a save()
+per page, batched upserts with save_many(), and COPY to the staging table with
+a merge at the end. The table is dropped and created again before every path.
+
+Usage: `$ python benchmarks/postgres_ingestion_benchmark.py --user postgres
+--password postgres --db spider [--host localhost:5432] [--rows 20000]
+[--batch-size 500]`
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from yarl import URL
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spider.db.core import (   # noqa: E402
+    IngestionModes,
+    PageRecord,
+)
+from spider.db.implementations import PostgresDatabase   # noqa: E402
+from spider.file_storage.implementations import HTMLFileWriter   # noqa: E402
+
+
+def build_records(rows: int) -> List[PageRecord]:
+    """
+    Generate :param rows: pages of a site with a few KiB of HTML each.
+    """
+    return [
+        PageRecord(
+            URL(f'https://example.com/section-{row % 100}/page-{row}'),
+            f'Page {row}',
+            f'<html><body>{"<p>spider web crawler</p>" * 200}{row}</body></html>',
+            f'https://example.com/section-{row % 100}/',
+        )
+        for row in range(rows)
+    ]
+
+
+async def ingest(
+    args: argparse.Namespace, path: str, records: List[PageRecord]
+) -> float:
+    """
+    Save :param records: with the ingestion :param path: to an empty table, and
+    return the time it took.
+    """
+    db = PostgresDatabase(args.host, args.user, args.password, args.db)
+    await db.drop_table(check_first=True, silent=True)
+    await db.create_table(silent=True)
+    db.ingestion = IngestionModes.COPY if path == 'copy' else IngestionModes.UPSERT
+
+    start = time.perf_counter()
+    if path == 'row':
+        for record in records:
+            await db.save(
+                record.url, record.title, record.content, record.parent, silent=True
+            )
+    else:
+        for i in range(0, len(records), args.batch_size):
+            await db.save_many(records[i:i + args.batch_size], silent=True)
+        if path == 'copy':
+            await db.merge()
+    elapsed = time.perf_counter() - start
+
+    db.ingestion = IngestionModes.UPSERT
+    await db.disconnect()
+    await db.drop_table(silent=True)
+    return elapsed
+
+
+async def run(args: argparse.Namespace):
+    records = build_records(args.rows)
+    with tempfile.TemporaryDirectory() as folder:
+        HTMLFileWriter.PATH_TO_FILES = Path(folder)
+        for path in ('row', 'batch', 'copy'):
+            elapsed = await ingest(args, path, records)
+            print(f'{path:>5}: {len(records) / elapsed:10.1f} rows/sec ({elapsed:.2f}s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PostgreSQL ingestion benchmark.')
+    parser.add_argument('--host', default='localhost:5432')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
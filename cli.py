@@ -11,6 +11,16 @@ from spider import (
 )
 from spider.controllers.core.loggers import logger
 from spider.controllers.core.types import SupportedActions
+from spider.crawler.canonical import TrailingSlash
+from spider.crawler.crawler import KnownURLModes
+from spider.crawler.parsing import (
+    ParserEngines,
+    ParserExecutors,
+)
+from spider.crawler.scope import Scopes
+from spider.crawler.seen import SeenSets
+from spider.db.core import IngestionModes
+from spider.file_storage import FileStorages
 
 __app_name__ = 'spider'
 __version__ = '0.0.1'
@@ -72,6 +82,277 @@ async def main():
              f'(default is from `{config.file_name}`)',
         default=config.get_infrastructure_config('concurrency_limit')
     )
+    save_parser.add_argument(
+        '--host-concur', type=int,
+        help='maximum number of requests made at once to the same host '
+             f'(default is from `{config.file_name}`, or 2)',
+        default=config.get_infrastructure_config('host_concurrency_limit') or 2
+    )
+    save_parser.add_argument(
+        '--adaptive', action=argparse.BooleanOptionalAction,
+        default=config.get_infrastructure_flag('adaptive_concurrency'),
+        help='adapt the concurrency limits while crawling: they grow while responses '
+             'are fast, and shrink on timeouts, 429 and 5xx responses. `--concur` and '
+             '`--host-concur` are the initial limits '
+             f'(default is from `{config.file_name}`, or off)',
+    )
+    save_parser.add_argument(
+        '--max-concur', type=int,
+        help='maximum concurrency limit in `--adaptive` mode '
+             f'(default is from `{config.file_name}`, or 4 times `--concur`)',
+        default=config.get_infrastructure_config('max_concurrency_limit') or 0
+    )
+    save_parser.add_argument(
+        '--max-host-concur', type=int,
+        help='maximum number of requests made at once to the same host in '
+             f'`--adaptive` mode (default is from `{config.file_name}`, or 4 times '
+             '`--host-concur`)',
+        default=config.get_infrastructure_config('max_host_concurrency_limit') or 0
+    )
+    save_parser.add_argument(
+        '--host-rate', type=float,
+        help='maximum number of requests per second made to the same host, 0 means '
+             f'no limit (default is from `{config.file_name}`, or 0)',
+        default=config.get_infrastructure_config('host_rate_limit') or 0
+    )
+    save_parser.add_argument(
+        '--batch-size', type=int,
+        help='number of pages saved to the DB at once, with one bulk upsert '
+             f'(default is from `{config.file_name}`, or 100)',
+        default=config.get_infrastructure_config('db_batch_size') or 100
+    )
+    save_parser.add_argument(
+        '--flush-interval', type=float,
+        help='maximum number of seconds a page waits for its batch to fill up before '
+             f'it is saved (default is from `{config.file_name}`, or 1)',
+        default=config.get_infrastructure_config('db_flush_interval') or 1.0
+    )
+    save_parser.add_argument(
+        '--write-queue', type=int,
+        help='maximum number of crawled pages waiting to be saved to the DB. when the '
+             'queue is full, fetching pauses until the DB catches up '
+             f'(default is from `{config.file_name}`, or 1000)',
+        default=config.get_infrastructure_config('db_write_queue_size') or 1000
+    )
+    save_parser.add_argument(
+        '--ingestion', choices=IngestionModes.all(), default=IngestionModes.UPSERT,
+        help='how the pages get to the DB: `upsert` them in batches, or stream them '
+             'with `copy` to an unlogged staging table that is merged into the table '
+             'every few seconds and at the end of the crawl (postgresql only, '
+             'default=upsert)',
+    )
+    save_parser.add_argument(
+        '--http2', action=argparse.BooleanOptionalAction,
+        default=config.get_http_flag('http2'),
+        help='use HTTP/2, so requests to the same host are multiplexed over one '
+             f'connection (default is from `{config.file_name}`, or off)',
+    )
+    save_parser.add_argument(
+        '--max-connections', type=int,
+        default=config.get_http_config('max_connections') or 100,
+        help='maximum number of open HTTP connections '
+             f'(default is from `{config.file_name}`, or 100)',
+    )
+    save_parser.add_argument(
+        '--max-keepalive', type=int,
+        default=config.get_http_config('max_keepalive_connections') or 20,
+        help='maximum number of idle connections kept alive '
+             f'(default is from `{config.file_name}`, or 20)',
+    )
+    save_parser.add_argument(
+        '--keepalive-expiry', type=float,
+        default=config.get_http_config('keepalive_expiry') or 5,
+        help='number of seconds an idle connection is kept alive '
+             f'(default is from `{config.file_name}`, or 5)',
+    )
+    save_parser.add_argument(
+        '--connect-timeout', type=float,
+        default=config.get_http_config('connect_timeout') or 5,
+        help='connection timeout in seconds '
+             f'(default is from `{config.file_name}`, or 5)',
+    )
+    save_parser.add_argument(
+        '--read-timeout', type=float,
+        default=config.get_http_config('read_timeout') or 5,
+        help='read (and write) timeout in seconds '
+             f'(default is from `{config.file_name}`, or 5)',
+    )
+    save_parser.add_argument(
+        '--pool-timeout', type=float,
+        default=config.get_http_config('pool_timeout') or 5,
+        help='number of seconds to wait for a free connection from the pool '
+             f'(default is from `{config.file_name}`, or 5)',
+    )
+    save_parser.add_argument(
+        '--dns-ttl', type=float, default=300,
+        help='number of seconds resolved hosts are cached for (default=300)',
+    )
+    save_parser.add_argument(
+        '--no-dns-cache', dest='dns_cache', action='store_false',
+        help='resolve the host on every new connection instead of caching it',
+    )
+    save_parser.add_argument(
+        '--retries', type=int, default=3,
+        help='number of times a request is repeated after a timeout, a network error '
+             'or a 429/5xx response, with a jittered exponential backoff or after '
+             'the time from `Retry-After` (default=3)',
+    )
+    save_parser.add_argument(
+        '--retry-backoff', type=float, default=0.5,
+        help='base delay of the exponential backoff in seconds (default=0.5)',
+    )
+    save_parser.add_argument(
+        '--breaker-threshold', type=int, default=5,
+        help='number of consecutive failed requests after which the URLs of the host '
+             'are parked for `--breaker-cooldown`, 0 disables it (default=5)',
+    )
+    save_parser.add_argument(
+        '--breaker-cooldown', type=float, default=60,
+        help='number of seconds the URLs of a failing host are parked (default=60)',
+    )
+    save_parser.add_argument(
+        '--workers', type=int, default=1,
+        help='number of crawler processes. Hosts are split between the processes by '
+             'hash, and each process has its own HTTP client and DB pool (default=1)',
+    )
+    save_parser.add_argument(
+        '--distributed', metavar='JOB',
+        help='crawl as one of the nodes of the distributed JOB: the nodes share the '
+             'queue and the found URLs through Redis (`--frontier-url`). Run the same '
+             'command on every node. `--workers` and `--checkpoint` are not used',
+    )
+    save_parser.add_argument(
+        '--frontier-url', default='redis://localhost:6379/1', metavar='URL',
+        help='Redis instance of the shared frontier (default=redis://localhost:6379/1)',
+    )
+    save_parser.add_argument(
+        '--lease-size', type=int, default=50,
+        help='number of URLs a node leases from the shared frontier at once '
+             '(default=50)',
+    )
+    save_parser.add_argument(
+        '--lease-ttl', type=float, default=300,
+        help='number of seconds after which the URLs leased by a node that stopped '
+             'responding are put back to the queue (default=300)',
+    )
+    save_parser.add_argument(
+        '--max-page-bytes', type=int, default=10 * 1024 * 1024,
+        help='abort the download of pages bigger than this number of bytes, 0 means '
+             'no limit (default=10 MiB)',
+    )
+    save_parser.add_argument(
+        '--parser', choices=ParserEngines.all(), default=ParserEngines.LXML,
+        help='HTML parser engine: `lxml` streams the page and keeps only the title and '
+             'the links, `bs4` builds a BeautifulSoup tree (default=lxml)',
+    )
+    save_parser.add_argument(
+        '--parse-executor', choices=ParserExecutors.all(),
+        default=ParserExecutors.THREAD,
+        help='run HTML parsing in a pool of threads or processes, so it does not block '
+             'downloads and DB writes (default=thread)',
+    )
+    save_parser.add_argument(
+        '--parse-workers', type=int, default=0,
+        help='size of the HTML parsing pool (default is the number of CPU cores)',
+    )
+    save_parser.add_argument(
+        '--sitemap', nargs='?', const=True, default=False, metavar='URL',
+        help='also put the pages listed in the sitemap (or sitemap index) to the queue. '
+             'Without URL, sitemaps from robots.txt or `/sitemap.xml` are used. Pages '
+             'that were not modified since they were crawled the last time are skipped',
+    )
+    save_parser.add_argument(
+        '--no-query', dest='allow_queries', action='store_false',
+        help='do not crawl URLs with a query string',
+    )
+    save_parser.add_argument(
+        '--allow-query', action='append', default=[], metavar='REGEX',
+        help='crawl URLs with a query string only if they match this regex. Can be '
+             'used multiple times (default: any URL with a query is crawled)',
+    )
+    save_parser.add_argument(
+        '--deny-query', action='append', default=[], metavar='REGEX',
+        help='do not crawl URLs with a query string that match this regex. Can be '
+             'used multiple times',
+    )
+    save_parser.add_argument(
+        '--strip-param', action='append', default=[], metavar='REGEX',
+        help='remove query parameters which names match this regex, in addition to '
+             'the tracking (`utm_*`, `fbclid`, ...) and session id parameters. Can be '
+             'used multiple times',
+    )
+    save_parser.add_argument(
+        '--trailing-slash', choices=TrailingSlash.all(), default=TrailingSlash.KEEP,
+        help='`keep` trailing slashes of URL paths, `strip` them, or `add` them to '
+             'the paths without a file extension (default=keep)',
+    )
+    save_parser.add_argument(
+        '--scope', choices=Scopes.all(), default=Scopes.ANY,
+        help='which hosts to crawl: `any`, the `host` of the start URL only, or the '
+             'hosts of its registrable `domain`, e.g. `www.example.co.uk` and '
+             '`news.example.co.uk` (default=any)',
+    )
+    save_parser.add_argument(
+        '--allow-domain', action='append', default=[], metavar='DOMAIN',
+        help='also crawl this domain and its subdomains. With `--scope any`, only the '
+             'allowed domains are crawled. Can be used multiple times',
+    )
+    save_parser.add_argument(
+        '--include', action='append', default=[], metavar='REGEX',
+        help='crawl only the URLs that match this regex. Can be used multiple times',
+    )
+    save_parser.add_argument(
+        '--exclude', action='append', default=[], metavar='REGEX',
+        help='do not crawl the URLs that match this regex. Can be used multiple times',
+    )
+    save_parser.add_argument(
+        '--max-pages', type=int, default=0,
+        help='stop the crawl after this number of pages is stored (default=0, '
+             'no limit). With `--workers`, the limit applies to each process',
+    )
+    save_parser.add_argument(
+        '--max-bytes', type=int, default=0,
+        help='stop the crawl after this number of bytes is downloaded (default=0, '
+             'no limit). With `--workers`, the limit applies to each process',
+    )
+    save_parser.add_argument(
+        '--max-duration', type=float, default=0, metavar='SECONDS',
+        help='stop the crawl after this number of seconds (default=0, no limit)',
+    )
+    save_parser.add_argument(
+        '--seen-set', choices=SeenSets.all(), default=SeenSets.EXACT,
+        help='how found URLs are remembered: `exact` keeps their 64-bit hashes, '
+             '`bloom` keeps a Bloom filter that needs a few bytes per URL, but skips '
+             'a small share of new URLs by mistake (default=exact)',
+    )
+    save_parser.add_argument(
+        '--seen-capacity', type=int, default=100_000,
+        help='expected number of URLs, used to size the seen-set (default=100000)',
+    )
+    save_parser.add_argument(
+        '--seen-error-rate', type=float, default=0.001,
+        help='false positive rate of the `bloom` seen-set (default=0.001)',
+    )
+    save_parser.add_argument(
+        '--bfs', dest='bfs', action='store_true', default=False,
+        help='crawl level by level: the next depth level starts only when the current '
+             'one is finished, so every URL is crawled on its shallowest level',
+    )
+    save_parser.add_argument(
+        '--checkpoint', metavar='PATH',
+        help='periodically save the crawl state (queued and visited URLs) to this file, '
+             'so the crawl can be resumed with `--resume`',
+    )
+    save_parser.add_argument(
+        '--checkpoint-interval', type=float, default=60,
+        help='number of seconds between checkpoints (default=60)',
+    )
+    save_parser.add_argument(
+        '--resume', metavar='PATH',
+        help='resume the crawl from the checkpoint file. Start URL and depth are taken '
+             'from the checkpoint, and new checkpoints are saved to the same file '
+             'unless `--checkpoint` is set',
+    )
     save_parser.add_argument(
         '--no-cache', dest='cache', action='store_false',
         help='disable caching of URLs which were scraped during this command run (leads '
@@ -81,11 +362,33 @@ async def main():
         '--no-logtime', dest='log_time', action='store_false',
         help='do not measure crawler execution time',
     )
+    save_parser.add_argument(
+        '--ignore-robots', dest='robots', action='store_false',
+        help='do not fetch robots.txt, so its rules and `Crawl-delay` are ignored. '
+             'Use it for internal sites only',
+    )
+    save_parser.add_argument(
+        '--no-conditional', dest='conditional', action='store_false',
+        help='do not send ETag/Last-Modified of the previous crawl, so every page is '
+             'downloaded again even if it did not change',
+    )
     save_parser.add_argument(
         '--no-overwrite', dest='overwrite', action='store_false',
         help='do not overwrite files of the pages that they were scraped before -- '
              'skip them instead'
     )
+    save_parser.add_argument(
+        '--known-urls', choices=KnownURLModes.all(), default=KnownURLModes.SKIP,
+        help='with `--no-overwrite`, the URLs stored in the DB are loaded to memory '
+             'before the crawl. `skip` them without a request, or `follow` them to '
+             'find new links without storing them again (default=skip)',
+    )
+    save_parser.add_argument(
+        '--file-storage', choices=FileStorages.all(), default=FileStorages.UUID,
+        help='how the HTML files are named: `uuid` writes a new file for every saved '
+             'page, `content` names the files by the hash of the page, so identical '
+             'pages and unchanged re-crawls share one file (default=uuid)',
+    )
     save_parser.add_argument(
         '--silent', dest='silent', action='store_true', default=False,
         help='prevent the logging from crawler'
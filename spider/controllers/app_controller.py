@@ -1,11 +1,25 @@
 from argparse import Namespace
-from typing import Tuple, Union
+import functools
+from typing import (
+    Any,
+    Dict,
+    Tuple,
+    Type,
+)
 
 from spider.controllers import DatabaseOperationsController
-from spider.controllers.core.context_managers import DelayedKeyboardInterrupt
+from spider.controllers.core.context_managers import (
+    DelayedKeyboardInterrupt,
+    StopOnKeyboardInterrupt,
+)
 from spider.controllers.core.loggers import logger
-from spider.crawler import Crawler
+from spider.crawler import (
+    Crawler,
+    DistributedCrawler,
+    ShardPool,
+)
 from spider.crawler.exceptions import IncorrectProxyFormatError
+from spider.db.core import BaseDatabase
 
 
 class AppController:
@@ -24,16 +38,70 @@ class AppController:
         )
 
     @classmethod
-    def __get_crawl_args(
-        cls, args: Namespace
-    ) -> Tuple[str, int, bool, bool, bool, bool, Union[str, bool], int]:
+    def __get_crawl_args(cls, args: Namespace) -> Dict[str, Any]:
         """
         Extract Crawler parameters.
         """
-        return (
-            args.url, args.depth, args.silent,
-            args.log_time, args.cache, args.overwrite, args.proxy, args.concur,
-        )
+        return {
+            'start_url': args.url,
+            'depth': args.depth,
+            'silent': args.silent,
+            'should_log_time': args.log_time,
+            'should_use_cache': args.cache,
+            'overwrite': args.overwrite,
+            'proxy': args.proxy,
+            'concurrency_limit': args.concur,
+            'host_concurrency_limit': args.host_concur,
+            'host_rate_limit': args.host_rate,
+            'batch_size': args.batch_size,
+            'flush_interval': args.flush_interval,
+            'write_queue_size': args.write_queue,
+            'ingestion': args.ingestion,
+            'adaptive_concurrency': args.adaptive,
+            'max_concurrency_limit': args.max_concur,
+            'max_host_concurrency_limit': args.max_host_concur,
+            'checkpoint_path': args.checkpoint,
+            'checkpoint_interval': args.checkpoint_interval,
+            'resume_path': args.resume,
+            'breadth_first': args.bfs,
+            'parser_executor': args.parse_executor,
+            'parser_workers': args.parse_workers,
+            'parser_engine': args.parser,
+            'max_page_bytes': args.max_page_bytes,
+            'conditional_requests': args.conditional,
+            'http2': args.http2,
+            'max_connections': args.max_connections,
+            'max_keepalive_connections': args.max_keepalive,
+            'keepalive_expiry': args.keepalive_expiry,
+            'connect_timeout': args.connect_timeout,
+            'read_timeout': args.read_timeout,
+            'pool_timeout': args.pool_timeout,
+            'retries': args.retries,
+            'retry_backoff': args.retry_backoff,
+            'breaker_threshold': args.breaker_threshold,
+            'breaker_cooldown': args.breaker_cooldown,
+            'respect_robots': args.robots,
+            'sitemap': args.sitemap,
+            'dns_cache': args.dns_cache,
+            'dns_ttl': args.dns_ttl,
+            'seen_set': args.seen_set,
+            'seen_capacity': args.seen_capacity,
+            'seen_error_rate': args.seen_error_rate,
+            'allow_queries': args.allow_queries,
+            'allow_query': args.allow_query,
+            'deny_query': args.deny_query,
+            'strip_params': args.strip_param,
+            'trailing_slash': args.trailing_slash,
+            'known_urls': args.known_urls,
+            'file_storage': args.file_storage,
+            'scope': args.scope,
+            'allowed_domains': args.allow_domain,
+            'include': args.include,
+            'exclude': args.exclude,
+            'max_pages': args.max_pages,
+            'max_bytes': args.max_bytes,
+            'max_duration': args.max_duration,
+        }
 
     @classmethod
     async def catch(cls, args: Namespace):
@@ -65,20 +133,55 @@ class AppController:
                     depth=2 means "crawl the parent page, all its nested links,
                     and all the links inside them as well".
                     etc.
+                If :param args.workers: is more than 1, the crawl is split between
+                that many processes by the hash of the URL host.
+                If :param args.distributed: is set, the process is one of the nodes
+                of that job, sharing the frontier in Redis.
         """
         db_login_args = cls.__get_db_login_args(args)
         crawl_args = cls.__get_crawl_args(args)
 
         logger.update_level(args.silent, operation='crawl')
 
-        try:
-            spider = Crawler(
-                DatabaseOperationsController(*db_login_args).db, *crawl_args
+        if args.distributed:
+            await cls.__crawl(
+                DistributedCrawler,
+                DatabaseOperationsController(*db_login_args).db,
+                redis_url=args.frontier_url, job=args.distributed,
+                lease_size=args.lease_size, lease_ttl=args.lease_ttl, **crawl_args,
             )
+            return
+
+        if args.workers > 1:
+            db_type, login, pwd, host, db_name = db_login_args
+            with DelayedKeyboardInterrupt():
+                await ShardPool(args.workers).run(
+                    DatabaseOperationsController(*db_login_args).db,
+                    (host, login, pwd, db_name), crawl_args,
+                )
+            return
+
+        await cls.__crawl(
+            Crawler, DatabaseOperationsController(*db_login_args).db, **crawl_args
+        )
+
+    @classmethod
+    async def __crawl(
+        cls, crawler_class: Type[Crawler], database: BaseDatabase, **kwargs: Any
+    ):
+        """
+        Create the crawler of :param crawler_class: and run it. Ctrl-C stops the crawl
+        gracefully: the pages in flight are finished and stored, and the checkpoint
+        is saved. Ctrl-C pressed once more interrupts it at once.
+        """
+        try:
+            spider = crawler_class(database, **kwargs)
         except IncorrectProxyFormatError as exc:
             logger.error(exc)
         else:
-            with DelayedKeyboardInterrupt():
+            with StopOnKeyboardInterrupt(
+                functools.partial(spider.stop, 'interrupted by the user')
+            ):
                 await spider.crawl()
 
     @classmethod
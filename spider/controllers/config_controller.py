@@ -26,10 +26,14 @@ class ConfigController:
 
         self.config = ConfigParser()
         self.config.read(self.file_name)
+        for section in ConfigSections.all():
+            if not self.config.has_section(section):
+                self.config.add_section(section)
 
         self.database_manager = DatabaseManager()
 
         self.db_config = self.config[ConfigSections.DATABASE]
+        self.http_config = self.config[ConfigSections.HTTP]
         self.infrastructure_config = self.config[ConfigSections.INFRASTRUCTURE]
 
     def __create_empty_config(self):
@@ -46,12 +50,30 @@ class ConfigController:
         """
         return self.db_config.get(key, None)
 
+    def get_http_config(self, key: str) -> Optional[str]:
+        """
+        Get value by its :param key: from config's [HTTP] section.
+        """
+        return self.http_config.get(key, None)
+
+    def get_http_flag(self, key: str) -> bool:
+        """
+        Get boolean value by its :param key: from config's [HTTP] section.
+        """
+        return self.http_config.getboolean(key, fallback=False)
+
     def get_infrastructure_config(self, key: str) -> Optional[str]:
         """
         Get value by its :param key: from config's [INFRASTRUCTURE] section.
         """
         return self.infrastructure_config.get(key, None)
 
+    def get_infrastructure_flag(self, key: str) -> bool:
+        """
+        Get boolean value by its :param key: from config's [INFRASTRUCTURE] section.
+        """
+        return self.infrastructure_config.getboolean(key, fallback=False)
+
     def set_config(self, section: str, key: str, value: str):
         """
         Set :param value: for a :param key: field in the config's :param section:.
@@ -1,6 +1,8 @@
 from .delayed_kb_interrupt import DelayedKeyboardInterrupt
+from .stop_on_kb_interrupt import StopOnKeyboardInterrupt
 
 
 __all__ = [
     'DelayedKeyboardInterrupt',
+    'StopOnKeyboardInterrupt',
 ]
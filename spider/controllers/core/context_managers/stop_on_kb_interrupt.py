@@ -0,0 +1,53 @@
+import asyncio
+import signal
+from types import (
+    FrameType,
+    TracebackType,
+)
+from typing import (
+    Any,
+    Callable,
+    Union,
+)
+
+
+class StopOnKeyboardInterrupt:
+    """
+    A context manager to stop a long-running coroutine gracefully on Ctrl-C: the first
+    SIGINT calls :param on_interrupt:, so the coroutine can finish its work and
+    clean up, the next one interrupts it as usual.
+    """
+
+    def __init__(self, on_interrupt: Callable[[], Any]):
+        self.on_interrupt = on_interrupt
+        self.loop = None
+        self.old_handler = None
+        self.signal_received = False
+
+    def __enter__(self):
+        self.signal_received = False
+        self.loop = asyncio.get_event_loop()
+        try:
+            self.loop.add_signal_handler(signal.SIGINT, self.handler)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops and non-main threads do not support signal handlers
+            self.loop = None
+            self.old_handler = signal.signal(signal.SIGINT, self.handler)
+
+    def handler(self, *_: Union[int, FrameType, None]):
+        if self.signal_received:
+            return
+        self.signal_received = True
+        self.__restore()
+        self.on_interrupt()
+
+    def __exit__(self, signal_type, value, traceback: Union[TracebackType, None]):
+        self.__restore()
+
+    def __restore(self):
+        if self.loop is not None:
+            self.loop.remove_signal_handler(signal.SIGINT)
+            self.loop = None
+        elif self.old_handler is not None:
+            signal.signal(signal.SIGINT, self.old_handler)
+            self.old_handler = None
@@ -7,4 +7,5 @@ class ConfigSections(AbstractEnumType):
     """
 
     DATABASE = 'DATABASE'
+    HTTP = 'HTTP'
     INFRASTRUCTURE = 'INFRASTRUCTURE'
@@ -1,5 +1,9 @@
 from .crawler import Crawler
+from .distributed import DistributedCrawler
+from .sharding import ShardPool
 
 __all__ = [
     'Crawler',
+    'DistributedCrawler',
+    'ShardPool',
 ]
@@ -0,0 +1,121 @@
+import re
+from typing import (
+    Iterable,
+    Optional,
+    Pattern,
+)
+
+from yarl import URL
+
+from spider.controllers.core.types.abstract_types import AbstractEnumType
+
+
+class TrailingSlash(AbstractEnumType):
+    """
+    How trailing slashes of the paths are treated: `keep` them as they are, `strip`
+    them, or `add` them to the paths which last segment has no file extension.
+    The root path is always `/`.
+    """
+
+    KEEP = 'keep'
+    STRIP = 'strip'
+    ADD = 'add'
+
+
+class URLCanonicalizer:
+    """
+    Turns URLs into their canonical form, so equivalent URLs are crawled once:
+    - the scheme and the host are lowercased, the default port is removed;
+    - dot segments are resolved, and trailing slashes follow :param trailing_slash:;
+    - the fragment is dropped, as well as session ids in the path (`;jsessionid=`);
+    - tracking and session parameters are removed from the query, the rest of the
+      parameters are sorted. :param strip_params: are regexes of the extra parameter
+      names to remove.
+
+    URLs with a query are crawled if they match one of :param allow_query: regexes
+    (any URL, if none are set) and none of :param deny_query:. With
+    :param allow_queries: turned off, URLs with a query are not crawled at all.
+    Regexes are searched in the whole canonical URL.
+    """
+
+    SCHEMES = ('http', 'https')
+    TRACKING_PARAMS: Pattern = re.compile(
+        r'utm_\w+|fbclid|gclid|dclid|gbraid|wbraid|msclkid|yclid|mc_cid|mc_eid|_ga|_gl'
+        r'|_hsenc|_hsmi|igshid|mkt_tok|ref_src',
+        re.IGNORECASE,
+    )
+    SESSION_PARAMS: Pattern = re.compile(
+        r'phpsessid|jsessionid|aspsessionid\w*|sessionid|session_id|sid|cfid|cftoken',
+        re.IGNORECASE,
+    )
+    PATH_SESSION_ID: Pattern = re.compile(r';(jsessionid|phpsessid)=[^/]*', re.IGNORECASE)
+    FILE_EXTENSION: Pattern = re.compile(r'\.[A-Za-z0-9]{1,8}$')
+
+    def __init__(
+        self, allow_queries: bool = True, allow_query: Iterable[str] = (),
+        deny_query: Iterable[str] = (), strip_params: Iterable[str] = (),
+        trailing_slash: str = TrailingSlash.KEEP,
+    ):
+        self.allow_queries = allow_queries
+        self.allow_query = [re.compile(pattern) for pattern in allow_query]
+        self.deny_query = [re.compile(pattern) for pattern in deny_query]
+        self.strip_params = [
+            re.compile(pattern, re.IGNORECASE) for pattern in strip_params
+        ]
+        self.trailing_slash = trailing_slash
+
+    def canonicalize(self, url: URL, base: Optional[URL] = None) -> Optional[URL]:
+        """
+        Return the canonical form of :param url: (resolved against :param base:, if
+        it is relative), or None if the URL should not be crawled.
+        """
+        if not url.is_absolute():
+            if base is None:
+                return None
+            url = base.join(url)
+        if url.scheme not in self.SCHEMES or not url.raw_host:
+            return None
+
+        canonical = URL.build(
+            scheme=url.scheme,
+            host=url.raw_host.lower().rstrip('.'),
+            port=None if url.is_default_port() else url.port,
+            path=self.__normalize_path(url.raw_path),
+            encoded=True,
+        )
+
+        params = [
+            (name, value) for name, value in url.query.items()
+            if not self.__should_strip(name)
+        ]
+        if not params:
+            return canonical
+        canonical = canonical.with_query(sorted(params))
+        return canonical if self.__is_query_allowed(canonical) else None
+
+    def __normalize_path(self, path: str) -> str:
+        path = self.PATH_SESSION_ID.sub('', path) or '/'
+        if path == '/' or self.trailing_slash == TrailingSlash.KEEP:
+            return path
+        if self.trailing_slash == TrailingSlash.STRIP:
+            return path.rstrip('/') or '/'
+        last_segment = path.rsplit('/', 1)[-1]
+        if last_segment and not self.FILE_EXTENSION.search(last_segment):
+            return f'{path}/'
+        return path
+
+    def __should_strip(self, name: str) -> bool:
+        return bool(
+            self.TRACKING_PARAMS.fullmatch(name) or self.SESSION_PARAMS.fullmatch(name)
+            or any(pattern.fullmatch(name) for pattern in self.strip_params)
+        )
+
+    def __is_query_allowed(self, url: URL) -> bool:
+        if not self.allow_queries:
+            return False
+        text = str(url)
+        if any(pattern.search(text) for pattern in self.deny_query):
+            return False
+        return not self.allow_query or any(
+            pattern.search(text) for pattern in self.allow_query
+        )
@@ -0,0 +1,84 @@
+import asyncio
+import gzip
+import json
+import os
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+)
+
+from yarl import URL
+
+from spider.crawler.seen import (
+    BaseSeenSet,
+    load_seen_set,
+)
+
+
+class Checkpoint:
+    """
+    Crawl state stored to a gzipped JSON file: the start URL and depth, the URLs
+    waiting in the frontier (with their levels) and the seen-set of the URLs that
+    were already found.
+    """
+
+    VERSION: int = 2
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def save(
+        self, start_url: URL, depth: int, frontier: Iterable[Tuple[URL, int]],
+        seen: BaseSeenSet,
+    ):
+        """
+        Write the crawl state. The state is serialized on the event loop, so it is
+        consistent, but the file is written in a thread.
+        """
+        state = {
+            'version': self.VERSION,
+            'start_url': str(start_url),
+            'depth': depth,
+            'frontier': [(str(url), level) for url, level in frontier],
+            'seen': seen.dump(),
+        }
+        await asyncio.to_thread(self.__write, state)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Read the crawl state. URLs are returned as yarl.URL objects.
+        """
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            state = json.load(file)
+        if state.get('version') != self.VERSION:
+            raise ValueError(f'Checkpoint `{self.path}` has an unsupported version.')
+
+        frontier: List[Tuple[URL, int]] = [
+            (URL(url), level) for url, level in state['frontier']
+        ]
+        return {
+            'start_url': URL(state['start_url']),
+            'depth': state['depth'],
+            'frontier': frontier,
+            'seen': load_seen_set(state['seen']),
+        }
+
+    def remove(self):
+        """
+        Remove the checkpoint file when the crawl is finished.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __write(self, state: Dict[str, Any]):
+        """
+        Write to a temporary file first, so a crash during the write does not corrupt
+        the previous checkpoint.
+        """
+        tmp_path = f'{self.path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as file:
+            json.dump(state, file, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
@@ -1,18 +1,26 @@
 import asyncio
+from collections import Counter
+from datetime import datetime
+import time
 from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
     Optional,
     Tuple,
     Union,
 )
 
-from bs4 import (
-    BeautifulSoup,
-    ResultSet as bsResultSet,
-)
 from httpx import (
     AsyncClient,
     HTTPError,
+    Limits,
+    NetworkError,
+    RemoteProtocolError,
     Response,
+    Timeout,
+    TimeoutException,
 )
 from yarl import URL
 
@@ -21,8 +29,63 @@ from spider.crawler.decorators import (
     use_cache,
 )
 from spider.controllers.core.loggers import logger
-from spider.crawler.exceptions import IncorrectProxyFormatError
-from spider.db.core import BaseDatabase
+from spider.controllers.core.types.abstract_types import AbstractEnumType
+from spider.crawler.canonical import (
+    TrailingSlash,
+    URLCanonicalizer,
+)
+from spider.crawler.checkpoint import Checkpoint
+from spider.crawler.dns_cache import (
+    DNSCache,
+    DNSCachingTransport,
+)
+from spider.crawler.exceptions import (
+    IncorrectProxyFormatError,
+    RetryableRequestError,
+)
+from spider.crawler.frontier import Frontier
+from spider.crawler.page import Page
+from spider.crawler.parsing import (
+    ParserEngines,
+    ParserExecutors,
+    ParserPool,
+)
+from spider.crawler.retry import RetryPolicy
+from spider.crawler.robots import RobotsCache
+from spider.crawler.scope import (
+    CrawlScope,
+    Scopes,
+)
+from spider.crawler.seen import (
+    BaseSeenSet,
+    create_seen_set,
+    ExactSeenSet,
+    SeenSets,
+)
+from spider.crawler.sitemap import (
+    SitemapEntry,
+    SitemapReader,
+)
+from spider.db.core import (
+    BaseDatabase,
+    BatchWriter,
+    PageRecord,
+)
+from spider.file_storage import (
+    ContentAddressedFileWriter,
+    get_file_writer,
+)
+
+
+class KnownURLModes(AbstractEnumType):
+    """
+    What to do with the URLs that are already stored in the DB when the crawl does not
+    overwrite them: `skip` them without a request, or `follow` them, i.e. download
+    them to find new links, but do not store them again.
+    """
+
+    SKIP = 'skip'
+    FOLLOW = 'follow'
 
 
 class Crawler:
@@ -30,102 +93,753 @@ class Crawler:
     Performs crawling of a URL with specified depth level.
     """
 
+    HTML_CONTENT_TYPES: Tuple[str, ...] = ('text/html', 'application/xhtml+xml')
+    RETRYABLE_EXCEPTIONS: Tuple[type, ...] = (
+        TimeoutException, NetworkError, RemoteProtocolError,
+    )
+    SITEMAP_BATCH_SIZE: int = 500
+
     def __init__(
         self, database: BaseDatabase, start_url: str, depth: int,
         silent: bool = False, should_log_time: bool = True, should_use_cache: bool = True,
         overwrite: bool = True, proxy: Union[str, bool] = False,
-        concurrency_limit: int = 5,
+        concurrency_limit: int = 5, host_concurrency_limit: int = 2,
+        host_rate_limit: float = 0, progress_interval: float = 5.0,
+        checkpoint_path: Optional[str] = None, checkpoint_interval: float = 60.0,
+        resume_path: Optional[str] = None, breadth_first: bool = False,
+        parser_executor: str = ParserExecutors.THREAD, parser_workers: int = 0,
+        parser_engine: str = ParserEngines.LXML, max_page_bytes: int = 10 * 1024 * 1024,
+        conditional_requests: bool = True, http2: bool = False,
+        max_connections: int = 100, max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0, connect_timeout: float = 5.0,
+        read_timeout: float = 5.0, pool_timeout: float = 5.0,
+        retries: int = 3, retry_backoff: float = 0.5, breaker_threshold: int = 5,
+        breaker_cooldown: float = 60.0, respect_robots: bool = True,
+        robots_ttl: float = 3600, sitemap: Union[str, bool] = False,
+        dns_cache: bool = True, dns_ttl: float = 300,
+        seen_set: str = SeenSets.EXACT, seen_capacity: int = 100_000,
+        seen_error_rate: float = 0.001, allow_queries: bool = True,
+        allow_query: Iterable[str] = (), deny_query: Iterable[str] = (),
+        strip_params: Iterable[str] = (), trailing_slash: str = TrailingSlash.KEEP,
+        known_urls: str = KnownURLModes.SKIP, known_batch_size: int = 10_000,
+        file_storage: Optional[str] = None, batch_size: int = 100,
+        flush_interval: float = 1.0, write_queue_size: int = 1000,
+        ingestion: Optional[str] = None,
+        scope: str = Scopes.ANY, allowed_domains: Iterable[str] = (),
+        include: Iterable[str] = (), exclude: Iterable[str] = (),
+        max_pages: int = 0, max_bytes: int = 0, max_duration: float = 0,
+        adaptive_concurrency: bool = False, max_concurrency_limit: int = 0,
+        max_host_concurrency_limit: int = 0,
     ):
         self.proxy = proxy if isinstance(proxy, str) else None
         client_proxies = (
             {'http://': self.proxy, 'https://': self.proxy} if self.proxy
             else None
         )
+        self.http2 = http2
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = Timeout(
+            read_timeout, connect=connect_timeout, read=read_timeout,
+            pool=pool_timeout,
+        )
+        self.dns = DNSCache(ttl=dns_ttl) if dns_cache else None
+        transport = (
+            DNSCachingTransport(self.dns, http2=self.http2, limits=self.limits)
+            if self.dns else None
+        )
         try:
-            self.client = AsyncClient(proxies=client_proxies)
+            self.client = AsyncClient(
+                proxies=client_proxies, http2=self.http2, limits=self.limits,
+                timeout=self.timeout, transport=transport,
+            )
         except ValueError:
             raise IncorrectProxyFormatError(self.proxy)
+        self.robots = (
+            RobotsCache(self.client, robots_ttl, concurrency_limit=concurrency_limit)
+            if respect_robots else None
+        )
 
         self.db = database
+        if file_storage:
+            self.db.file_controller = get_file_writer(file_storage)
+        if ingestion in self.db.ingestion_modes:
+            self.db.ingestion = ingestion
+        elif ingestion:
+            logger.error(
+                f'{self.db.verbose} does not support `{ingestion}` ingestion, pages are '
+                f'saved with `{self.db.ingestion}`.'
+            )
 
         if not start_url.startswith('http'):
             start_url = f'https://{start_url}'
+        self.canonicalizer = URLCanonicalizer(
+            allow_queries, allow_query, deny_query, strip_params, trailing_slash
+        )
         self.url = URL(start_url)
+        self.url = self.canonicalizer.canonicalize(self.url) or self.url
+        self.scope = CrawlScope(self.url, scope, allowed_domains, include, exclude)
         self.depth = depth
         self.silent = silent
         self.overwrite = overwrite
+        self.known_urls = known_urls
+        self.known_batch_size = known_batch_size
+        self.known: Optional[ExactSeenSet] = None
         self.should_log_time = should_log_time
         self.should_use_cache = should_use_cache
-        self.concurrency_limit = concurrency_limit
+        self.concurrency_limit = max(int(concurrency_limit or 5), 1)
+        self.host_concurrency_limit = int(host_concurrency_limit or 2)
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_concurrency_limit = max(
+            int(max_concurrency_limit or 4 * self.concurrency_limit),
+            self.concurrency_limit,
+        )
+        self.max_host_concurrency_limit = max(
+            int(max_host_concurrency_limit or 4 * self.host_concurrency_limit),
+            self.host_concurrency_limit,
+        )
+        self.host_rate_limit = float(host_rate_limit or 0)
+        self.progress_interval = progress_interval
+        self.breadth_first = breadth_first
+        self.sitemap = sitemap
+
+        self.frontier: Optional[Frontier] = None
+        self.parser = ParserPool(parser_executor, parser_workers, parser_engine)
+        self.visited: BaseSeenSet = create_seen_set(
+            seen_set, seen_capacity, seen_error_rate
+        )
+
+        self.resume_path = resume_path
+        checkpoint_path = checkpoint_path or resume_path
+        self.checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_interval = checkpoint_interval
+        self.max_page_bytes = max_page_bytes
+        self.conditional_requests = conditional_requests
+        self.retry_policy = RetryPolicy(retries, retry_backoff)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.__attempts: Dict[URL, int] = {}
+
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.stop_reason: Optional[str] = None
+        self.writer = BatchWriter(
+            self.db, batch_size, flush_interval, write_queue_size,
+            silent=self.silent, overwrite=self.overwrite,
+        )
 
         self.successful_crawls_counter = 0
         self.total_calls = 0
+        self.skipped_pages_counter = 0
+        self.not_modified_counter = 0
+        self.known_skipped_counter = 0
+        self.known_followed_counter = 0
+        self.retries_counter = 0
+        self.failed_pages_counter = 0
+        self.breaker_trips_counter = 0
+        self.sitemap_urls_counter = 0
+        self.sitemap_unchanged_counter = 0
+        self.out_of_scope_counter = 0
+        self.downloaded_bytes = 0
+        self.http_versions = Counter()
 
     @log_time
     async def crawl(self):
         """
-        Main crawling method. The whole procedure is recursive and is performed in load().
+        Main crawling method. URLs are taken from the frontier by a fixed pool of
+        workers, each of them performs load() on one URL at a time.
+
+        The number of workers equals the concurrency limit, so only a controlled number
+        of requests are made at once, preventing resource and network overload and
+        considering server limits. Child URLs are put back to the frontier instead of
+        being crawled recursively, which keeps memory usage steady on wide sites.
+
+        With adaptive concurrency, there are as many workers as the maximum
+        concurrency limit, and the frontier holds them back according to the current
+        limits, which follow the latency and the errors of the responses.
+
+        If a checkpoint path is set, the frontier, the pages that are not saved yet
+        and the seen-set are periodically saved to it, so the crawl can be resumed
+        later.
 
-        Uses a semaphore to ensure that only a controlled number of requests are made
-        at once, preventing resource and network overload and considering server limits.
-        As each task completes its execution, the semaphore is released, allowing
-        other waiting tasks to acquire it and start their execution.
+        The frontier is seeded while the workers are already running, so the pages
+        found in a sitemap are crawled while the sitemap is still being read.
+
+        When the crawl is over or one of the budgets (pages, bytes, duration) is
+        exhausted, the frontier is closed: the workers finish the pages in flight, and
+        the write queue is drained before the DB is disconnected. While the write
+        queue is full, the workers wait before they fetch the next page.
         """
+        state = None
+        if self.resume_path:
+            try:
+                state = Checkpoint(self.resume_path).load()
+            except (OSError, ValueError, KeyError) as exc:
+                logger.error(f'Cannot resume from checkpoint `{self.resume_path}`: {exc}')
+                return
+
         try:
             await self.db.connect()
             await self.db.create_table(check_first=True, silent=True)
         except Exception as exc:
             logger.error(f'Database connection error: {exc}')
             return
+        if not self.overwrite:
+            await self.__load_known_urls()
+
+        self.frontier = Frontier(
+            self.host_concurrency_limit, self.host_rate_limit,
+            level_synchronous=self.breadth_first,
+            breaker_threshold=self.breaker_threshold,
+            breaker_cooldown=self.breaker_cooldown,
+            adaptive=self.adaptive_concurrency,
+            concurrency_limit=self.concurrency_limit,
+            max_concurrency_limit=self.max_concurrency_limit,
+            max_host_concurrency_limit=self.max_host_concurrency_limit,
+        )
+        if self.stop_reason is not None:
+            self.frontier.close()
 
+        workers = [
+            asyncio.create_task(self.__work())
+            for _ in range(
+                self.max_concurrency_limit if self.adaptive_concurrency
+                else self.concurrency_limit
+            )
+        ]
+        tasks = [asyncio.create_task(self.__report_progress())]
+        if self.checkpoint:
+            tasks.append(asyncio.create_task(self.__save_checkpoints()))
+        deadline = (
+            asyncio.get_running_loop().call_later(
+                self.max_duration, self.stop, f'{self.max_duration}s have passed'
+            )
+            if self.max_duration else None
+        )
         try:
-            async with asyncio.Semaphore(value=self.concurrency_limit):
-                await self.load(self.url, 0)
+            if state:
+                await self.__restore(state)
+            else:
+                await self.seed()
+            await self.join()
         finally:
+            if deadline:
+                deadline.cancel()
+            self.frontier.close()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.writer.close()
+            if self.checkpoint:
+                await self.__finish_checkpoint()
             await self.client.aclose()
             await self.db.disconnect()
+            self.parser.shutdown()
             logger.crawl_ok(
                 f'Done. (crawled: {self.successful_crawls_counter}, '
-                f'total calls: {self.total_calls})'
+                f'total calls: {self.total_calls}, '
+                f'not modified: {self.not_modified_counter}, '
+                f'already stored: {self.known_skipped_counter} skipped, '
+                f'{self.known_followed_counter} followed, '
+                f'skipped non-HTML or too large: {self.skipped_pages_counter}, '
+                f'retries: {self.retries_counter}, '
+                f'failed after retries: {self.failed_pages_counter}, '
+                f'circuit breaker trips: {self.breaker_trips_counter}, '
+                f'out of scope: {self.out_of_scope_counter}, '
+                f'downloaded: {self.downloaded_bytes} bytes, '
+                + (
+                    f'files deduplicated: '
+                    f'{ContentAddressedFileWriter.deduplicated_counter}, '
+                    if self.db.file_controller is ContentAddressedFileWriter else ''
+                )
+                + (f'stopped: {self.stop_reason}, ' if self.stop_reason else '')
+                + (f'{self.robots.summary()}, ' if self.robots else '')
+                + (
+                    f'from sitemap: {self.sitemap_urls_counter}, '
+                    f'unchanged since the last crawl: {self.sitemap_unchanged_counter}, '
+                    if self.sitemap else ''
+                ) +
+                f'{self.writer.summary()}, '
+                f'{self.parser.summary()}, {self.visited.summary()})'
             )
+            logger.crawl_ok(f'HTTP settings: {self.__http_summary()}')
+
+    async def seed(self):
+        """
+        Put the start URL to the frontier, and the pages of the sitemap if it is
+        enabled.
+        """
+        await self.enqueue(self.url, 0)
+        if self.sitemap:
+            await self.seed_sitemap()
+
+    async def seed_sitemap(self):
+        """
+        Put the pages listed in the sitemap to the frontier on the level 0, unless
+        they were not modified since they were crawled the last time. The crawl times
+        are read from the DB for SITEMAP_BATCH_SIZE pages at once.
+
+        If the sitemap URL is not set explicitly, the sitemaps from robots.txt are
+        used, or `/sitemap.xml` of the start URL's host.
+        """
+        reader = SitemapReader(self.client)
+        for sitemap_url in await self.__get_sitemap_urls():
+            logger.crawl_info(f'Read sitemap: {sitemap_url}')
+            entries = []
+            async for entry in reader.read(sitemap_url):
+                entry.url = self.canonicalizer.canonicalize(entry.url)
+                if entry.url is None:
+                    continue
+                entries.append(entry)
+                if len(entries) >= self.SITEMAP_BATCH_SIZE:
+                    await self.__enqueue_sitemap_entries(entries)
+                    entries = []
+            await self.__enqueue_sitemap_entries(entries)
+
+    async def join(self):
+        """
+        Wait until there is nothing left to crawl, or the crawl is stopped.
+        """
+        await self.frontier.join()
+
+    def stop(self, reason: str):
+        """
+        Stop the crawl gracefully because of the :param reason:: no more URLs are
+        taken from the frontier, but the pages in flight are finished and stored.
+        """
+        if self.stop_reason is not None:
+            return
+        self.stop_reason = reason
+        if self.frontier is None:
+            logger.crawl_ok(f'Stopping the crawl: {reason}.')
+            return
+        logger.crawl_ok(
+            f'Stopping the crawl: {reason}. Finishing {self.frontier.in_flight} '
+            f'pages in flight.'
+        )
+        self.frontier.close()
 
     @use_cache
+    async def enqueue(self, url: URL, level: int):
+        """
+        Put :param url: found on the :param level: to the frontier.
+        """
+        if await self.admit(url):
+            self.frontier.put(url, level)
+
+    async def enqueue_all(self, urls: Iterable[URL], level: int):
+        """
+        Put every URL of :param urls: found on the :param level: to the frontier.
+        """
+        urls = list(urls)
+        await self.prefetch_robots(urls)
+        for url in urls:
+            await self.enqueue(url, level)
+
+    async def prefetch_robots(self, urls: Iterable[URL]):
+        """
+        Fetch robots.txt of the hosts of :param urls: in scope all at once, so
+        admit() does not wait for the new hosts one after another.
+        """
+        if self.robots:
+            await self.robots.prefetch(
+                url for url in urls if url == self.url or self.scope.allows(url)
+            )
+
+    def finish(self, url: URL):
+        """
+        Called when :param url: is processed for good, i.e. it is not going to be
+        retried.
+        """
+        pass
+
+    def in_scope(self, url: URL) -> bool:
+        """
+        Check :param url: against the crawl scope. The start URL is always in scope.
+        """
+        if url != self.url and not self.scope.allows(url):
+            self.out_of_scope_counter += 1
+            return False
+        return True
+
+    async def admit(self, url: URL) -> bool:
+        """
+        Check :param url: against the crawl scope and robots.txt of its host before
+        it enters the frontier, and limit the rate of the host by its `Crawl-delay`.
+        The host is resolved in the background, so the connection does not wait for
+        DNS later.
+        """
+        if not self.in_scope(url):
+            return False
+        if self.dns:
+            self.dns.prefetch(url.host)
+        if self.robots is None:
+            return True
+        if not await self.robots.allowed(url):
+            logger.crawl_info(f'Disallowed by robots.txt: {url}')
+            return False
+        delay = await self.robots.crawl_delay(url)
+        if delay:
+            self.frontier.set_host_rate(url.host, 1 / delay)
+        return True
+
+    async def __work(self):
+        """
+        Worker loop: take the next URL from the frontier and crawl it.
+        """
+        while True:
+            item = await self.frontier.get()
+            if item is None:
+                return
+            url, level = item
+            try:
+                await self.load(url, level)
+            except Exception as exc:
+                logger.error(f'Failed to crawl {url}: {exc}')
+            finally:
+                if self.frontier.task_done(url):
+                    self.finish(url)
+                self.__check_budgets()
+
+    def __check_budgets(self):
+        """
+        Stop the crawl if the number of stored pages or downloaded bytes has reached
+        its limit. The pages in flight are still finished, so the limits can be
+        exceeded by up to concurrency_limit pages.
+        """
+        if self.max_pages and self.successful_crawls_counter >= self.max_pages:
+            self.stop(f'{self.successful_crawls_counter} pages are stored')
+        elif self.max_bytes and self.downloaded_bytes >= self.max_bytes:
+            self.stop(f'{self.downloaded_bytes} bytes are downloaded')
+
+    async def __report_progress(self):
+        """
+        Periodically log the state of the frontier.
+        """
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            level = f'level {self.frontier.level}, ' if self.breadth_first else ''
+            limits = ''
+            if self.adaptive_concurrency:
+                lowest, highest = self.frontier.host_concurrency_limits
+                limits = (
+                    f'concurrency limit {self.frontier.concurrency_limit}'
+                    f'/{self.max_concurrency_limit}, per host {lowest}-{highest}, '
+                )
+            logger.crawl_info(
+                f'Progress: {level}queued {self.frontier.queued}, '
+                f'in flight {self.frontier.in_flight}, {limits}'
+                f'hosts {self.frontier.hosts}, '
+                f'crawled {self.successful_crawls_counter}, '
+                f'pending DB writes {self.writer.pending}'
+            )
+
+    async def __save_checkpoints(self):
+        """
+        Periodically save the crawl state to the checkpoint.
+        """
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await self.checkpoint.save(
+                    self.url, self.depth, self.__unfinished(), self.visited
+                )
+            except OSError as exc:
+                logger.error(f'Cannot save checkpoint: {exc}')
+            else:
+                logger.crawl_info(f'Saved checkpoint: {self.checkpoint.path}')
+
+    async def __finish_checkpoint(self):
+        """
+        Save the last state if the crawl was stopped before the frontier was drained,
+        or remove the checkpoint if there is nothing left to crawl.
+        """
+        pending = self.__unfinished()
+        if pending:
+            await self.checkpoint.save(self.url, self.depth, pending, self.visited)
+            logger.crawl_ok(
+                f'Crawl stopped with {len(pending)} URLs left. Resume it with '
+                f'`--resume {self.checkpoint.path}`'
+            )
+        else:
+            self.checkpoint.remove()
+
+    def __unfinished(self) -> List[Tuple[URL, int]]:
+        """
+        Return the URLs to resume the crawl from: the ones left in the frontier, and
+        the pages that still wait to be saved. Their links are already in the
+        frontier, so they are crawled again on the last level, just to be saved.
+        """
+        pending = self.frontier.pending()
+        in_frontier = {url for url, _ in pending}
+        return pending + [
+            (record.url, self.depth) for record in self.writer.unsaved()
+            if record.url not in in_frontier
+        ]
+
+    async def __restore(self, state: Dict[str, Any]):
+        """
+        Continue the crawl from the :param state: loaded from a checkpoint.
+        """
+        self.url = state['start_url']
+        self.scope.start_url = self.url
+        self.depth = state['depth']
+        self.visited = state['seen']
+        for url, level in state['frontier']:
+            if await self.admit(url):
+                self.frontier.put(url, level)
+        logger.crawl_info(
+            f'Resumed crawl of {self.url} with {len(state["frontier"])} URLs left '
+            f'and {len(self.visited)} URLs visited.'
+        )
+
     async def load(self, url: URL, level: int):
         """
-        Perform crawling procedure on the current :param level: and generate
-        deeper crawling tasks, if :param level: is less than the specified depth.
+        Perform crawling procedure on the current :param level: and put the child URLs
+        to the frontier, if :param level: is less than the specified depth.
         """
+        is_known = self.known is not None and url in self.known
+        if is_known and self.known_urls == KnownURLModes.SKIP and url != self.url:
+            self.known_skipped_counter += 1
+            logger.crawl_info(f'Already stored, skipping: {url}')
+            return
+
         self.total_calls += 1
+        validators = await self.__get_validators(url)
+        started_at = time.monotonic()
         try:
-            title, html_body, soup = await self.__scrap_url(url)
-            self.successful_crawls_counter += 1
-        except TypeError:
+            page = await self.__scrap_url(url, validators)
+        except RetryableRequestError as exc:
+            self.__retry_later(url, level, exc)
+            return
+
+        self.frontier.record_success(url, time.monotonic() - started_at)
+        self.__attempts.pop(url, None)
+        if page is None:
             logger.crawl_info(f'Cannot download URL: {url}')
             return
 
-        asyncio.ensure_future(
-            self.db.save(
-                url, title, html_body, parent=self.url.human_repr(),
-                silent=self.silent, overwrite=self.overwrite,
-            ),
-            loop=asyncio.get_running_loop()
+        if page.not_modified:
+            self.not_modified_counter += 1
+            logger.crawl_info(f'Not modified: {url}')
+            await self.__touch(url)
+            if level >= self.depth:
+                return
+            hrefs = await self.__read_stored_hrefs(validators['html'])
+        elif is_known:
+            self.known_followed_counter += 1
+            if level >= self.depth:
+                return
+            title, hrefs = await self.parser.parse(page.html)
+        else:
+            title, hrefs = await self.parser.parse(page.html)
+            self.successful_crawls_counter += 1
+
+            await self.writer.put(
+                PageRecord(
+                    url, title, page.html, parent=self.url.human_repr(),
+                    etag=page.etag, last_modified=page.last_modified,
+                )
+            )
+
+            if level >= self.depth:
+                return
+
+        await self.enqueue_all(self.__generate_refs(hrefs, url), level + 1)
+
+    async def __load_known_urls(self):
+        """
+        Load the URLs stored in the DB to an in-memory index in batches, so the crawl
+        that does not overwrite them can tell the known URLs without any queries.
+        """
+        started_at = time.monotonic()
+        known = ExactSeenSet(self.known_batch_size)
+        try:
+            async for urls in self.db.iter_urls(self.known_batch_size):
+                for url in urls:
+                    known.add(url)
+        except Exception as exc:
+            logger.error(f'Cannot load the stored URLs from the DB: {exc}')
+            return
+
+        self.known = known
+        logger.crawl_info(
+            f'Loaded {len(known)} stored URLs in {time.monotonic() - started_at:.2f}s '
+            f'({known.summary()})'
+        )
+
+    async def __get_sitemap_urls(self) -> List[URL]:
+        if isinstance(self.sitemap, str):
+            return [self.url.join(URL(self.sitemap))]
+        if self.robots:
+            rules = await self.robots.get(self.url)
+            if rules.site_maps():
+                return [URL(url) for url in rules.site_maps()]
+        return [self.url.join(URL('/sitemap.xml'))]
+
+    async def __enqueue_sitemap_entries(self, entries: List[SitemapEntry]):
+        """
+        Put the pages of the sitemap :param entries: to the frontier, except the ones
+        that were crawled after their `lastmod`.
+        """
+        crawl_times = await self.__get_crawl_times(
+            [entry.url for entry in entries if entry.lastmod]
         )
+        for entry in entries:
+            crawled_at = crawl_times.get(str(entry.url))
+            if entry.lastmod and crawled_at and entry.lastmod <= crawled_at:
+                self.sitemap_unchanged_counter += 1
+                continue
+            self.sitemap_urls_counter += 1
+            await self.enqueue(entry.url, 0)
 
-        if level >= self.depth:
+    async def __get_crawl_times(self, urls: List[URL]) -> Dict[str, datetime]:
+        """
+        Get the times the :param urls: were crawled the last time, by URL.
+        """
+        if not urls:
+            return {}
+        try:
+            return await self.db.get_crawl_times(urls)
+        except Exception as exc:
+            logger.crawl_info(f'Cannot get crawl times of the sitemap pages: {exc}')
+            return {}
+
+    def __retry_later(self, url: URL, level: int, exc: RetryableRequestError):
+        """
+        Put :param url: back to the frontier to be repeated after a backoff, unless
+        it ran out of retries. Failures are counted by the host's circuit breaker.
+        """
+        if self.frontier.record_failure(url):
+            self.breaker_trips_counter += 1
+            logger.crawl_info(
+                f'Circuit breaker is open for {url.host}: its URLs are parked for '
+                f'{self.breaker_cooldown}s'
+            )
+
+        attempt = self.__attempts.get(url, 0) + 1
+        if not self.retry_policy.should_retry(attempt):
+            self.__attempts.pop(url, None)
+            self.failed_pages_counter += 1
+            logger.crawl_info(f'{exc}. Giving up after {attempt} attempts.')
             return
 
-        refs = self.__generate_refs(soup.findAll('a'))
-        todos = [self.load(ref, level + 1) for ref in refs]
-        await asyncio.gather(*todos)
+        self.__attempts[url] = attempt
+        self.retries_counter += 1
+        delay = self.retry_policy.delay(attempt, exc.retry_after)
+        logger.crawl_info(f'{exc}. Retry #{attempt} in {delay:.2f}s.')
+        self.frontier.retry(url, level, delay)
+
+    def __http_summary(self) -> str:
+        """
+        Describe the effective HTTP client settings and the protocol versions that
+        servers responded with.
+        """
+        versions = ', '.join(
+            f'{version}: {count}' for version, count in self.http_versions.most_common()
+        )
+        return (
+            f'HTTP/2 {"on" if self.http2 else "off"}, '
+            + (
+                f'adaptive concurrency limit {self.frontier.concurrency_limit} '
+                f'(decreased {self.frontier.limiter.decreases} times), '
+                if self.frontier and self.frontier.limiter else ''
+            ) +
+            f'max connections {self.limits.max_connections}, '
+            f'max keepalive {self.limits.max_keepalive_connections} '
+            f'(expiry {self.limits.keepalive_expiry}s), '
+            f'timeouts: connect {self.timeout.connect}s, read {self.timeout.read}s, '
+            f'pool {self.timeout.pool}s; responses by version: {versions or "none"}'
+            + (f'; {self.dns.summary()}' if self.dns else '')
+        )
+
+    async def __get_validators(self, url: URL) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Get ETag and Last-Modified stored for :param url: during the previous crawl.
+        """
+        if not self.conditional_requests:
+            return None
+        try:
+            return await self.db.get_validators(url)
+        except Exception as exc:
+            logger.crawl_info(f'Cannot get validators of {url} from the DB: {exc}')
+            return None
+
+    async def __touch(self, url: URL):
+        """
+        Refresh the crawl time of the not modified :param url:, so the sitemap does
+        not make it look stale.
+        """
+        try:
+            await self.db.touch(url)
+        except Exception as exc:
+            logger.crawl_info(f'Cannot update the crawl time of {url} in the DB: {exc}')
+
+    async def __read_stored_hrefs(self, file_name: str) -> List[str]:
+        """
+        Get the links of a not modified page from its stored file.
+        """
+        try:
+            html = await self.db.file_controller.read(file_name)
+        except OSError as exc:
+            logger.crawl_info(f'Cannot read stored file {file_name}: {exc}')
+            return []
+        title, hrefs = await self.parser.parse(html)
+        return hrefs
 
-    async def __scrap_url(self, url: URL) -> Optional[
-        Tuple[Optional[str], str, BeautifulSoup]
-    ]:
+    async def __scrap_url(
+        self, url: URL, validators: Optional[Dict[str, Optional[str]]] = None
+    ) -> Optional[Page]:
         """
-        Async request of :param url: and response parsing.
+        Async request of :param url:, returns the downloaded page. Raises
+        RetryableRequestError on timeouts, network errors and the status codes which
+        are worth repeating the request for (e.g. 429 and 503).
+
+        If :param validators: from the previous crawl are passed, the request is
+        conditional, and the page is returned with `not_modified` set if the server
+        responds with 304.
+
+        The response is streamed: the body is not downloaded if the headers say it is
+        not HTML or it is bigger than max_page_bytes, and the download is aborted as
+        soon as the body exceeds max_page_bytes.
         """
+        headers = {}
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
         try:
-            response = await self.client.get(str(url))
+            async with self.client.stream('GET', str(url), headers=headers) as response:
+                self.http_versions[response.http_version] += 1
+                if response.status_code == 304 and validators:
+                    return Page(not_modified=True)
+                if response.status_code in self.retry_policy.RETRYABLE_STATUS_CODES:
+                    raise RetryableRequestError(
+                        url, f'HTTP {response.status_code}',
+                        retry_after=response.headers.get('retry-after'),
+                    )
+                if self.__should_skip(url, response):
+                    self.skipped_pages_counter += 1
+                    return
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    self.downloaded_bytes += len(chunk)
+                    if self.max_page_bytes and len(body) > self.max_page_bytes:
+                        logger.crawl_info(
+                            f'Skip {url}: body is bigger than {self.max_page_bytes} bytes'
+                        )
+                        self.skipped_pages_counter += 1
+                        return
+        except self.RETRYABLE_EXCEPTIONS as exc:
+            raise RetryableRequestError(url, type(exc).__name__) from exc
         except HTTPError as exc:
             logger.crawl_info(
                 f'HTTP Exception for {exc.request.url}: {type(exc).__name__}' +
@@ -135,38 +849,45 @@ class Crawler:
         except ValueError:
             return
 
-        return self.__parsed(response)
+        return Page(
+            html=body.decode(response.encoding or 'utf-8', errors='replace'),
+            etag=response.headers.get('etag'),
+            last_modified=response.headers.get('last-modified'),
+        )
 
-    def __generate_refs(self, bs_result_set: bsResultSet):
+    def __should_skip(self, url: URL, response: Response) -> bool:
         """
-        Find hrefs in the current page to go deeper.
+        Check the headers of :param response: before reading the body: the content
+        type should be HTML (or not specified), and the content length should fit
+        into max_page_bytes.
         """
-        for ref in bs_result_set:
-            try:
-                href = URL(ref.attrs['href'])
+        content_type = response.headers.get('content-type', '')
+        mime_type = content_type.split(';')[0].strip().lower()
+        if mime_type and mime_type not in self.HTML_CONTENT_TYPES:
+            logger.crawl_info(f'Skip {url}: content type `{mime_type}` is not HTML')
+            return True
 
-                if href.query_string:
-                    continue
-                if not href.is_absolute():
-                    href = self.url.join(href)
-                if href != self.url:
-                    yield href
-            except KeyError:
-                continue
+        content_length = response.headers.get('content-length', '')
+        if (
+            self.max_page_bytes and content_length.isdigit()
+            and int(content_length) > self.max_page_bytes
+        ):
+            logger.crawl_info(
+                f'Skip {url}: content length {content_length} is bigger than '
+                f'{self.max_page_bytes} bytes'
+            )
+            return True
+        return False
 
-    @classmethod
-    def __parsed(cls, response: Response) -> Tuple[Optional[str], str, BeautifulSoup]:
+    def __generate_refs(self, hrefs: Iterable[str], page_url: URL):
         """
-        Extract html_body and title from the :param response:.
+        Turn hrefs found on the page :param page_url: into canonical URLs to go
+        deeper. Relative hrefs are resolved against the page.
         """
-        # noinspection PyTypeChecker
-        soup = BeautifulSoup(response, 'lxml')
-
-        title_html = soup.title
-        title = getattr(title_html, 'text', None)
-        if title:
-            title = title.replace('\n', '').strip()
-
-        html_body = response.text
-
-        return title, html_body, soup
+        for ref in hrefs:
+            try:
+                href = self.canonicalizer.canonicalize(URL(ref), page_url)
+            except ValueError:
+                continue
+            if href is not None and href != self.url:
+                yield href
@@ -10,17 +10,16 @@ from spider.controllers.core.loggers import logger
 def use_cache(func: Callable[..., Any]) -> Callable[..., Any]:
     """
     Skip already crawled URLs to prevent DB overrides during current crawling operation.
+    The URLs are stored in the `visited` seen-set of the instance, so every crawl has its
+    own cache that can be checkpointed and restored.
     """
-    cache = set()
-
     @functools.wraps(func)
     async def wrapper(*args: Any):
         instance, url, depth = args
         do = getattr(instance, 'should_use_cache', True)
 
         if do:
-            if url not in cache:
-                cache.add(url)
+            if instance.visited.add(url):
                 await func(*args)
             else:
                 logger.crawl_info(f'Found {url} in cache. Skipping...')
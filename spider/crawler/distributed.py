@@ -0,0 +1,347 @@
+import asyncio
+import dataclasses
+import time
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+import uuid
+
+from yarl import URL
+
+from spider.controllers.core.loggers import logger
+from spider.crawler.crawler import Crawler
+from spider.crawler.decorators import use_cache
+from spider.crawler.seen import fingerprint
+from spider.db.core import BaseDatabase
+from spider.db.exceptions import (
+    CredentialsError,
+    DatabaseError,
+)
+from spider.db.implementations import RedisPool
+
+
+@dataclasses.dataclass
+class Lease:
+    """
+    Batch of URLs leased by a node from the shared frontier.
+    """
+
+    id: str
+    items: List[Tuple[URL, int]]
+
+
+class RedisFrontier:
+    """
+    Frontier and seen-set of the crawl :param job:, shared by the crawler nodes in
+    Redis:
+    - `spider:<job>:queue` is the list of URLs waiting to be leased;
+    - `spider:<job>:seen` is the set of fingerprints of every URL put to the queue;
+    - `spider:<job>:leases` is the sorted set of the lease ids by their expiry time;
+    - `spider:<job>:lease:<id>` is the list of URLs of a lease.
+
+    URLs are moved from the queue to their lease one by one with RPOPLPUSH, which is
+    atomic, so a URL is always either queued or leased, whenever its node dies.
+    Leases that are not acknowledged or extended within :param lease_ttl: seconds are
+    put back to the queue by any node. Delivery is at-least-once: the URLs of an
+    expired lease may be crawled twice if their node is merely slow.
+
+    Expiry times come from the clock of the Redis server, so the clocks of the nodes
+    do not have to be in sync.
+    """
+
+    def __init__(self, redis: Any, job: str, lease_ttl: float = 300):
+        self.redis = redis
+        self.job = job
+        self.lease_ttl = lease_ttl
+        self.queue_key = f'spider:{job}:queue'
+        self.seen_key = f'spider:{job}:seen'
+        self.leases_key = f'spider:{job}:leases'
+
+    async def add(self, items: Iterable[Tuple[URL, int]]) -> int:
+        """
+        Put the URLs of :param items: that were never added to the job before to the
+        queue, and return their number. Every URL is checked against the shared
+        seen-set with its own SADD, the commands are pipelined. The new URLs are
+        pushed right after that, without Lua there is no way to do both atomically.
+        """
+        items = list(items)
+        if not items:
+            return 0
+        added = await asyncio.gather(*(
+            self.redis.sadd(self.seen_key, fingerprint(url)) for url, _ in items
+        ))
+        new = [
+            self.__encode(url, level)
+            for (url, level), is_new in zip(items, added) if is_new
+        ]
+        if new:
+            await self.redis.lpush(self.queue_key, *new)
+        return len(new)
+
+    async def lease(self, size: int) -> Optional[Lease]:
+        """
+        Lease up to :param size: URLs from the queue, or return None if it is empty.
+        The lease is registered before the URLs are moved, so it can be found and
+        requeued in any case.
+        """
+        lease_id = uuid.uuid4().hex
+        await self.redis.zadd(
+            self.leases_key, await self.redis.time() + self.lease_ttl, lease_id
+        )
+        lease_key = self.__lease_key(lease_id)
+        values = await asyncio.gather(*(
+            self.redis.rpoplpush(self.queue_key, lease_key) for _ in range(size)
+        ))
+        items = [self.__decode(value) for value in values if value is not None]
+        if not items:
+            await self.redis.zrem(self.leases_key, lease_id)
+            return None
+        return Lease(lease_id, items)
+
+    async def ack(self, lease_id: str):
+        """
+        Acknowledge that every URL of the lease is processed.
+        """
+        await self.redis.delete(self.__lease_key(lease_id))
+        await self.redis.zrem(self.leases_key, lease_id)
+
+    async def extend(self, lease_ids: Iterable[str]):
+        """
+        Prolong the leases that are still being processed by :param lease_ttl:.
+        """
+        expires_at = await self.redis.time() + self.lease_ttl
+        await asyncio.gather(*(
+            self.redis.zadd(
+                self.leases_key, expires_at, lease_id,
+                exist=self.redis.ZSET_IF_EXIST,
+            )
+            for lease_id in lease_ids
+        ))
+
+    async def release(self, lease_id: str) -> int:
+        """
+        Put the URLs of the lease back to the queue and return their number.
+        """
+        lease_key = self.__lease_key(lease_id)
+        count = 0
+        while await self.redis.rpoplpush(lease_key, self.queue_key) is not None:
+            count += 1
+        await self.redis.zrem(self.leases_key, lease_id)
+        return count
+
+    async def return_items(self, lease_id: str, items: Iterable[Tuple[URL, int]]):
+        """
+        Put :param items: of the lease that were not processed back to the queue, and
+        drop the lease.
+        """
+        items = [self.__encode(url, level) for url, level in items]
+        if items:
+            await self.redis.lpush(self.queue_key, *items)
+        await self.ack(lease_id)
+
+    async def requeue_expired(self) -> int:
+        """
+        Release the leases of every node that have expired, return the number of
+        URLs put back to the queue.
+        """
+        expired = await self.redis.zrangebyscore(
+            self.leases_key, max=await self.redis.time()
+        )
+        count = 0
+        for lease_id in expired:
+            count += await self.release(lease_id.decode('utf-8'))
+        return count
+
+    async def is_drained(self) -> bool:
+        """
+        Check if the whole job is done: no URL is queued or leased by any node.
+        """
+        queued, leased = await asyncio.gather(
+            self.redis.llen(self.queue_key), self.redis.zcard(self.leases_key)
+        )
+        return not queued and not leased
+
+    def __lease_key(self, lease_id: str) -> str:
+        return f'spider:{self.job}:lease:{lease_id}'
+
+    @classmethod
+    def __encode(cls, url: URL, level: int) -> str:
+        return f'{level} {url}'
+
+    @classmethod
+    def __decode(cls, value: bytes) -> Tuple[URL, int]:
+        level, url = value.decode('utf-8').split(' ', 1)
+        return URL(url), int(level)
+
+
+class DistributedCrawler(Crawler):
+    """
+    Crawler that runs on one of the nodes of the distributed crawl :param job:. The
+    URLs are shared through the Redis frontier at :param redis_url:: the node leases
+    batches of :param lease_size: URLs, crawls them with its local frontier (so the
+    host limits apply per node), pushes the found URLs to the shared frontier, and
+    acknowledges a batch when every URL of it is processed.
+
+    The local seen-set filters the URLs before they are checked against the shared
+    one. Checkpoints are not used, since the state of the crawl is kept in Redis.
+    """
+
+    POLL_INTERVAL: float = 0.2
+
+    def __init__(
+        self, database: BaseDatabase, redis_url: str, job: str, lease_size: int = 50,
+        lease_ttl: float = 300, **kwargs: Any,
+    ):
+        kwargs['checkpoint_path'] = kwargs['resume_path'] = None
+        super().__init__(database, **kwargs)
+        self.pool = RedisPool(redis_url, URL(redis_url).host)
+        self.job = job
+        self.lease_size = max(lease_size, 1)
+        self.lease_ttl = lease_ttl
+        self.shared: Optional[RedisFrontier] = None
+
+        self.__leases: Dict[str, int] = {}
+        self.__lease_of: Dict[URL, str] = {}
+        self.__finished_leases: List[str] = []
+
+        self.leased_counter = 0
+        self.requeued_counter = 0
+
+    async def crawl(self):
+        """
+        Connect to the shared frontier, crawl until the whole job is done, and return
+        the unfinished leases to the queue if the crawl is stopped earlier.
+        """
+        try:
+            self.shared = RedisFrontier(
+                await self.pool.connect(), self.job, self.lease_ttl
+            )
+        except (CredentialsError, DatabaseError) as exc:
+            logger.error(f'Cannot connect to the shared frontier: {exc}')
+            return
+
+        try:
+            await super().crawl()
+        finally:
+            await self.__return_leases()
+            await self.pool.close()
+            logger.crawl_ok(
+                f'Node of job `{self.job}` is done. (leased: {self.leased_counter}, '
+                f'requeued from expired leases: {self.requeued_counter})'
+            )
+
+    async def seed(self):
+        """
+        Only the first node of the job seeds the shared frontier.
+        """
+        if await self.shared.add([(self.url, 0)]):
+            self.visited.add(self.url)
+            if self.sitemap:
+                await self.seed_sitemap()
+
+    async def join(self):
+        """
+        Lease URLs while the local frontier runs low, keep the own leases alive and
+        requeue the expired ones of the other nodes. Return when the whole job is
+        done, or the crawl is stopped.
+        """
+        reap_at = 0.0
+        heartbeat_at = time.monotonic() + self.lease_ttl / 3
+        while not self.frontier.closed:
+            await self.__ack_finished_leases()
+            now = time.monotonic()
+            if now >= reap_at:
+                self.requeued_counter += await self.shared.requeue_expired()
+                reap_at = now + self.lease_ttl / 3
+            if now >= heartbeat_at:
+                if self.__leases:
+                    await self.shared.extend(self.__leases)
+                heartbeat_at = now + self.lease_ttl / 3
+
+            if self.frontier.queued < self.lease_size:
+                lease = await self.shared.lease(self.lease_size)
+                if lease:
+                    await self.__take(lease)
+                    continue
+
+            is_idle = not self.frontier.queued and not self.frontier.in_flight
+            if is_idle and not self.__leases and await self.shared.is_drained():
+                return
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+    @use_cache
+    async def enqueue(self, url: URL, level: int):
+        """
+        Push :param url: to the shared frontier.
+        """
+        if self.in_scope(url):
+            await self.shared.add([(url, level)])
+
+    async def enqueue_all(self, urls: Iterable[URL], level: int):
+        """
+        Push the URLs found on a page to the shared frontier in one batch.
+        """
+        await self.shared.add(
+            (url, level) for url in urls
+            if (not self.should_use_cache or self.visited.add(url))
+            and self.in_scope(url)
+        )
+
+    def finish(self, url: URL):
+        lease_id = self.__lease_of.pop(url, None)
+        if lease_id:
+            self.__count_done(lease_id)
+
+    async def __take(self, lease: Lease):
+        """
+        Put the URLs of :param lease: to the local frontier. The lease counts one
+        extra URL until all of them are put, so it cannot be finished in between.
+        """
+        self.leased_counter += len(lease.items)
+        self.__leases[lease.id] = len(lease.items) + 1
+        await self.prefetch_robots(url for url, _ in lease.items)
+        for url, level in lease.items:
+            if url in self.__lease_of or not await self.admit(url):
+                self.__count_done(lease.id)
+                continue
+            self.visited.add(url)
+            self.__lease_of[url] = lease.id
+            self.frontier.put(url, level)
+        self.__count_done(lease.id)
+
+    def __count_done(self, lease_id: str):
+        self.__leases[lease_id] -= 1
+        if not self.__leases[lease_id]:
+            del self.__leases[lease_id]
+            self.__finished_leases.append(lease_id)
+
+    async def __ack_finished_leases(self):
+        while self.__finished_leases:
+            await self.shared.ack(self.__finished_leases.pop())
+
+    async def __return_leases(self):
+        """
+        Acknowledge the finished leases and put the unprocessed URLs of the rest back
+        to the queue, so other nodes do not have to wait for them to expire.
+        """
+        if self.shared is None:
+            return
+        unprocessed: Dict[str, List[Tuple[URL, int]]] = {
+            lease_id: [] for lease_id in self.__leases
+        }
+        for url, level in self.frontier.pending() if self.frontier else ():
+            if url in self.__lease_of:
+                unprocessed[self.__lease_of[url]].append((url, level))
+        try:
+            await self.__ack_finished_leases()
+            for lease_id, items in unprocessed.items():
+                await self.shared.return_items(lease_id, items)
+        except Exception as exc:
+            logger.error(f'Cannot return the leases, they will expire: {exc}')
+        self.__leases.clear()
+        self.__lease_of.clear()
@@ -0,0 +1,218 @@
+import abc
+import asyncio
+import ipaddress
+import socket
+import time
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+import httpcore
+from httpx import AsyncHTTPTransport
+
+
+class BaseResolver(abc.ABC):
+    """
+    Base resolver class: turns a host name into a list of IP addresses.
+    """
+
+    @abc.abstractmethod
+    async def resolve(self, host: str) -> Tuple[List[str], Optional[float]]:
+        """
+        Return the addresses of :param host: and the number of seconds they may be
+        cached for (None if the resolver does not know it). Raises OSError if the
+        host cannot be resolved.
+        """
+        pass
+
+
+class SystemResolver(BaseResolver):
+    """
+    Resolves hosts with the system resolver (getaddrinfo) in the event loop's
+    executor. getaddrinfo does not return TTLs.
+    """
+
+    async def resolve(self, host: str) -> Tuple[List[str], Optional[float]]:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, None, type=socket.SOCK_STREAM
+        )
+        addresses = []
+        for _, _, _, _, sockaddr in infos:
+            if sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        return addresses, None
+
+
+class StaticResolver(BaseResolver):
+    """
+    Resolves hosts from the :param hosts: mapping (like /etc/hosts), with
+    the :param ttl:. Useful as a local stub resolver.
+    """
+
+    def __init__(self, hosts: Dict[str, List[str]], ttl: Optional[float] = None):
+        self.hosts = hosts
+        self.ttl = ttl
+        self.lookups_counter = 0
+
+    async def resolve(self, host: str) -> Tuple[List[str], Optional[float]]:
+        self.lookups_counter += 1
+        if host not in self.hosts:
+            raise socket.gaierror(socket.EAI_NONAME, f'Unknown host: {host}')
+        return list(self.hosts[host]), self.ttl
+
+
+class DNSCache:
+    """
+    In-process cache of resolved hosts, shared by every connection of the crawl.
+    Addresses are kept for the TTL given by the :param resolver: or for
+    :param ttl: seconds; failed lookups are kept for :param negative_ttl: seconds.
+    Concurrent lookups of the same host share one request to the resolver.
+    """
+
+    def __init__(
+        self, resolver: Optional[BaseResolver] = None, ttl: float = 300,
+        negative_ttl: float = 30,
+    ):
+        self.resolver = resolver or SystemResolver()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.__entries: Dict[str, Tuple[Optional[List[str]], float]] = {}
+        self.__resolving: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    async def resolve(self, host: str) -> List[str]:
+        """
+        Return the addresses of :param host:. Raises OSError if it cannot be resolved.
+        """
+        if self.__is_ip_address(host):
+            return [host]
+
+        entry = self.__get_entry(host)
+        if entry is not None:
+            self.hits += 1
+            addresses = entry[0]
+        else:
+            self.misses += 1
+            addresses = await asyncio.shield(self.__lookup(host))
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f'Cannot resolve {host}')
+        return addresses
+
+    def prefetch(self, host: Optional[str]):
+        """
+        Start resolving :param host: in the background, if it is not cached yet.
+        """
+        if not host or self.__is_ip_address(host) or host in self.__resolving:
+            return
+        if self.__get_entry(host) is None:
+            self.prefetched += 1
+            self.__lookup(host)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        return (
+            f'DNS cache: {self.hits} hits, {self.misses} misses '
+            f'(hit rate {self.hit_rate:.0%}), {self.prefetched} prefetched'
+        )
+
+    def __get_entry(self, host: str) -> Optional[Tuple[Optional[List[str]], float]]:
+        entry = self.__entries.get(host)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry
+        return None
+
+    def __lookup(self, host: str) -> asyncio.Task:
+        if host not in self.__resolving:
+            task = asyncio.create_task(self.__resolve(host))
+            task.add_done_callback(lambda _: self.__resolving.pop(host, None))
+            self.__resolving[host] = task
+        return self.__resolving[host]
+
+    async def __resolve(self, host: str) -> Optional[List[str]]:
+        try:
+            addresses, ttl = await self.resolver.resolve(host)
+        except (OSError, UnicodeError):
+            self.__entries[host] = (None, time.monotonic() + self.negative_ttl)
+            return None
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self.__entries[host] = (addresses, time.monotonic() + ttl)
+        return addresses
+
+    @classmethod
+    def __is_ip_address(cls, host: str) -> bool:
+        try:
+            ipaddress.ip_address(host.strip('[]'))
+        except ValueError:
+            return False
+        return True
+
+
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that resolves hosts through the :param cache: and
+    connects to the resolved addresses with the wrapped :param backend:. TLS still
+    uses the host name, since httpcore passes it to start_tls() separately.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, cache: DNSCache):
+        self.backend = backend
+        self.cache = cache
+
+    async def connect_tcp(
+        self, host: str, port: int, timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await asyncio.wait_for(self.cache.resolve(host), timeout)
+        except asyncio.TimeoutError as exc:
+            raise httpcore.ConnectTimeout(f'Timed out resolving {host}') from exc
+        except OSError as exc:
+            raise httpcore.ConnectError(str(exc)) from exc
+
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                error = exc
+        raise error
+
+    async def connect_unix_socket(
+        self, path: str, timeout: Optional[float] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self.backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float):
+        await self.backend.sleep(seconds)
+
+
+class DNSCachingTransport(AsyncHTTPTransport):
+    """
+    httpx transport which connection pool resolves hosts through the :param cache:.
+    The rest of the arguments are passed to httpx.AsyncHTTPTransport.
+    """
+
+    def __init__(self, cache: DNSCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self._pool._network_backend = CachingNetworkBackend(
+            self._pool._network_backend, cache
+        )
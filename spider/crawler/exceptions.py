@@ -8,3 +8,13 @@ class IncorrectProxyFormatError(Exception):
 
     def __str__(self):
         return self.message
+
+
+class RetryableRequestError(Exception):
+    def __init__(self, url=None, reason=None, retry_after=None):
+        self.retry_after = retry_after
+        self.message = f'Request to {url} failed: {reason}'
+        super().__init__(self.message)
+
+    def __str__(self):
+        return self.message
@@ -0,0 +1,505 @@
+import asyncio
+from collections import (
+    Counter,
+    deque,
+)
+import heapq
+import time
+from typing import (
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from yarl import URL
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: tokens are refilled with :param rate: per second
+    and up to :param capacity:. Rate of 0 means "no limit".
+    """
+
+    def __init__(self, rate: float = 0, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def __refill(self, now: float):
+        if self.rate:
+            elapsed = now - self.updated_at
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def delay(self, now: float) -> float:
+        """
+        Return the number of seconds to wait until a token is available.
+        """
+        if not self.rate:
+            return 0
+        self.__refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        """
+        Consume a token. Call delay() first to make sure a token is available.
+        """
+        if self.rate:
+            self.__refill(now)
+            self.tokens -= 1
+
+
+class CircuitBreaker:
+    """
+    Opens after :param threshold: consecutive failures and stays open for
+    :param cooldown: seconds. After the cooldown, requests are let through again,
+    but a single failure opens it once more until a request succeeds.
+    Threshold of 0 means "never open".
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self, now: float) -> bool:
+        """
+        Count a failure, return True if the breaker has opened because of it.
+        """
+        self.failures += 1
+        if self.threshold and self.failures >= self.threshold:
+            self.open_until = now + self.cooldown
+            return True
+        return False
+
+
+class AIMDLimiter:
+    """
+    Limit of requests in flight that adapts to the server: additive increase,
+    multiplicative decrease. Every response increases the limit by 1 / limit, i.e. by
+    about one per round of requests, while the limit is fully used and the latency is
+    healthy: its moving average is within :param latency_tolerance: times the lowest
+    moving average observed. A timeout, 429 or 5xx response multiplies the limit by
+    :param backoff:, at most once per average latency, so a burst of failures of the
+    same round counts once. The limit stays between :param minimum: and
+    :param maximum:.
+    """
+
+    SMOOTHING: float = 0.2
+
+    def __init__(
+        self, limit: float, minimum: int = 1, maximum: int = 100,
+        backoff: float = 0.5, latency_tolerance: float = 2.0,
+    ):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = float(min(max(limit, self.minimum), self.maximum))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.latency: Optional[float] = None
+        self.min_latency: Optional[float] = None
+        self.decreased_at = float('-inf')
+        self.decreases = 0
+
+    @property
+    def value(self) -> int:
+        """
+        Current number of requests allowed in flight.
+        """
+        return int(self.limit)
+
+    def is_healthy(self) -> bool:
+        return self.latency is None or (
+            self.latency <= self.min_latency * self.latency_tolerance
+        )
+
+    def record_success(self, latency: float, in_flight: int):
+        """
+        Count a response received after :param latency: seconds, while
+        :param in_flight: requests (including this one) were in flight.
+        """
+        if self.latency is None:
+            self.latency = latency
+            self.min_latency = latency
+        else:
+            self.latency += self.SMOOTHING * (latency - self.latency)
+            self.min_latency = min(self.min_latency, self.latency)
+
+        if in_flight >= self.value and self.is_healthy() and self.limit < self.maximum:
+            self.limit = min(self.limit + 1 / self.limit, self.maximum)
+
+    def record_failure(self, now: float):
+        """
+        Count a timeout or an overload response.
+        """
+        if now - self.decreased_at < (self.latency or 0):
+            return
+        self.decreased_at = now
+        if self.limit > self.minimum:
+            self.limit = max(self.limit * self.backoff, self.minimum)
+            self.decreases += 1
+
+
+class HostQueue:
+    """
+    Ready-queue of URLs that belong to the same host, with its own rate limit,
+    concurrency counter and circuit breaker. The host is not requested until
+    `resume_at` (e.g. while waiting before a retry). The concurrency of the host is
+    adapted by the :param limiter:, if it is set.
+    """
+
+    def __init__(
+        self, rate: float, breaker_threshold: int, breaker_cooldown: float,
+        limiter: Optional[AIMDLimiter] = None,
+    ):
+        self.urls: Deque[Tuple[URL, int]] = deque()
+        self.bucket = TokenBucket(rate)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.limiter = limiter
+        self.resume_at = 0.0
+        self.in_flight = 0
+
+    def parked_for(self, now: float) -> float:
+        """
+        Return the number of seconds until the host may be requested again.
+        """
+        return max(self.resume_at, self.breaker.open_until) - now
+
+    def idle_for(self, now: float) -> float:
+        """
+        Return the number of seconds until the state of the host may be dropped
+        without any effect: it is not parked, and its rate limit is fully restored.
+        """
+        return max(self.parked_for(now), self.bucket.delay(now), 0)
+
+
+class Frontier:
+    """
+    Queue of URLs waiting to be crawled. It is drained by a fixed pool of workers, so
+    the number of requests in flight never exceeds the number of workers.
+
+    URLs are kept in a separate ready-queue per host. Hosts are served in
+    a round-robin manner, each of them is limited by :param host_rate_limit: requests
+    per second (0 means "no limit") and :param host_concurrency_limit: requests in
+    flight, so the workers interleave hosts instead of hammering a single one.
+
+    With :param level_synchronous: the frontier is indexed by depth level: URLs of the
+    next level are held back until every URL of the current level is processed.
+    This makes the crawl breadth-first, so each URL is first found on its
+    shallowest level.
+
+    After :param breaker_threshold: consecutive failures of a host, its URLs are
+    parked for :param breaker_cooldown: seconds, so the workers do not waste their
+    time on a host that is down.
+
+    With :param adaptive: concurrency, the number of requests in flight is limited by
+    AIMD limiters that start at :param concurrency_limit: in total and at
+    host_concurrency_limit per host, and may grow up to
+    :param max_concurrency_limit: and :param max_host_concurrency_limit:.
+
+    Once the frontier is closed, get() stops handing out URLs, so the workers can
+    finish the pages in flight and exit. The queued URLs are kept for a checkpoint.
+
+    The state of a host is dropped once it has no URLs queued or in flight, is not
+    parked, and its rate limit has recovered, so a wide crawl does not keep a queue
+    for every host it has ever seen. Hosts with URLs held back for a deeper level are
+    kept, since their rate may be set by `Crawl-delay`.
+    """
+
+    def __init__(
+        self, host_concurrency_limit: int = 2, host_rate_limit: float = 0,
+        level_synchronous: bool = False, breaker_threshold: int = 5,
+        breaker_cooldown: float = 60.0, adaptive: bool = False,
+        concurrency_limit: int = 5, max_concurrency_limit: int = 20,
+        max_host_concurrency_limit: int = 8,
+    ):
+        self.host_concurrency_limit = max(host_concurrency_limit, 1)
+        self.adaptive = adaptive
+        self.max_host_concurrency_limit = max_host_concurrency_limit
+        self.limiter = (
+            AIMDLimiter(concurrency_limit, maximum=max_concurrency_limit)
+            if adaptive else None
+        )
+        self.host_rate_limit = host_rate_limit
+        self.level_synchronous = level_synchronous
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.level = 0
+        self.closed = False
+
+        self.__levels: Dict[int, List[Tuple[URL, int]]] = {}
+        self.__ready = 0
+        self.__hosts: Dict[str, HostQueue] = {}
+        self.__ring: Deque[str] = deque()
+        self.__running: Dict[URL, int] = {}
+        self.__retrying: Set[URL] = set()
+        self.__held: Counter = Counter()
+        self.__idle: List[Tuple[float, str]] = []
+        self.__changed = asyncio.Event()
+        self.__finished = asyncio.Event()
+        self.__finished.set()
+
+        self.queued = 0
+        self.in_flight = 0
+
+    @property
+    def hosts(self) -> int:
+        """
+        Number of hosts that have URLs waiting to be crawled.
+        """
+        return len(self.__ring)
+
+    @property
+    def tracked_hosts(self) -> int:
+        """
+        Number of hosts which state is kept, including the idle ones that are not
+        dropped yet.
+        """
+        return len(self.__hosts)
+
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        """
+        Current limit of requests in flight in adaptive mode.
+        """
+        return self.limiter.value if self.limiter else None
+
+    @property
+    def host_concurrency_limits(self) -> Tuple[int, int]:
+        """
+        Lowest and highest current limit of the hosts that are being crawled.
+        """
+        limits = [
+            self.__host_limit(self.__hosts[name]) for name in self.__ring
+        ] or [self.host_concurrency_limit]
+        return min(limits), max(limits)
+
+    def pending(self) -> List[Tuple[URL, int]]:
+        """
+        Return all URLs that are not processed yet: the ones in flight and the queued
+        ones.
+        """
+        items = list(self.__running.items())
+        for host in self.__hosts.values():
+            items.extend(host.urls)
+        for level in self.__levels.values():
+            items.extend(level)
+        return items
+
+    def put(self, url: URL, level: int):
+        """
+        Add :param url: found on the :param level: to its host's queue. In
+        level-synchronous mode, URLs of the deeper levels wait for their level.
+        """
+        if self.level_synchronous and level > self.level:
+            self.__levels.setdefault(level, []).append((url, level))
+            self.__held[url.host] += 1
+        else:
+            self.__put_ready(url, level)
+
+        self.queued += 1
+        if not self.closed:
+            self.__finished.clear()
+        self.__changed.set()
+
+    def set_host_rate(self, host: str, rate: float):
+        """
+        Limit :param host: to :param rate: requests per second (e.g. because of its
+        `Crawl-delay`), unless host_rate_limit is stricter.
+        """
+        if not self.host_rate_limit or rate < self.host_rate_limit:
+            self.__get_host_queue(host).bucket.rate = rate
+
+    def retry(self, url: URL, level: int, delay: float):
+        """
+        Put :param url: returned by get() back to the front of its host's queue,
+        and do not request the host for :param delay: seconds. Call it before
+        task_done(), so the frontier is never considered drained in between.
+        """
+        host = self.__get_host_queue(url.host)
+        host.resume_at = max(host.resume_at, time.monotonic() + delay)
+        host.urls.appendleft((url, level))
+        self.__retrying.add(url)
+        self.__ready += 1
+        self.queued += 1
+        self.__changed.set()
+
+    def record_success(self, url: URL, latency: Optional[float] = None):
+        """
+        Reset the circuit breaker of the host of :param url:. In adaptive mode,
+        the :param latency: of the response may increase the concurrency limits.
+        """
+        host = self.__get_host_queue(url.host)
+        host.breaker.record_success()
+        if self.limiter and latency is not None:
+            host.limiter.record_success(latency, host.in_flight)
+            self.limiter.record_success(latency, self.in_flight)
+
+    def record_failure(self, url: URL) -> bool:
+        """
+        Count a failed request to the host of :param url:. Return True if the host's
+        circuit breaker has opened, so its URLs are parked for the cooldown.
+        In adaptive mode, the concurrency limits are decreased.
+        """
+        host = self.__get_host_queue(url.host)
+        now = time.monotonic()
+        if self.limiter:
+            host.limiter.record_failure(now)
+            self.limiter.record_failure(now)
+        return host.breaker.record_failure(now)
+
+    async def get(self) -> Optional[Tuple[URL, int]]:
+        """
+        Wait for the next URL which host is allowed to be requested, and mark it
+        as in flight. Return None if the frontier is closed.
+        """
+        while not self.closed:
+            item, delay = self.__pop_ready()
+            if item:
+                return item
+            self.__changed.clear()
+            try:
+                await asyncio.wait_for(self.__changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def task_done(self, url: URL) -> bool:
+        """
+        Mark :param url: returned by get() as processed. Return False if it was put
+        back with retry(), so it is not finished yet.
+        """
+        self.__running.pop(url, None)
+        host = self.__hosts[url.host]
+        host.in_flight -= 1
+        self.in_flight -= 1
+        now = time.monotonic()
+        if not host.urls and not host.in_flight:
+            self.__ring.remove(url.host)
+            heapq.heappush(self.__idle, (now + host.idle_for(now), url.host))
+        self.__advance_level()
+        self.__drop_idle_hosts(now)
+
+        if not self.queued and not self.in_flight:
+            self.__finished.set()
+        self.__changed.set()
+
+        if url in self.__retrying:
+            self.__retrying.discard(url)
+            return False
+        return True
+
+    async def join(self):
+        """
+        Wait until every URL put to the frontier is processed, or the frontier is
+        closed.
+        """
+        await self.__finished.wait()
+
+    def close(self):
+        """
+        Stop handing out URLs: the waiting get() calls return None, and join()
+        returns.
+        """
+        self.closed = True
+        self.__finished.set()
+        self.__changed.set()
+
+    def __put_ready(self, url: URL, level: int):
+        host = self.__get_host_queue(url.host)
+        if not host.urls and not host.in_flight:
+            self.__ring.append(url.host)
+        host.urls.append((url, level))
+        self.__ready += 1
+
+    def __advance_level(self):
+        """
+        Release the next level when every URL of the current level is processed.
+        """
+        if self.__ready or self.in_flight or not self.__levels:
+            return
+        self.level = min(self.__levels)
+        for url, level in self.__levels.pop(self.level):
+            self.__held[url.host] -= 1
+            if not self.__held[url.host]:
+                del self.__held[url.host]
+            self.__put_ready(url, level)
+
+    def __drop_idle_hosts(self, now: float):
+        """
+        Drop the state of the hosts that have been idle long enough. A host that was
+        requested again, or got new URLs since it became idle, is skipped: it is
+        checked again when it becomes idle the next time.
+        """
+        while self.__idle and self.__idle[0][0] <= now:
+            _, name = heapq.heappop(self.__idle)
+            host = self.__hosts.get(name)
+            if host is None or host.urls or host.in_flight or name in self.__held:
+                continue
+            wait = host.idle_for(now)
+            if wait > 0:
+                heapq.heappush(self.__idle, (now + wait, name))
+                continue
+            del self.__hosts[name]
+
+    def __get_host_queue(self, host: str) -> HostQueue:
+        if host not in self.__hosts:
+            self.__hosts[host] = HostQueue(
+                self.host_rate_limit, self.breaker_threshold, self.breaker_cooldown,
+                limiter=(
+                    AIMDLimiter(
+                        self.host_concurrency_limit,
+                        maximum=self.max_host_concurrency_limit,
+                    )
+                    if self.adaptive else None
+                ),
+            )
+        return self.__hosts[host]
+
+    def __host_limit(self, host: HostQueue) -> int:
+        return host.limiter.value if host.limiter else self.host_concurrency_limit
+
+    def __pop_ready(self) -> Tuple[Optional[Tuple[URL, int]], Optional[float]]:
+        """
+        Walk through the hosts once, starting from the one that was served least
+        recently. Return the first URL that can be requested right now; otherwise,
+        return the time to wait until one of the rate limits lets a request through
+        or one of the parked hosts is resumed.
+        """
+        self.__advance_level()
+        if self.limiter and self.in_flight >= self.limiter.value:
+            return None, None
+        now = time.monotonic()
+        delay = None
+        for _ in range(len(self.__ring)):
+            name = self.__ring[0]
+            self.__ring.rotate(-1)
+            host = self.__hosts[name]
+            if not host.urls or host.in_flight >= self.__host_limit(host):
+                continue
+
+            wait = host.parked_for(now)
+            if wait <= 0:
+                wait = host.bucket.delay(now)
+            if wait > 0:
+                delay = wait if delay is None else min(delay, wait)
+                continue
+
+            host.bucket.take(now)
+            host.in_flight += 1
+            self.in_flight += 1
+            self.queued -= 1
+            self.__ready -= 1
+            url, level = host.urls.popleft()
+            self.__running[url] = level
+            return (url, level), None
+        return None, delay
@@ -0,0 +1,14 @@
+import dataclasses
+from typing import Optional
+
+
+@dataclasses.dataclass
+class Page:
+    """
+    Result of a page download.
+    """
+
+    html: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
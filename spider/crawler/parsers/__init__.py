@@ -0,0 +1,11 @@
+from .core import BaseParser
+from .implementations import (
+    LxmlParser,
+    SoupParser,
+)
+
+__all__ = [
+    'BaseParser',
+    'LxmlParser',
+    'SoupParser',
+]
@@ -0,0 +1,5 @@
+from .base_parser import BaseParser
+
+__all__ = [
+    'BaseParser',
+]
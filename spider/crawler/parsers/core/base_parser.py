@@ -0,0 +1,31 @@
+import abc
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+
+class BaseParser(abc.ABC):
+    """
+    Base Parser class to be used as parent for all HTML parser engines.
+    """
+
+    verbose: str = 'OVERRIDE_THIS'
+
+    @classmethod
+    @abc.abstractmethod
+    def parse(cls, html: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Extract the title and the hrefs of all <a> tags from :param html:.
+        """
+        pass
+
+    @classmethod
+    def clean_title(cls, title: Optional[str]) -> Optional[str]:
+        """
+        Remove line breaks and surrounding whitespace from :param title:.
+        """
+        if title:
+            title = title.replace('\n', '').strip()
+        return title
@@ -0,0 +1,7 @@
+from .lxml_parser import LxmlParser
+from .soup_parser import SoupParser
+
+__all__ = [
+    'LxmlParser',
+    'SoupParser',
+]
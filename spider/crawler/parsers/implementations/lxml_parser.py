@@ -0,0 +1,62 @@
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from lxml import etree
+
+from spider.crawler.parsers.core import BaseParser
+
+
+class LinkCollector:
+    """
+    lxml parser target that keeps only the first <title> text and the hrefs of <a>
+    tags, without building a tree.
+    """
+
+    def __init__(self):
+        self.title: Optional[List[str]] = None
+        self.hrefs: List[str] = []
+        self.in_title = False
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        if tag == 'a':
+            href = attrib.get('href')
+            if href is not None:
+                self.hrefs.append(href)
+        elif tag == 'title' and self.title is None:
+            self.title = []
+            self.in_title = True
+
+    def end(self, tag: str):
+        if tag == 'title':
+            self.in_title = False
+
+    def data(self, data: str):
+        if self.in_title:
+            self.title.append(data)
+
+    def close(self) -> Tuple[Optional[str], List[str]]:
+        title = ''.join(self.title) if self.title is not None else None
+        return title, self.hrefs
+
+
+class LxmlParser(BaseParser):
+    """
+    Streaming lxml parser engine: the page is parsed with a target that receives
+    the parser events, so only the title and the hrefs are kept in memory.
+    """
+
+    verbose = 'lxml'
+
+    @classmethod
+    def parse(cls, html: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Feed :param html: to the parser and collect the data from the target.
+        """
+        parser = etree.HTMLParser(target=LinkCollector())
+        parser.feed(html)
+        title, hrefs = parser.close()
+        return cls.clean_title(title), hrefs
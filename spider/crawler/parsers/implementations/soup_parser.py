@@ -0,0 +1,32 @@
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+from bs4 import (
+    BeautifulSoup,
+    SoupStrainer,
+)
+
+from spider.crawler.parsers.core import BaseParser
+
+
+class SoupParser(BaseParser):
+    """
+    BeautifulSoup parser engine. Slower than lxml, but very tolerant to broken markup,
+    so it is used as a fallback.
+    """
+
+    verbose = 'bs4'
+    strainer = SoupStrainer(['title', 'a'])
+
+    @classmethod
+    def parse(cls, html: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Build a tree of <title> and <a> tags only, and extract data from it.
+        """
+        soup = BeautifulSoup(html, 'lxml', parse_only=cls.strainer)
+        title = cls.clean_title(getattr(soup.title, 'text', None))
+        hrefs = [ref.attrs['href'] for ref in soup.find_all('a', href=True)]
+        return title, hrefs
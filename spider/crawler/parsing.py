@@ -0,0 +1,138 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+import multiprocessing
+import os
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from lxml import etree
+
+from spider.controllers.core.types.abstract_types import AbstractEnumType
+from spider.crawler.parsers import (
+    BaseParser,
+    LxmlParser,
+    SoupParser,
+)
+
+
+class ParserExecutors(AbstractEnumType):
+    """
+    Types of pools that can run HTML parsing.
+    """
+
+    THREAD = 'thread'
+    PROCESS = 'process'
+
+
+class ParserEngines(AbstractEnumType):
+    """
+    HTML parser engines that can be used to extract the title and the links.
+    """
+
+    LXML = LxmlParser.verbose
+    BS4 = SoupParser.verbose
+
+
+ENGINES: Dict[str, Type[BaseParser]] = {
+    ParserEngines.LXML: LxmlParser,
+    ParserEngines.BS4: SoupParser,
+}
+
+
+def parse_html(
+    html: str, engine: str = ParserEngines.LXML
+) -> Tuple[Optional[str], List[str], float, float]:
+    """
+    Extract the title and the hrefs of all <a> tags from :param html: with
+    the :param engine:. If lxml fails on the markup, BeautifulSoup is used instead.
+    Runs in the parser pool, so only plain data is returned, together with the time
+    when parsing started and finished.
+    """
+    started_at = time.monotonic()
+
+    try:
+        title, hrefs = ENGINES[engine].parse(html)
+    except (etree.LxmlError, ValueError):
+        title, hrefs = SoupParser.parse(html)
+
+    return title, hrefs, started_at, time.monotonic()
+
+
+class ParserPool:
+    """
+    Runs HTML parsing with :param engine: in a pool of :param workers: threads or
+    processes, so the event loop is not blocked while a page is parsed. Keeps track of
+    how long the pages waited in the pool's queue and how long they were parsed.
+    """
+
+    def __init__(
+        self, executor: str = ParserExecutors.THREAD, workers: int = 0,
+        engine: str = ParserEngines.LXML,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor_type = executor
+        self.engine = engine
+        self.__executor: Optional[Executor] = None
+
+        self.parsed_counter = 0
+        self.total_wait_time = 0.0
+        self.total_parse_time = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self.__executor is None:
+            if self.executor_type == ParserExecutors.PROCESS:
+                self.__executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                self.__executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='spider-parser'
+                )
+        return self.__executor
+
+    async def parse(self, html: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Parse :param html: in the pool, return the title and the hrefs.
+        """
+        submitted_at = time.monotonic()
+        title, hrefs, started_at, finished_at = (
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, parse_html, html, self.engine
+            )
+        )
+
+        self.parsed_counter += 1
+        self.total_wait_time += started_at - submitted_at
+        self.total_parse_time += finished_at - started_at
+        return title, hrefs
+
+    def shutdown(self):
+        """
+        Stop the pool.
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+    def summary(self) -> str:
+        """
+        Return average queue wait and parse time per page, in milliseconds.
+        """
+        pages = self.parsed_counter or 1
+        return (
+            f'parsed {self.parsed_counter} pages with {self.engine} by {self.workers} '
+            f'{self.executor_type} workers, '
+            f'avg wait {self.total_wait_time / pages * 1000:.1f} ms, '
+            f'avg parse {self.total_parse_time / pages * 1000:.1f} ms'
+        )
@@ -0,0 +1,61 @@
+from datetime import (
+    datetime,
+    timezone,
+)
+from email.utils import parsedate_to_datetime
+import random
+from typing import Optional
+
+
+class RetryPolicy:
+    """
+    Bounded retries with exponential backoff and full jitter: before the attempt N,
+    wait a random time between 0 and :param base_delay: * 2^(N-1), but no more than
+    :param max_delay:. If the server sent `Retry-After`, it is honored instead
+    (up to MAX_RETRY_AFTER seconds).
+    """
+
+    RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+    MAX_RETRY_AFTER: float = 300.0
+
+    def __init__(
+        self, retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0
+    ):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, attempt: int) -> bool:
+        """
+        Check if the request may be repeated after the failed :param attempt:.
+        """
+        return attempt <= self.retries
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Return the number of seconds to wait before repeating the failed
+        :param attempt:.
+        """
+        server_delay = self.parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.MAX_RETRY_AFTER)
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, backoff)
+
+    @classmethod
+    def parse_retry_after(cls, retry_after: Optional[str]) -> Optional[float]:
+        """
+        `Retry-After` is either a number of seconds or an HTTP date.
+        """
+        if not retry_after:
+            return None
+        retry_after = retry_after.strip()
+        if retry_after.isdigit():
+            return float(retry_after)
+        try:
+            date = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
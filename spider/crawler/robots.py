@@ -0,0 +1,168 @@
+import asyncio
+import time
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.robotparser import RobotFileParser
+
+from httpx import (
+    AsyncClient,
+    HTTPError,
+)
+from yarl import URL
+
+from spider.controllers.core.loggers import logger
+
+
+class RobotsCache:
+    """
+    Fetches robots.txt once per host with :param client: and keeps the parsed rules
+    in memory for :param ttl: seconds, so URLs are checked without any requests.
+
+    As RFC 9309 says, robots.txt that is not found (4xx) allows everything, and
+    robots.txt that cannot be fetched (5xx or a network error) disallows everything.
+    The latter is cached for :param error_ttl: seconds only. Up to MAX_REDIRECTS
+    redirects are followed, more than that count as not found.
+
+    At most :param concurrency_limit: robots.txt files are fetched at the same time,
+    so prefetching the hosts of a page does not flood the network.
+    """
+
+    MAX_BYTES: int = 500 * 1024
+    MAX_REDIRECTS: int = 5
+
+    def __init__(
+        self, client: AsyncClient, ttl: float = 3600, error_ttl: float = 60,
+        concurrency_limit: int = 10,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.concurrency_limit = max(concurrency_limit, 1)
+        self.__rules: Dict[str, Tuple[RobotFileParser, float]] = {}
+        self.__fetching: Dict[str, asyncio.Task] = {}
+        self.__slots: Optional[asyncio.Semaphore] = None
+
+        self.fetched_counter = 0
+        self.disallowed_counter = 0
+
+    @property
+    def user_agent(self) -> str:
+        return self.client.headers.get('user-agent', '*')
+
+    async def allowed(self, url: URL) -> bool:
+        """
+        Check if :param url: may be crawled.
+        """
+        rules = await self.get(url)
+        if rules.can_fetch(self.user_agent, str(url)):
+            return True
+        self.disallowed_counter += 1
+        return False
+
+    async def crawl_delay(self, url: URL) -> Optional[float]:
+        """
+        Return the minimum number of seconds between requests to the host of
+        :param url: from `Crawl-delay` or `Request-rate`, if any.
+        """
+        rules = await self.get(url)
+        delay = rules.crawl_delay(self.user_agent)
+        if delay is not None:
+            return float(delay)
+        rate = rules.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    async def get(self, url: URL) -> RobotFileParser:
+        """
+        Return the rules of the host of :param url:. If robots.txt of the host is
+        being fetched already, wait for that request instead of making another one.
+        """
+        origin = str(url.origin())
+        cached = self.__rules.get(origin)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        if origin not in self.__fetching:
+            self.__fetching[origin] = asyncio.create_task(self.__fetch(origin))
+        try:
+            return await asyncio.shield(self.__fetching[origin])
+        finally:
+            if self.__fetching.get(origin) and self.__fetching[origin].done():
+                del self.__fetching[origin]
+
+    async def prefetch(self, urls: Iterable[URL]):
+        """
+        Fetch the rules of every host of :param urls: that are not cached yet at the
+        same time, so a page that links to many new hosts waits for the slowest
+        robots.txt only, instead of all of them one after another.
+        """
+        now = time.monotonic()
+        origins = {url.origin() for url in urls}
+        await asyncio.gather(
+            *(
+                self.get(origin) for origin in origins
+                if self.__rules.get(str(origin), (None, 0))[1] <= now
+            ),
+            return_exceptions=True,
+        )
+
+    def summary(self) -> str:
+        return (
+            f'robots.txt fetched: {self.fetched_counter}, '
+            f'disallowed by robots.txt: {self.disallowed_counter}'
+        )
+
+    async def __fetch(self, origin: str) -> RobotFileParser:
+        rules = RobotFileParser(f'{origin}/robots.txt')
+        ttl = self.ttl
+        try:
+            lines = await self.__download(rules.url)
+        except (HTTPError, ValueError) as exc:
+            logger.crawl_info(f'Cannot fetch {rules.url}: {type(exc).__name__}')
+            rules.disallow_all = True
+            ttl = self.error_ttl
+        else:
+            if lines is None:
+                rules.disallow_all = True
+                ttl = self.error_ttl
+            elif not lines:
+                rules.allow_all = True
+            else:
+                rules.parse(lines)
+
+        self.fetched_counter += 1
+        self.__rules[origin] = (rules, time.monotonic() + ttl)
+        return rules
+
+    async def __download(self, robots_url: str) -> Optional[List[str]]:
+        """
+        Download robots.txt, return its lines: an empty list if it does not exist, or
+        None if the server failed. Only the first MAX_BYTES are read.
+        """
+        if self.__slots is None:
+            self.__slots = asyncio.Semaphore(self.concurrency_limit)
+        async with self.__slots:
+            for _ in range(self.MAX_REDIRECTS + 1):
+                async with self.client.stream('GET', robots_url) as response:
+                    if response.has_redirect_location:
+                        robots_url = response.url.join(response.headers['location'])
+                        continue
+                    if response.status_code >= 500:
+                        return None
+                    if response.status_code >= 400:
+                        return []
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) >= self.MAX_BYTES:
+                            break
+                text = body[:self.MAX_BYTES].decode('utf-8', errors='replace')
+                return text.splitlines()
+        logger.crawl_info(f'Too many redirects: {robots_url}')
+        return []
@@ -0,0 +1,101 @@
+import re
+from typing import (
+    Iterable,
+    Optional,
+    Pattern,
+)
+
+from yarl import URL
+
+from spider.controllers.core.types.abstract_types import AbstractEnumType
+
+
+class Scopes(AbstractEnumType):
+    """
+    Which hosts the crawl may go to: `any` host, the `host` of the start URL only, or
+    any host of the start URL's registrable `domain` (e.g. `news.example.co.uk` and
+    `www.example.co.uk`).
+    """
+
+    ANY = 'any'
+    HOST = 'host'
+    DOMAIN = 'domain'
+
+
+COUNTRY_SECOND_LEVEL_DOMAINS = frozenset((
+    'ac', 'co', 'com', 'edu', 'gov', 'net', 'org', 'ne', 'or', 'go', 'gob', 'mil',
+))
+
+
+def registrable_domain(host: str) -> str:
+    """
+    Return the registrable domain of :param host:: the last two labels, or the last
+    three ones if the host is under a second-level domain of a country code
+    (e.g. `co.uk`, `com.au`). This is a heuristic: it does not use the Public Suffix
+    List, so private suffixes like `github.io` are not recognized.
+    """
+    labels = host.lower().rstrip('.').split('.')
+    if len(labels) <= 2:
+        return '.'.join(labels)
+    if len(labels[-1]) == 2 and labels[-2] in COUNTRY_SECOND_LEVEL_DOMAINS:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+class CrawlScope:
+    """
+    Decides if a URL should be crawled, before it is put to the frontier.
+
+    The host of the URL has to match the :param scope: of :param start_url:, or be
+    one of :param allowed_domains: (or their subdomains). With the `any` scope and
+    allowed domains set, only the allowed domains are crawled.
+
+    The URL also has to match one of :param include: regexes (if any are set) and
+    none of :param exclude: regexes. Each list is compiled into a single regex, so
+    a URL is matched once however many patterns there are.
+    """
+
+    def __init__(
+        self, start_url: URL, scope: str = Scopes.ANY,
+        allowed_domains: Iterable[str] = (), include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+    ):
+        self.start_url = start_url
+        self.scope = scope
+        self.allowed_domains = tuple(
+            domain.lower().strip('.') for domain in allowed_domains
+        )
+        self.include = self.__compile(include)
+        self.exclude = self.__compile(exclude)
+
+    def allows(self, url: URL) -> bool:
+        """
+        Check if :param url: is in the scope of the crawl.
+        """
+        if not self.__allows_host((url.host or '').lower()):
+            return False
+        text = str(url)
+        if self.include and not self.include.search(text):
+            return False
+        return not (self.exclude and self.exclude.search(text))
+
+    def __allows_host(self, host: str) -> bool:
+        if any(
+            host == domain or host.endswith(f'.{domain}')
+            for domain in self.allowed_domains
+        ):
+            return True
+
+        start_host = (self.start_url.host or '').lower()
+        if self.scope == Scopes.HOST:
+            return host == start_host
+        if self.scope == Scopes.DOMAIN:
+            return registrable_domain(host) == registrable_domain(start_host)
+        return not self.allowed_domains
+
+    @classmethod
+    def __compile(cls, patterns: Iterable[str]) -> Optional[Pattern]:
+        patterns = list(patterns)
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
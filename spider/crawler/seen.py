@@ -0,0 +1,302 @@
+import abc
+from array import array
+import base64
+import hashlib
+import math
+from typing import (
+    Any,
+    Dict,
+    List,
+    Type,
+    Union,
+)
+
+from yarl import URL
+
+from spider.controllers.core.types.abstract_types import AbstractEnumType
+
+
+def fingerprint(url: Union[URL, str], size: int = 8) -> bytes:
+    """
+    Return a :param size:-byte hash of :param url:. URLs stored in the DB can be
+    hashed as strings, without being parsed.
+    """
+    return hashlib.blake2b(str(url).encode('utf-8'), digest_size=size).digest()
+
+
+class BaseSeenSet(abc.ABC):
+    """
+    Set of URLs that were already put to the frontier during the crawl. Only the
+    hashes of the URLs are stored, not the URLs themselves.
+    """
+
+    verbose = 'OVERRIDE_THIS'
+
+    @abc.abstractmethod
+    def add(self, url: URL) -> bool:
+        """
+        Add :param url:, return True if it was not in the set before.
+        """
+        pass
+
+    @abc.abstractmethod
+    def __contains__(self, url: URL) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @property
+    @abc.abstractmethod
+    def memory_bytes(self) -> int:
+        """
+        Number of bytes the set occupies.
+        """
+        pass
+
+    @abc.abstractmethod
+    def dump(self) -> Dict[str, Any]:
+        """
+        Return the state of the set as JSON-serializable data for a checkpoint.
+        """
+        pass
+
+    @classmethod
+    @abc.abstractmethod
+    def load(cls, state: Dict[str, Any]) -> 'BaseSeenSet':
+        """
+        Restore the set from the :param state: returned by dump().
+        """
+        pass
+
+    def summary(self) -> str:
+        per_url = self.memory_bytes / len(self) if len(self) else 0
+        return (
+            f'seen-set: {self.verbose}, {len(self)} URLs, '
+            f'{self.memory_bytes / 1024:.0f} KiB ({per_url:.1f} bytes per URL)'
+        )
+
+
+class ExactSeenSet(BaseSeenSet):
+    """
+    Exact set of 64-bit URL fingerprints in an open-addressing hash table (a flat
+    array of integers). It grows twice when it is filled by MAX_LOAD. Different URLs
+    collide with a probability of about n^2 / 2^65, which is negligible for any
+    crawl size.
+    """
+
+    verbose = 'exact'
+    MAX_LOAD: float = 0.7
+    EMPTY: int = 0
+
+    def __init__(self, capacity: int = 1024):
+        size = 8
+        while size * self.MAX_LOAD < capacity:
+            size *= 2
+        self.__table = array('Q', bytes(8 * size))
+        self.__count = 0
+
+    def add(self, url: Union[URL, str]) -> bool:
+        return self.add_fingerprint(self.__hash(url))
+
+    def add_fingerprint(self, value: int) -> bool:
+        if (self.__count + 1) > len(self.__table) * self.MAX_LOAD:
+            self.__resize(len(self.__table) * 2)
+        index = self.__find(self.__table, value)
+        if self.__table[index] == value:
+            return False
+        self.__table[index] = value
+        self.__count += 1
+        return True
+
+    def __contains__(self, url: URL) -> bool:
+        value = self.__hash(url)
+        return self.__table[self.__find(self.__table, value)] == value
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.__table.itemsize * len(self.__table)
+
+    def dump(self) -> Dict[str, Any]:
+        """
+        The table is dumped as is, so it is copied in one go instead of being
+        iterated on the event loop.
+        """
+        return {
+            'type': self.verbose,
+            'count': self.__count,
+            'table': base64.b64encode(self.__table.tobytes()).decode('ascii'),
+        }
+
+    @classmethod
+    def load(cls, state: Dict[str, Any]) -> 'ExactSeenSet':
+        seen = cls()
+        seen.__table = array('Q')
+        seen.__table.frombytes(base64.b64decode(state['table']))
+        seen.__count = state['count']
+        return seen
+
+    @classmethod
+    def __hash(cls, url: Union[URL, str]) -> int:
+        value = int.from_bytes(fingerprint(url), 'little')
+        return value or 1
+
+    @classmethod
+    def __find(cls, table: array, value: int) -> int:
+        """
+        Linear probing: return the index of :param value: or of the empty slot where
+        it should be put.
+        """
+        mask = len(table) - 1
+        index = value & mask
+        while table[index] != cls.EMPTY and table[index] != value:
+            index = (index + 1) & mask
+        return index
+
+    def __resize(self, size: int):
+        table = array('Q', bytes(8 * size))
+        for value in self.__table:
+            if value != self.EMPTY:
+                table[self.__find(table, value)] = value
+        self.__table = table
+
+
+class BloomFilter:
+    """
+    Bloom filter sized for :param capacity: items with :param error_rate: false
+    positive probability. Bit positions are derived from a 128-bit hash with double
+    hashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(
+            int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, digest: bytes) -> List[int]:
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def contains(self, positions: List[int]) -> bool:
+        return all(self.bits[bit >> 3] & (1 << (bit & 7)) for bit in positions)
+
+    def add(self, positions: List[int]):
+        for bit in positions:
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+        self.count += 1
+
+
+class BloomSeenSet(BaseSeenSet):
+    """
+    Probabilistic set: a scalable Bloom filter. When the current filter holds
+    :param capacity: URLs, a new one twice as big is added with half of the error
+    rate, so the total false positive rate stays below :param error_rate: however
+    many URLs are added. A false positive means that a URL which was never seen is
+    skipped; URLs that were seen are never crawled twice.
+    """
+
+    verbose = 'bloom'
+    GROWTH: int = 2
+    TIGHTENING: float = 0.5
+
+    def __init__(self, capacity: int = 1024, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filters = [BloomFilter(capacity, error_rate * (1 - self.TIGHTENING))]
+
+    def add(self, url: URL) -> bool:
+        digest = fingerprint(url, 16)
+        if self.__seen(digest):
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(
+                current.capacity * self.GROWTH, current.error_rate * self.TIGHTENING
+            )
+            self.filters.append(current)
+        current.add(current.positions(digest))
+        return True
+
+    def __contains__(self, url: URL) -> bool:
+        return self.__seen(fingerprint(url, 16))
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(len(bloom.bits) for bloom in self.filters)
+
+    def dump(self) -> Dict[str, Any]:
+        return {
+            'type': self.verbose,
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'filters': [
+                {
+                    'capacity': bloom.capacity,
+                    'error_rate': bloom.error_rate,
+                    'count': bloom.count,
+                    'bits': base64.b64encode(bytes(bloom.bits)).decode('ascii'),
+                }
+                for bloom in self.filters
+            ],
+        }
+
+    @classmethod
+    def load(cls, state: Dict[str, Any]) -> 'BloomSeenSet':
+        seen = cls(state['capacity'], state['error_rate'])
+        seen.filters = []
+        for item in state['filters']:
+            bloom = BloomFilter(item['capacity'], item['error_rate'])
+            bloom.bits = bytearray(base64.b64decode(item['bits']))
+            bloom.count = item['count']
+            seen.filters.append(bloom)
+        return seen
+
+    def __seen(self, digest: bytes) -> bool:
+        return any(bloom.contains(bloom.positions(digest)) for bloom in self.filters)
+
+
+class SeenSets(AbstractEnumType):
+    """
+    Types of seen-sets that can be used to skip already found URLs.
+    """
+
+    EXACT = ExactSeenSet.verbose
+    BLOOM = BloomSeenSet.verbose
+
+
+SEEN_SETS: Dict[str, Type[BaseSeenSet]] = {
+    SeenSets.EXACT: ExactSeenSet,
+    SeenSets.BLOOM: BloomSeenSet,
+}
+
+
+def create_seen_set(
+    kind: str = SeenSets.EXACT, capacity: int = 1024, error_rate: float = 0.001
+) -> BaseSeenSet:
+    """
+    Create an empty seen-set of the :param kind:, sized for :param capacity: URLs.
+    :param error_rate: is used by the Bloom filter only.
+    """
+    if kind == SeenSets.BLOOM:
+        return BloomSeenSet(capacity, error_rate)
+    return ExactSeenSet(capacity)
+
+
+def load_seen_set(state: Dict[str, Any]) -> BaseSeenSet:
+    """
+    Restore a seen-set of any kind from a checkpoint.
+    """
+    return SEEN_SETS[state['type']].load(state)
@@ -0,0 +1,242 @@
+import asyncio
+import multiprocessing
+import queue
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Tuple,
+    Type,
+)
+import zlib
+
+from yarl import URL
+
+from spider.controllers.core.loggers import logger
+from spider.crawler.crawler import Crawler
+from spider.crawler.decorators import use_cache
+from spider.db.core import BaseDatabase
+
+
+class ShardCoordinator:
+    """
+    State shared between the crawler processes. Every process (shard) owns the hosts
+    which hash falls into its partition; URLs of other hosts are forwarded to their
+    owner's inbox.
+
+    The crawl is finished when every shard is idle and no URL is in transit between
+    the shards.
+    """
+
+    def __init__(self, shards: int, context: multiprocessing.context.BaseContext):
+        self.shards = shards
+        self.inboxes = [context.Queue() for _ in range(shards)]
+        self.results = context.Queue()
+        self.lock = context.Lock()
+        self.in_transit = context.Value('i', 0, lock=False)
+        self.busy = context.Array('b', [1] * shards, lock=False)
+        self.stopped = context.Value('b', 0, lock=False)
+
+    def shard_of(self, url: URL) -> int:
+        """
+        Return the number of the shard that owns the host of :param url:. The hash
+        has to be the same in every process, so built-in hash() cannot be used.
+        """
+        return zlib.crc32((url.host or '').encode('utf-8')) % self.shards
+
+    def forward(self, shard: int, url: URL, level: int):
+        """
+        Send :param url: to the inbox of :param shard:.
+        """
+        with self.lock:
+            self.in_transit.value += 1
+        self.inboxes[shard].put((str(url), level))
+
+    def receive(self, shard: int) -> Tuple[Tuple[URL, int], ...]:
+        """
+        Take all URLs from the inbox of :param shard: without waiting. The shard is
+        marked busy before the URLs stop being counted as in transit, so the crawl
+        cannot be considered finished in between.
+        """
+        items = []
+        while True:
+            try:
+                url, level = self.inboxes[shard].get_nowait()
+            except queue.Empty:
+                break
+            items.append((URL(url), level))
+
+        if items:
+            with self.lock:
+                self.busy[shard] = 1
+                self.in_transit.value -= len(items)
+        return tuple(items)
+
+    def set_idle(self, shard: int) -> bool:
+        """
+        Mark :param shard: as idle and return True if the whole crawl is finished.
+        """
+        with self.lock:
+            self.busy[shard] = 0
+            return self.in_transit.value == 0 and not any(self.busy)
+
+    def leave(self, shard: int):
+        """
+        Called when the process of :param shard: exits. If there is still work left,
+        the shard has failed, so the other shards are told to stop, since nobody
+        would crawl its hosts anymore.
+        """
+        if not self.set_idle(shard) and not self.stopped.value:
+            self.stopped.value = 1
+
+
+class ShardedCrawler(Crawler):
+    """
+    Crawler that runs in one of the shard processes. It crawls only the hosts of its
+    own partition and forwards the rest of the found URLs to the other shards.
+    """
+
+    INBOX_POLL_INTERVAL: float = 0.05
+    BUDGET_STOPPED: int = 2
+
+    def __init__(
+        self, database: BaseDatabase, shard: int, coordinator: ShardCoordinator,
+        **kwargs: Any,
+    ):
+        for key in ('checkpoint_path', 'resume_path'):
+            if kwargs.get(key):
+                kwargs[key] = f'{kwargs[key]}.{shard}'
+        super().__init__(database, **kwargs)
+        self.shard = shard
+        self.coordinator = coordinator
+
+    async def seed(self):
+        """
+        Only the owner of the start URL's host puts it to the frontier.
+        """
+        if self.coordinator.shard_of(self.url) == self.shard:
+            await super().seed()
+
+    async def join(self):
+        """
+        Keep taking URLs from the inbox until every shard runs out of work.
+        """
+        while not self.coordinator.stopped.value and not self.frontier.closed:
+            items = self.coordinator.receive(self.shard)
+            await self.prefetch_robots(url for url, _ in items)
+            for url, level in items:
+                await self.enqueue(url, level)
+
+            is_idle = not self.frontier.queued and not self.frontier.in_flight
+            if is_idle and self.coordinator.set_idle(self.shard):
+                return
+            await asyncio.sleep(self.INBOX_POLL_INTERVAL)
+        if self.coordinator.stopped.value == self.BUDGET_STOPPED:
+            self.stop('another shard has exhausted its budget')
+        elif not self.frontier.closed:
+            logger.error(
+                f'Shard {self.shard} is stopped because another shard has failed.'
+            )
+
+    def stop(self, reason: str):
+        """
+        Budgets are counted by each shard separately, but once one of them is
+        exhausted, every shard is stopped.
+        """
+        self.coordinator.stopped.value = self.BUDGET_STOPPED
+        super().stop(reason)
+
+    async def prefetch_robots(self, urls: Iterable[URL]):
+        """
+        Only the hosts of this shard are admitted here, the rest are forwarded.
+        """
+        await super().prefetch_robots(
+            url for url in urls if self.coordinator.shard_of(url) == self.shard
+        )
+
+    @use_cache
+    async def enqueue(self, url: URL, level: int):
+        """
+        Put :param url: to the frontier if the host belongs to this shard, or forward
+        it to its owner otherwise.
+        """
+        shard = self.coordinator.shard_of(url)
+        if shard == self.shard:
+            if await self.admit(url):
+                self.frontier.put(url, level)
+        else:
+            self.coordinator.forward(shard, url, level)
+
+
+def run_shard(
+    shard: int, coordinator: ShardCoordinator, database_class: Type[BaseDatabase],
+    database_args: Tuple[str, str, str, str], crawl_args: Dict[str, Any],
+):
+    """
+    Entry point of a shard process. Every process has its own HTTP client and its own
+    database pool.
+    """
+    logger.update_level(crawl_args.get('silent', False), operation='crawl')
+    spider = ShardedCrawler(
+        database_class(*database_args), shard, coordinator, **crawl_args
+    )
+    try:
+        asyncio.run(spider.crawl())
+    finally:
+        coordinator.leave(shard)
+        coordinator.results.put((spider.successful_crawls_counter, spider.total_calls))
+
+
+class ShardPool:
+    """
+    Runs a crawl in :param workers: processes, so HTML parsing can use all CPU cores.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.context = multiprocessing.get_context('spawn')
+
+    async def run(
+        self, database: BaseDatabase, database_args: Tuple[str, str, str, str],
+        crawl_args: Dict[str, Any],
+    ):
+        """
+        Create the table once, then start the shard processes and wait for them.
+        """
+        try:
+            await database.connect()
+            await database.create_table(check_first=True, silent=True)
+            await database.disconnect()
+        except Exception as exc:
+            logger.error(f'Database connection error: {exc}')
+            return
+
+        coordinator = ShardCoordinator(self.workers, self.context)
+        processes = [
+            self.context.Process(
+                target=run_shard,
+                args=(shard, coordinator, type(database), database_args, crawl_args),
+                name=f'spider-shard-{shard}',
+            )
+            for shard in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+
+        loop = asyncio.get_running_loop()
+        for process in processes:
+            await loop.run_in_executor(None, process.join)
+
+        crawled, total_calls = 0, 0
+        for _ in processes:
+            try:
+                shard_crawled, shard_calls = coordinator.results.get(timeout=1)
+            except queue.Empty:
+                break
+            crawled += shard_crawled
+            total_calls += shard_calls
+
+        logger.crawl_ok(
+            f'All {self.workers} shards are done. (crawled: {crawled}, '
+            f'total calls: {total_calls})'
+        )
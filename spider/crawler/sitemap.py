@@ -0,0 +1,165 @@
+from collections import deque
+import dataclasses
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import (
+    AsyncIterator,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+)
+import zlib
+
+from httpx import (
+    AsyncClient,
+    HTTPError,
+)
+from lxml import etree
+from yarl import URL
+
+from spider.controllers.core.loggers import logger
+
+
+@dataclasses.dataclass
+class SitemapEntry:
+    """
+    A page listed in a sitemap, with the time it was last modified (in UTC), if known.
+    """
+
+    url: URL
+    lastmod: Optional[datetime] = None
+
+
+class SitemapReader:
+    """
+    Streams sitemaps with :param client: and yields the pages they list. The XML is
+    parsed incrementally while it is downloaded, so huge sitemaps are never kept in
+    memory. Gzipped sitemaps are decompressed on the fly, and sitemap indexes are
+    followed (up to MAX_SITEMAPS sitemaps in total). Only the first MAX_BYTES of
+    XML of every sitemap are read.
+    """
+
+    MAX_SITEMAPS: int = 1000
+    MAX_BYTES: int = 50 * 1024 * 1024
+    GZIP_MAGIC: bytes = b'\x1f\x8b'
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+        self.sitemaps_counter = 0
+
+    async def read(self, sitemap_url: URL) -> AsyncIterator[SitemapEntry]:
+        """
+        Yield the pages of :param sitemap_url: and of all sitemaps it refers to.
+        """
+        queue = deque([sitemap_url])
+        seen: Set[URL] = {sitemap_url}
+        while queue and self.sitemaps_counter < self.MAX_SITEMAPS:
+            url = queue.popleft()
+            self.sitemaps_counter += 1
+            async for tag, loc, lastmod in self.__stream(url):
+                try:
+                    location = url.join(URL(loc))
+                except ValueError:
+                    continue
+                if tag == 'sitemap':
+                    if location not in seen:
+                        seen.add(location)
+                        queue.append(location)
+                else:
+                    yield SitemapEntry(location, self.parse_lastmod(lastmod))
+
+    @classmethod
+    def parse_lastmod(cls, lastmod: Optional[str]) -> Optional[datetime]:
+        """
+        Parse W3C datetime of `lastmod` (e.g. `2023-01-31` or `2023-01-31T10:00Z`) to
+        a naive datetime in UTC.
+        """
+        if not lastmod:
+            return None
+        try:
+            date = datetime.fromisoformat(lastmod.strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if date.tzinfo is not None:
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        return date
+
+    async def __stream(
+        self, url: URL
+    ) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        """
+        Download the sitemap :param url: and yield `url` and `sitemap` entries as soon
+        as they are parsed.
+        """
+        parser = etree.XMLPullParser(
+            events=('end',), resolve_entities=False, no_network=True
+        )
+        decompressor = None
+        size = 0
+        try:
+            async with self.client.stream('GET', str(url)) as response:
+                if response.status_code != 200:
+                    logger.crawl_info(
+                        f'Cannot read sitemap {url}: HTTP {response.status_code}'
+                    )
+                    return
+                async for chunk in response.aiter_bytes():
+                    if (
+                        not size and decompressor is None
+                        and chunk.startswith(self.GZIP_MAGIC)
+                    ):
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    # the limit applies to the XML, so a small gzip bomb is never
+                    # decompressed past it
+                    data = (
+                        decompressor.decompress(chunk, self.MAX_BYTES - size + 1)
+                        if decompressor else chunk
+                    )
+                    size += len(data)
+                    parser.feed(data)
+                    for entry in self.__entries(parser):
+                        yield entry
+                    if size > self.MAX_BYTES:
+                        logger.crawl_info(
+                            f'Sitemap {url} is bigger than {self.MAX_BYTES} bytes, '
+                            'the rest of it is skipped'
+                        )
+                        return
+            if decompressor:
+                parser.feed(decompressor.flush())
+            parser.close()
+            for entry in self.__entries(parser):
+                yield entry
+        except (HTTPError, zlib.error, etree.XMLSyntaxError) as exc:
+            logger.crawl_info(f'Cannot read sitemap {url}: {type(exc).__name__}')
+
+    @classmethod
+    def __entries(
+        cls, parser: etree.XMLPullParser
+    ) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """
+        Yield the `url` and `sitemap` elements parsed so far, and free their memory.
+        """
+        for _, element in parser.read_events():
+            tag = etree.QName(element).localname
+            if tag not in ('url', 'sitemap'):
+                continue
+
+            loc, lastmod = None, None
+            for child in element:
+                if not isinstance(child.tag, str):
+                    continue
+                name = etree.QName(child).localname
+                if name == 'loc':
+                    loc = (child.text or '').strip()
+                elif name == 'lastmod':
+                    lastmod = child.text
+
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+            if loc:
+                yield tag, loc, lastmod
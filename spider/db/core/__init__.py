@@ -3,13 +3,23 @@ from .implementation_injector import (
     BaseDatabaseMeta,
     DatabaseImplementationInjector,
 )
-from .record import RecordSet
-from .base_database import BaseDatabase
+from .record import (
+    PageRecord,
+    RecordSet,
+)
+from .base_database import (
+    BaseDatabase,
+    IngestionModes,
+)
+from .batch_writer import BatchWriter
 
 __all__ = [
     'Borg',
     'DatabaseImplementationInjector',
     'BaseDatabaseMeta',
+    'PageRecord',
     'RecordSet',
     'BaseDatabase',
+    'BatchWriter',
+    'IngestionModes',
 ]
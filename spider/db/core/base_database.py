@@ -1,13 +1,37 @@
 import abc
-from typing import Any
+import asyncio
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 from sqlalchemy import Table
 
-from spider.db.core import BaseDatabaseMeta
+from spider.controllers.core.loggers import logger
+from spider.controllers.core.types.abstract_types import AbstractEnumType
+from spider.db.core import (
+    BaseDatabaseMeta,
+    PageRecord,
+)
 from spider.db.schema import urls_table
 from spider.file_storage import BaseFileWriter
 
 
+class IngestionModes(AbstractEnumType):
+    """
+    How the saved pages get to the table: `upsert` them in batches, or stream them
+    with `copy` to a staging table, which is merged into the table periodically.
+    """
+
+    UPSERT = 'upsert'
+    COPY = 'copy'
+
+
 class BaseDatabase(abc.ABC, metaclass=BaseDatabaseMeta):
     """
     Base Database class to be used as parent for all Database subclasses.
@@ -16,6 +40,10 @@ class BaseDatabase(abc.ABC, metaclass=BaseDatabaseMeta):
     verbose = 'OVERRIDE_THIS'
     file_controller: BaseFileWriter = BaseFileWriter
     table: Table = urls_table
+    ingestion_modes: Tuple[str, ...] = (IngestionModes.UPSERT,)
+    ingestion: str = IngestionModes.UPSERT
+
+    file_writes_counter: int = 0
 
     def __init__(self, _host: str, _login: str, _pwd: str, _db: str, _driver: str = ''):
         super().__init__()
@@ -38,17 +66,126 @@ class BaseDatabase(abc.ABC, metaclass=BaseDatabaseMeta):
     def engine(self, orm_logging: bool = True):
         pass
 
-    @abc.abstractmethod
     async def save(
-        self, key: Any, name: str, content: str, parent: str, silent: bool,
-        overwrite: bool
+        self, key: Any, name: str, content: str, parent: str, silent: bool = False,
+        overwrite: bool = True, etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """
+        INSERT/CREATE/SAVE operation for a single page, see save_many().
+        :param etag: and :param last_modified: are the response validators used to
+        make conditional requests on re-crawl.
+        """
+        await self.save_many(
+            [PageRecord(key, name, content, parent, etag, last_modified)],
+            silent, overwrite,
+        )
+
+    async def save_many(
+        self, records: List[PageRecord], silent: bool = False, overwrite: bool = True
     ):
         """
-        INSERT/CREATE/SAVE operation. Args can be overriden in case it is needed to
-        store different types of data.
+        Bulk INSERT/CREATE/SAVE operation, the single write path of every
+        implementation. The content of each of :param records: is written to a file
+        exactly once, then all the entries are inserted or updated with upsert_many().
+        If a URL repeats, only its last record is saved. The time of the crawl
+        (in UTC) is stored as `crawled_at`.
+
+        When an entry existed, the file that is no longer referenced by it is
+        deleted: the old one if :param overwrite: is set, the new one otherwise. Both
+        may be the same file if the writer names the files by their content, then its
+        extra reference is released.
+        """
+        records = list({str(record.url): record for record in records}.values())
+        if not records:
+            return
+
+        results = await asyncio.gather(
+            *(
+                self.file_controller.write(record.url, record.content)
+                for record in records
+            ),
+            return_exceptions=True,
+        )
+        written = [html for html in results if not isinstance(html, BaseException)]
+        self.file_writes_counter += len(written)
+        if len(written) < len(results):
+            for html in written:
+                self.file_controller.delete(html)
+            raise next(exc for exc in results if isinstance(exc, BaseException))
+
+        crawled_at = datetime.utcnow()
+        rows = [
+            {
+                'url': str(record.url),
+                'title': record.title,
+                'html': html,
+                'parent': record.parent,
+                'etag': record.etag,
+                'last_modified': record.last_modified,
+                'crawled_at': crawled_at,
+            }
+            for record, html in zip(records, written)
+        ]
+        try:
+            old_htmls = await self.upsert_many(rows, overwrite, silent)
+        except BaseException:
+            for html in written:
+                self.file_controller.delete(html)
+            raise
+
+        for row, old_html in zip(rows, old_htmls):
+            self.release_file(row['html'], old_html, overwrite)
+            logger.crawl_info(f'Save URL: {row["url"]}')
+
+    def release_file(self, html: str, old_html: Optional[str], overwrite: bool):
+        """
+        Delete the file that the entry no longer references after it was saved with
+        :param html:, if it had :param old_html: before.
+        """
+        if not old_html:
+            return
+        if overwrite:
+            self.file_controller.delete(old_html)
+            if old_html != html:
+                logger.crawl_info(f'Overwrite file: {old_html}')
+        else:
+            self.file_controller.delete(html)
+
+    @abc.abstractmethod
+    async def get_validators(self, key: Any) -> Optional[Dict[str, Optional[str]]]:
+        """
+        SELECT operation for a single entry by :param key:. Returns `etag`,
+        `last_modified`, `crawled_at` and `html` (path to the stored file) of the
+        entry, or None if it does not exist.
+        """
+        pass
+
+    @abc.abstractmethod
+    async def get_crawl_times(self, keys: List[Any]) -> Dict[str, datetime]:
+        """
+        SELECT operation for the entries by :param keys: in one round trip. Returns
+        `crawled_at` by URL of the entries that exist and have it.
+        """
+        pass
+
+    @abc.abstractmethod
+    async def touch(self, key: Any):
+        """
+        UPDATE operation for a single entry by :param key:, which sets its
+        `crawled_at` to the current time (in UTC), e.g. when a re-crawl finds the
+        page not modified.
         """
         pass
 
+    @abc.abstractmethod
+    async def iter_urls(self, batch_size: int = 10000) -> AsyncIterator[List[str]]:
+        """
+        SELECT operation for all stored URLs, which yields them in batches of
+        :param batch_size:, so the whole table is never fetched at once.
+        """
+        yield []
+
     @abc.abstractmethod
     async def get(self, parent: str, limit: int = 10):
         """
@@ -64,17 +201,30 @@ class BaseDatabase(abc.ABC, metaclass=BaseDatabaseMeta):
         """
         pass
 
-    @classmethod
     @abc.abstractmethod
-    async def update(
-        cls, key: Any, content: str, connection, silent: bool, overwrite: bool
-    ) -> str:
+    async def upsert(
+        self, record: Dict[str, Any], overwrite: bool, silent: bool = False
+    ) -> Optional[str]:
         """
-        ON CONFLICT DO UPDATE operation. This is meant to be used inside save(), so
-        an existing :param connection: should be passed.
+        INSERT ... ON CONFLICT DO UPDATE operation for a single entry, used by
+        upsert_many(). Insert or update the entry of :param record: in one round trip,
+        and return the `html` (path to the stored file) the entry had before, or None
+        if it is new. The stored `html` is kept as it is if :param overwrite: is not
+        set.
         """
         pass
 
+    async def upsert_many(
+        self, records: List[Dict[str, Any]], overwrite: bool, silent: bool = False
+    ) -> List[Optional[str]]:
+        """
+        INSERT ... ON CONFLICT DO UPDATE operation for :param records: with distinct
+        URLs, used by save_many(). Returns the old `html` of every entry, in the order
+        of the records. This implementation calls upsert() for every record, override
+        it to upsert them all in one round trip.
+        """
+        return [await self.upsert(record, overwrite, silent) for record in records]
+
     @abc.abstractmethod
     async def drop_table(self, check_first: bool = False, silent: bool = False):
         """
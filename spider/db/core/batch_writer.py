@@ -0,0 +1,191 @@
+import asyncio
+from collections import Counter
+import itertools
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from spider.controllers.core.loggers import logger
+from spider.db.core.base_database import BaseDatabase
+from spider.db.core.record import PageRecord
+
+
+class BatchWriter:
+    """
+    Bounded write-behind queue of the pages to save. :param workers: tasks take the
+    pages from the queue in batches, and save every batch with one save_many() call
+    of :param database:. A batch is flushed when it has :param batch_size: records,
+    or :param flush_interval: seconds after its first record was taken, whichever
+    comes first.
+
+    The queue holds up to :param max_pending: records: put() waits while it is full,
+    so a crawl that finds pages faster than the DB stores them is slowed down to
+    the speed of the DB, instead of keeping every page in memory.
+
+    If a batch fails, its records are saved one by one, so only the records that
+    cannot be saved are lost; they are logged and counted by the type of the error.
+    close() waits until every record that was put is either saved or failed. The
+    records that are put, but not saved yet, are returned by unsaved(), so the crawl
+    state can account for them.
+    """
+
+    def __init__(
+        self, database: BaseDatabase, batch_size: int = 100,
+        flush_interval: float = 1.0, max_pending: int = 1000, workers: int = 2,
+        silent: bool = False, overwrite: bool = True,
+    ):
+        self.database = database
+        self.batch_size = max(int(batch_size or 1), 1)
+        self.flush_interval = flush_interval
+        self.max_pending = max(int(max_pending or 0), self.batch_size)
+        self.workers_number = max(int(workers or 1), 1)
+        self.silent = silent
+        self.overwrite = overwrite
+
+        self.__records: Optional[asyncio.Queue] = None
+        self.__added: Optional[asyncio.Event] = None
+        self.__workers: List[asyncio.Task] = []
+        self.__closing = False
+        self.__sequence = itertools.count()
+        self.__unsaved: Dict[int, PageRecord] = {}
+
+        self.batches_counter = 0
+        self.saved_counter = 0
+        self.failures: Counter = Counter()
+        self.waits_counter = 0
+        self.wait_time = 0.0
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of records that are put, but not saved yet.
+        """
+        return len(self.__unsaved)
+
+    @property
+    def failed_counter(self) -> int:
+        return sum(self.failures.values())
+
+    def unsaved(self) -> List[PageRecord]:
+        """
+        Return the records that are put, but not saved or failed yet: the queued ones
+        and the ones of the batches being saved.
+        """
+        return list(self.__unsaved.values())
+
+    def start(self):
+        """
+        Start the workers, unless they are started already.
+        """
+        if self.__workers:
+            return
+        self.__records = asyncio.Queue(self.max_pending)
+        self.__added = asyncio.Event()
+        self.__closing = False
+        self.__workers = [
+            asyncio.create_task(self.__work()) for _ in range(self.workers_number)
+        ]
+
+    async def put(self, record: PageRecord):
+        """
+        Put :param record: to the queue, wait while the queue is full.
+        """
+        self.start()
+        item = (next(self.__sequence), record)
+        self.__unsaved[item[0]] = record
+        if self.__records.full():
+            self.waits_counter += 1
+            started_at = time.monotonic()
+            await self.__records.put(item)
+            self.wait_time += time.monotonic() - started_at
+        else:
+            self.__records.put_nowait(item)
+        self.__added.set()
+
+    async def close(self):
+        """
+        Flush the partial batches at once, wait until every record is processed, and
+        stop the workers.
+        """
+        if not self.__workers:
+            return
+        self.__closing = True
+        self.__added.set()
+        if self.pending:
+            logger.crawl_info(f'Waiting for {self.pending} pending DB writes.')
+        await self.__records.join()
+        for worker in self.__workers:
+            worker.cancel()
+        await asyncio.gather(*self.__workers, return_exceptions=True)
+        self.__workers = []
+
+    def summary(self) -> str:
+        failures = ', '.join(
+            f'{error}: {count}' for error, count in self.failures.most_common()
+        )
+        return (
+            f'DB writes: {self.saved_counter} pages in {self.batches_counter} batches, '
+            f'{self.failed_counter} failed' + (f' ({failures})' if failures else '')
+            + f', queue full {self.waits_counter} times ({self.wait_time:.1f}s)'
+        )
+
+    async def __work(self):
+        while True:
+            batch = await self.__take_batch()
+            try:
+                await self.__save([record for _, record in batch])
+            finally:
+                for sequence, _ in batch:
+                    del self.__unsaved[sequence]
+                    self.__records.task_done()
+
+    async def __take_batch(self) -> List[Tuple[int, PageRecord]]:
+        """
+        Wait for a record, then take more until the batch is full, the flush interval
+        is over since the first one, or the writer is closing.
+        """
+        batch = [await self.__records.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self.__records.empty():
+                batch.append(self.__records.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if self.__closing or timeout <= 0:
+                break
+            self.__added.clear()
+            try:
+                await asyncio.wait_for(self.__added.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def __save(self, batch: List[PageRecord]):
+        try:
+            await self.database.save_many(batch, self.silent, self.overwrite)
+        except Exception as exc:
+            if len(batch) == 1:
+                self.__fail(batch[0], exc)
+                return
+            logger.error(
+                f'Cannot save a batch of {len(batch)} pages, saving them one by one: '
+                f'{exc}'
+            )
+            for record in batch:
+                try:
+                    await self.database.save_many([record], self.silent, self.overwrite)
+                except Exception as record_exc:
+                    self.__fail(record, record_exc)
+                else:
+                    self.saved_counter += 1
+        else:
+            self.batches_counter += 1
+            self.saved_counter += len(batch)
+
+    def __fail(self, record: PageRecord, exc: Exception):
+        self.failures[type(exc).__name__] += 1
+        logger.error(f'Cannot save {record.url}: {exc}')
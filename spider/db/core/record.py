@@ -1,5 +1,6 @@
 import dataclasses
 from typing import (
+    Any,
     Dict,
     List,
     Optional,
@@ -16,6 +17,21 @@ class Record:
     title: Optional[str]
 
 
+@dataclasses.dataclass
+class PageRecord:
+    """
+    Crawled page to be saved to the DB. The :param content: is written to a file on
+    save, and the entry stores the path to it.
+    """
+
+    url: Any
+    title: Optional[str]
+    content: str
+    parent: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
 class RecordIterator:
     """
     Record iterator implementation.
@@ -1,4 +1,5 @@
 from .postgres_database import PostgresDatabase
+from .redis_pool import RedisPool
 from .redis_database import RedisDatabase
 from .mongodb_database import MongoDatabase
 from .mysql_database import MySqlDatabase
@@ -6,6 +7,7 @@ from .mysql_database import MySqlDatabase
 __all__ = [
     'PostgresDatabase',
     'RedisDatabase',
+    'RedisPool',
     'MongoDatabase',
     'MySqlDatabase',
 ]
@@ -1,4 +1,12 @@
-from typing import Any
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 import motor.motor_asyncio
 
@@ -18,6 +26,7 @@ class MongoDatabase(BaseDatabase, Borg):
     verbose = 'mongodb'
     default_driver: str = 'mongodb'
     file_controller: BaseFileWriter = HTMLFileWriter
+    validator_fields: Tuple[str, ...] = ('etag', 'last_modified', 'crawled_at', 'html')
 
     def __init__(
         self, host: str, login: str, pwd: str, db: str, driver: str = default_driver
@@ -53,16 +62,74 @@ class MongoDatabase(BaseDatabase, Borg):
     def engine(self, orm_logging: bool = True):
         return self.__client
 
-    async def save(
-        self, key: Any, name: str, content: str, parent: str, silent: bool = False,
-        overwrite: bool = True,
-    ):
+    async def upsert(
+        self, record: Dict[str, Any], overwrite: bool, silent: bool = False
+    ) -> Optional[str]:
         """
-        Save an entry to the DB.
+        Insert or update the document with find_one_and_update(), which returns the
+        document as it was before the update.
         """
-        await self.table.insert_one(data)
-        # TODO
-        pass
+        fields = {name: value for name, value in record.items() if name != 'html'}
+        if overwrite:
+            update = {'$set': {**fields, 'html': record['html']}}
+        else:
+            update = {'$set': fields, '$setOnInsert': {'html': record['html']}}
+        old = await self.table.find_one_and_update(
+            {'url': record['url']}, update, projection={'html': 1}, upsert=True
+        )
+        return old.get('html') if old else None
+
+    async def get_validators(self, key: Any) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Get ETag, Last-Modified, crawl time and the file path of the entry by
+        :param key:.
+        """
+        document = await self.table.find_one(
+            {'url': str(key)}, projection={name: 1 for name in self.validator_fields}
+        )
+        if document is None:
+            return None
+        return {name: document.get(name) for name in self.validator_fields}
+
+    async def get_crawl_times(self, keys: List[Any]) -> Dict[str, datetime]:
+        """
+        Find the crawl times of the documents by :param keys:.
+        """
+        cursor = self.table.find(
+            {'url': {'$in': [str(key) for key in keys]}},
+            projection={'_id': 0, 'url': 1, 'crawled_at': 1},
+        )
+        return {
+            document['url']: document['crawled_at'] async for document in cursor
+            if document.get('crawled_at')
+        }
+
+    async def touch(self, key: Any):
+        """
+        Set the crawl time of the document by :param key: to now.
+        """
+        await self.table.update_one(
+            {'url': str(key)}, {'$set': {'crawled_at': datetime.utcnow()}}
+        )
+
+    async def iter_urls(self, batch_size: int = 10000) -> AsyncIterator[List[str]]:
+        """
+        Select all stored URLs in batches of :param batch_size:, the cursor fetches
+        them from the server in batches of the same size.
+        """
+        cursor = (
+            self.table
+            .find({}, projection={'_id': 0, 'url': 1})
+            .batch_size(batch_size)
+        )
+        urls = []
+        async for document in cursor:
+            urls.append(document['url'])
+            if len(urls) == batch_size:
+                yield urls
+                urls = []
+        if urls:
+            yield urls
 
     async def get(self, parent: str, limit: int = 10):
         """
@@ -89,15 +156,6 @@ class MongoDatabase(BaseDatabase, Borg):
         """
         return self.table.find().count()
 
-    async def update(
-        self, key: Any, content: str, connection, silent: bool, overwrite: bool
-    ) -> str:
-        """
-        Delete HTML file and store a new one if URL was previously crawled.
-        """
-        # TODO
-        pass
-
     async def drop_table(self, check_first: bool = False, silent: bool = False):
         """
         DROP TABLE operation.
@@ -1,6 +1,12 @@
+import asyncio
+from datetime import datetime
+import itertools
 from typing import (
+    Any,
+    AsyncIterator,
     Dict,
     List,
+    Optional,
     Union,
 )
 
@@ -10,17 +16,22 @@ from aiomysql.sa import (
     SAConnection,
 )
 import MySQLdb
+from pymysql.constants import ER
 import pymysql.err
 import sqlalchemy.exc
+from sqlalchemy.dialects import mysql
 from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.schema import (
     CreateTable,
     DropTable,
 )
-from sqlalchemy.sql.expression import select
+from sqlalchemy.sql.expression import (
+    literal,
+    select,
+    update,
+)
 from yarl import URL
 
-from spider.controllers.core.loggers import logger
 from spider.db.core import (
     BaseDatabase,
     Borg,
@@ -33,7 +44,8 @@ from spider.db.exceptions import (
     TableNotFoundError,
 )
 from spider.db.schema import (
-    urls_unique_constraint
+    urls_added_columns,
+    urls_unique_constraint,
 )
 from spider.file_storage import (
     BaseFileWriter,
@@ -50,6 +62,8 @@ class MySqlDatabase(BaseDatabase, Borg):
     default_driver = 'mysql'
     file_controller: BaseFileWriter = HTMLFileWriter
     unique_constraint: str = urls_unique_constraint
+    deadlock_retries: int = 3
+    deadlock_backoff: float = 0.1
 
     def __init__(
         self, host: str, login: str, pwd: str, db: str, driver: str = default_driver
@@ -62,6 +76,7 @@ class MySqlDatabase(BaseDatabase, Borg):
 
         self.is_initialized = False
         self.__mysql = None
+        self.__write_lock: Optional[asyncio.Lock] = None
 
     async def __init(self, silent: bool):
         """
@@ -117,38 +132,83 @@ class MySqlDatabase(BaseDatabase, Borg):
                            f'connector installed that is supported by your OS.'
             )
 
-    async def save(
-        self, key: URL, name: str, content: str, parent: str, silent: bool = False,
-        overwrite: bool = True
-    ):
+    async def upsert(
+        self, record: Dict[str, Any], overwrite: bool, silent: bool = False
+    ) -> Optional[str]:
         """
-        Save an entry to the DB.
+        Insert or update a single entry, see upsert_many().
         """
-        engine = await self.connect(silent=True)
+        return (await self.upsert_many([record], overwrite, silent))[0]
+
+    async def upsert_many(
+        self, records: List[Dict[str, Any]], overwrite: bool, silent: bool = False
+    ) -> List[Optional[str]]:
+        """
+        Insert or update the entries with a multi-row INSERT ... ON DUPLICATE KEY
+        UPDATE. MySQL has no RETURNING, so the file paths of the old rows are read
+        before, in the same transaction.
+
+        The old rows are not locked: SELECT ... FOR UPDATE of the URLs that are not
+        stored yet takes gap locks, and concurrent batches that insert into the same
+        gap deadlock. The batches are serialized instead, so no other batch of this
+        process changes the rows between the read and the write, and a batch that
+        still deadlocks with another process is retried :param deadlock_retries:
+        times.
+        """
+        if self.__write_lock is None:
+            self.__write_lock = asyncio.Lock()
+        urls = [record['url'] for record in records]
         try:
-            async with engine.acquire() as conn:
-                async with conn.begin() as transaction:
-                    query = (
-                        insert(self.table)
-                        .values(
-                            url=str(key),
-                            title=name,
-                            html=await self.file_controller.write(key, content),
-                            parent=parent
-                        )
-                        .on_duplicate_key_update(
-                            title=name,
-                            html=await self.update(key, content, conn, silent, overwrite),
-                            parent=parent
-                        )
-                    )
+            async with self.__write_lock:
+                for attempt in itertools.count(1):
+                    try:
+                        old_htmls = await self.__upsert_batch(records, overwrite)
+                        break
+                    except pymysql.err.OperationalError as exc:
+                        is_deadlock = exc.args and exc.args[0] == ER.LOCK_DEADLOCK
+                        if not is_deadlock or attempt > self.deadlock_retries:
+                            raise
+                        await asyncio.sleep(self.deadlock_backoff * attempt)
+        except pymysql.err.ProgrammingError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
+        except (
+            pymysql.err.OperationalError, sqlalchemy.exc.OperationalError,
+            MySQLdb.OperationalError
+        ) as exc:
+            self.__throw_operational_error(exc)
+        return [old_htmls.get(url) for url in urls]
 
-                    await conn.execute(query)
-                    await transaction.commit()
+    async def __upsert_batch(
+        self, records: List[Dict[str, Any]], overwrite: bool
+    ) -> Dict[str, str]:
+        """
+        Read the file paths of the stored entries of :param records:, and upsert them
+        in one transaction.
+        """
+        # literal() binds every URL on its own: the expanding IN parameter of
+        # SQLAlchemy is not rendered by aiomysql
+        old = (
+            select([self.table.c.url, self.table.c.html])
+            .where(self.table.c.url.in_([literal(record['url']) for record in records]))
+        )
+        query = insert(self.table).values(records)
+        query = query.on_duplicate_key_update(
+            title=query.inserted.title,
+            html=query.inserted.html if overwrite else self.table.c.html,
+            parent=query.inserted.parent,
+            etag=query.inserted.etag,
+            last_modified=query.inserted.last_modified,
+            crawled_at=query.inserted.crawled_at,
+        )
 
-            logger.crawl_info(f'Save URL: {key}')
-        except Exception as e:
-            print(e, type(e))   # TODO: catch more exceptions
+        engine = await self.connect(silent=True)
+        async with engine.acquire() as conn:
+            async with conn.begin() as transaction:
+                result = await conn.execute(old)
+                old_htmls = {row['url']: row['html'] for row in await result.fetchall()}
+                await conn.execute(query)
+                await transaction.commit()
+        return old_htmls
 
     async def get(self, parent: str, limit: int = 10) -> List[Dict[str, str]]:
         """
@@ -177,29 +237,106 @@ class MySqlDatabase(BaseDatabase, Borg):
             await self.disconnect()
         return [dict(record) for record in await result.fetchall()]
 
-    async def update(
-        self, url: URL, content: str, connection: SAConnection, silent: bool,
-        overwrite: bool
-    ) -> str:
+    async def get_validators(self, key: URL) -> Optional[Dict[str, Optional[str]]]:
         """
-        Delete HTML file and store a new one if URL was previously crawled.
+        Select ETag, Last-Modified, crawl time and the file path of the entry by
+        :param key:.
         """
+        engine = await self.connect(silent=True)
+        try:
+            async with engine.acquire() as conn:
+                query = (
+                    select([
+                        self.table.c.etag, self.table.c.last_modified,
+                        self.table.c.crawled_at, self.table.c.html,
+                    ])
+                    .where(self.table.c.url == str(key))
+                )
+                result = await conn.execute(query)
+                record = await result.fetchone()
+        except pymysql.err.ProgrammingError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
+        except (
+            pymysql.err.OperationalError, sqlalchemy.exc.OperationalError,
+            MySQLdb.OperationalError
+        ) as exc:
+            self.__throw_operational_error(exc)
+        return dict(record) if record else None
+
+    async def get_crawl_times(self, keys: List[URL]) -> Dict[str, datetime]:
+        """
+        Select the crawl times of the entries by :param keys:.
+        """
+        engine = await self.connect(silent=True)
         query = (
-            select([self.table.c.html])
-            .where(self.table.c.url == str(url))
+            select([self.table.c.url, self.table.c.crawled_at])
+            .where(self.table.c.url.in_([literal(str(key)) for key in keys]))
         )
+        try:
+            async with engine.acquire() as conn:
+                result = await conn.execute(query)
+                rows = await result.fetchall()
+        except pymysql.err.ProgrammingError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
+        except (
+            pymysql.err.OperationalError, sqlalchemy.exc.OperationalError,
+            MySQLdb.OperationalError
+        ) as exc:
+            self.__throw_operational_error(exc)
+        return {row['url']: row['crawled_at'] for row in rows if row['crawled_at']}
 
-        result = await connection.execute(query)
-        old_html = await result.fetchone()
+    async def touch(self, key: URL):
+        """
+        Set the crawl time of the entry by :param key: to now.
+        """
+        engine = await self.connect(silent=True)
+        query = (
+            update(self.table)
+            .where(self.table.c.url == str(key))
+            # `title` has onupdate set, so it is kept explicitly
+            .values(title=self.table.c.title, crawled_at=datetime.utcnow())
+        )
+        try:
+            async with engine.acquire() as conn:
+                async with conn.begin() as transaction:
+                    await conn.execute(query)
+                    await transaction.commit()
+        except pymysql.err.ProgrammingError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
+        except (
+            pymysql.err.OperationalError, sqlalchemy.exc.OperationalError,
+            MySQLdb.OperationalError
+        ) as exc:
+            self.__throw_operational_error(exc)
 
-        if old_html:
-            html = dict(old_html).get('html')
-            if overwrite:
-                self.file_controller.delete(html)
-                logger.crawl_info(f'Overwrite file: {html}')
-            else:
-                return html
-        return await self.file_controller.write(url, content)
+    async def iter_urls(self, batch_size: int = 10000) -> AsyncIterator[List[str]]:
+        """
+        Select all stored URLs in batches of :param batch_size:, paginated by id.
+        """
+        engine = await self.connect(silent=True)
+        last_id = 0
+        while True:
+            try:
+                async with engine.acquire() as conn:
+                    query = (
+                        select([self.table.c.id, self.table.c.url])
+                        .where(self.table.c.id > last_id)
+                        .order_by(self.table.c.id)
+                        .limit(batch_size)
+                    )
+                    result = await conn.execute(query)
+                    records = await result.fetchall()
+            except pymysql.err.ProgrammingError:
+                raise TableNotFoundError(self.table.name, self.__db_name)
+            except (
+                pymysql.err.OperationalError, sqlalchemy.exc.OperationalError,
+                MySQLdb.OperationalError
+            ) as exc:
+                self.__throw_operational_error(exc)
+            if not records:
+                return
+            last_id = records[-1]['id']
+            yield [record['url'] for record in records]
 
     async def count_all(self) -> int:
         """
@@ -240,7 +377,8 @@ class MySqlDatabase(BaseDatabase, Borg):
 
     async def create_table(self, check_first: bool = False, silent: bool = False):
         """
-        Create the table.
+        Create the table. With :param check_first:, the table may exist already, and
+        the columns it misses are added to it.
         """
         engine = await self.connect(silent)
         try:
@@ -250,6 +388,8 @@ class MySqlDatabase(BaseDatabase, Borg):
 
             async with engine.acquire() as conn:
                 await conn.execute(CreateTable(self.table, if_not_exists=check_first))
+                if check_first:
+                    await self.__add_missing_columns(conn)
         except (
             pymysql.err.OperationalError, sqlalchemy.exc.OperationalError,
             MySQLdb.OperationalError
@@ -258,6 +398,26 @@ class MySqlDatabase(BaseDatabase, Borg):
         finally:
             await self.disconnect()
 
+    async def __add_missing_columns(self, conn: SAConnection):
+        """
+        Add the columns of :param urls_added_columns: to a table that was created
+        without them. MySQL has no `ADD COLUMN IF NOT EXISTS`, so the existing columns
+        are read from the information schema first.
+        """
+        result = await conn.execute(
+            'SELECT column_name FROM information_schema.columns '
+            'WHERE table_schema = DATABASE() AND table_name = %s',
+            (self.table.name,)
+        )
+        existing = {row[0].lower() for row in await result.fetchall()}
+        clauses = ', '.join(
+            f'ADD COLUMN {column.name} {column.type.compile(dialect=mysql.dialect())}'
+            for column in (self.table.c[name] for name in urls_added_columns)
+            if column.name not in existing
+        )
+        if clauses:
+            await conn.execute(f'ALTER TABLE {self.table.name} {clauses}')
+
     def __throw_operational_error(
         self, exc: Union[
             pymysql.err.OperationalError, sqlalchemy.exc.OperationalError,
@@ -1,18 +1,35 @@
+import asyncio
+from datetime import datetime
 import socket
+import time
 from typing import (
+    Any,
+    AsyncIterator,
     Dict,
     List,
+    Optional,
+    Tuple,
 )
 
 from asyncpgsa import PG
 import asyncpg.exceptions
-from asyncpg.pool import PoolConnectionProxy
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import (
+    array,
+    insert,
+    Insert,
+)
 from sqlalchemy.engine import Engine, create_engine
 import sqlalchemy.exc
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.sql.expression import (
+    any_,
+    delete,
     func,
     select,
+    text,
+    update,
 )
 from yarl import URL
 
@@ -20,6 +37,7 @@ from spider.controllers.core.loggers import logger
 from spider.db.core import (
     BaseDatabase,
     Borg,
+    IngestionModes,
 )
 from spider.db.exceptions import (
     CredentialsError,
@@ -28,7 +46,11 @@ from spider.db.exceptions import (
     TableAlreadyExists,
     TableNotFoundError,
 )
-from spider.db.schema import urls_unique_constraint
+from spider.db.schema import (
+    urls_added_columns,
+    urls_staging_table,
+    urls_unique_constraint,
+)
 from spider.file_storage import BaseFileWriter
 from spider.file_storage import HTMLFileWriter
 
@@ -42,6 +64,12 @@ class PostgresDatabase(BaseDatabase, Borg):
     default_driver: str = 'postgresql'
     file_controller: BaseFileWriter = HTMLFileWriter
     unique_constraint: str = urls_unique_constraint
+    staging_table: Table = urls_staging_table
+    staged_columns: Tuple[str, ...] = tuple(
+        column.name for column in urls_staging_table.c if column.name != 'seq'
+    )
+    ingestion_modes: Tuple[str, ...] = (IngestionModes.UPSERT, IngestionModes.COPY)
+    merge_interval: float = 5.0
 
     def __init__(
         self, host: str, login: str, pwd: str, db: str, driver: str = default_driver
@@ -54,6 +82,11 @@ class PostgresDatabase(BaseDatabase, Borg):
         self.is_initialized = False
         self.__pg = PG()
 
+        self.__has_staging_table = False
+        self.__merge_lock: Optional[asyncio.Lock] = None
+        self.__merged_at = time.monotonic()
+        self.__overwrite = True
+
     async def __init(self):
         """
         Initialize PG pool if was not initialized.
@@ -85,9 +118,17 @@ class PostgresDatabase(BaseDatabase, Borg):
 
     async def disconnect(self):
         """
-        Close the pool.
+        Merge the staged entries, if any, and close the pool.
         """
         if self.is_initialized:
+            if self.__has_staging_table:
+                try:
+                    await self.merge()
+                except Exception as exc:
+                    logger.error(
+                        f'Cannot merge the staged entries, they are merged on the next '
+                        f'run: {exc}'
+                    )
             self.is_initialized = not self.is_initialized
             await self.__pg.pool.close()
 
@@ -101,45 +142,178 @@ class PostgresDatabase(BaseDatabase, Borg):
             url=self.__conn_string, echo=do_logging
         )
 
-    async def save(
-        self, key: URL, name: str, content: str, parent: str, silent: bool = False,
-        overwrite: bool = True
-    ):
+    async def upsert(
+        self, record: Dict[str, Any], overwrite: bool, silent: bool = False
+    ) -> Optional[str]:
+        """
+        Insert or update a single entry, see upsert_many().
         """
-        Save an entry to the DB.
+        return (await self.upsert_many([record], overwrite, silent))[0]
+
+    async def upsert_many(
+        self, records: List[Dict[str, Any]], overwrite: bool, silent: bool = False
+    ) -> List[Optional[str]]:
+        """
+        Insert or update the entries with a single statement: a multi-row
+        INSERT ... ON CONFLICT DO UPDATE, joined with the old rows that are read by
+        another CTE, so their file paths are returned by the same round trip. All the
+        CTEs see the table as it was before the statement, so the old paths are read
+        whichever of them runs first.
+
+        With the `copy` ingestion, the entries are staged instead, see stage().
         """
+        if self.ingestion == IngestionModes.COPY:
+            await self.stage(records, overwrite)
+            return [None] * len(records)
+
+        urls = [record['url'] for record in records]
+        old = (
+            select([self.table.c.url, self.table.c.html])
+            .where(self.table.c.url == any_(array(urls)))
+            .cte('old')
+        )
+        upserted = (
+            self.__on_conflict_do_update(insert(self.table).values(records), overwrite)
+            .returning(self.table.c.url)
+            .cte('upserted')
+        )
+        query = (
+            select([upserted.c.url, old.c.html])
+            .select_from(upserted.outerjoin(old, old.c.url == upserted.c.url))
+        )
+
         try:
             pg = await self.connect()
             async with pg.transaction() as conn:
-                query = (
-                    insert(self.table)
-                    .values(
-                        url=str(key),
-                        title=name,
-                        html=await self.file_controller.write(key, content),
-                        parent=parent
-                    )
-                    .on_conflict_do_update(
-                        constraint=self.unique_constraint,
-                        set_={
-                            'title': name,
-                            'html': await self.update(
-                                key, content, conn, silent, overwrite
-                            ),
-                            'parent': parent
-                        }
-                    )
+                rows = await conn.fetch(query)
+        except asyncpg.exceptions.UndefinedTableError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
+        old_htmls = {row['url']: row['html'] for row in rows}
+        return [old_htmls.get(url) for url in urls]
+
+    async def stage(self, records: List[Dict[str, Any]], overwrite: bool):
+        """
+        Stream the entries to the unlogged staging table with COPY, and merge the
+        staging table into the table if :param merge_interval: seconds have passed
+        since the last merge. The old files are released by the merge.
+        """
+        pg = await self.connect()
+        await self.__create_staging_table(pg)
+        async with pg.transaction() as conn:
+            await conn.copy_records_to_table(
+                self.staging_table.name,
+                records=[
+                    tuple(record[column] for column in self.staged_columns)
+                    for record in records
+                ],
+                columns=self.staged_columns,
+            )
+        self.__overwrite = overwrite
+        if time.monotonic() - self.__merged_at >= self.merge_interval:
+            await self.merge()
+
+    async def merge(self) -> int:
+        """
+        Move every staged entry to the table with one set-based statement: the staged
+        rows are deleted and returned by a CTE, the last one of every URL is upserted,
+        and the old file paths are read by another CTE. Then the files that are no
+        longer referenced are released: the ones of the staged rows that were
+        replaced by later ones, and the old or new file of every merged entry.
+        Returns the number of merged rows.
+        """
+        if self.__merge_lock is None:
+            self.__merge_lock = asyncio.Lock()
+        async with self.__merge_lock:
+            self.__merged_at = time.monotonic()
+            if not self.__has_staging_table:
+                return 0
+
+            staged = (
+                delete(self.staging_table)
+                .returning(*self.staging_table.c)
+                .cte('staged')
+            )
+            latest = (
+                select([staged])
+                .distinct(staged.c.url)
+                .order_by(staged.c.url, staged.c.seq.desc())
+                .cte('latest')
+            )
+            merged = (
+                self.__on_conflict_do_update(
+                    insert(self.table).from_select(
+                        self.staged_columns,
+                        select([latest.c[column] for column in self.staged_columns]),
+                    ),
+                    self.__overwrite,
+                )
+                .returning(self.table.c.url)
+                .cte('merged')
+            )
+            old = (
+                select([self.table.c.url, self.table.c.html])
+                .select_from(
+                    self.table.join(latest, latest.c.url == self.table.c.url)
+                )
+                .cte('old')
+            )
+            query = (
+                select([
+                    staged.c.html,
+                    (staged.c.seq == latest.c.seq).label('is_latest'),
+                    old.c.html.label('old_html'),
+                ])
+                .select_from(
+                    staged
+                    .join(latest, latest.c.url == staged.c.url)
+                    .join(merged, merged.c.url == latest.c.url)
+                    .outerjoin(old, old.c.url == staged.c.url)
                 )
+            )
 
-                # a hack to avoid asyncpgsa throwing
-                # AttributeError: 'Insert' object has no attribute 'parameters'.
-                setattr(query, 'parameters', query.compile().params)
+            try:
+                pg = await self.connect()
+                async with pg.transaction() as conn:
+                    rows = await conn.fetch(query)
+            except asyncpg.exceptions.UndefinedTableError:
+                raise TableNotFoundError(self.table.name, self.__db_name)
 
-                await conn.execute(query)
+        for row in rows:
+            if row['is_latest']:
+                self.release_file(row['html'], row['old_html'], self.__overwrite)
+            else:
+                self.file_controller.delete(row['html'])
+        if rows:
+            logger.crawl_info(f'Merged {len(rows)} staged entries.')
+        return len(rows)
 
-            logger.crawl_info(f'Save URL: {key}')
-        except asyncpg.exceptions.UndefinedTableError:
-            raise TableNotFoundError(self.table.name, self.__db_name)
+    async def __create_staging_table(self, pg: PG):
+        if not self.__has_staging_table:
+            async with pg.transaction() as conn:
+                await conn.execute(
+                    str(
+                        CreateTable(self.staging_table, if_not_exists=True)
+                        .compile(dialect=postgresql.dialect())
+                    )
+                )
+            self.__has_staging_table = True
+
+    def __on_conflict_do_update(self, query: Insert, overwrite: bool) -> Insert:
+        """
+        Update every column but the file path of an existing entry, and the file path
+        as well if :param overwrite: is set.
+        """
+        return query.on_conflict_do_update(
+            constraint=self.unique_constraint,
+            set_={
+                'title': query.excluded.title,
+                'html': query.excluded.html if overwrite else self.table.c.html,
+                'parent': query.excluded.parent,
+                'etag': query.excluded.etag,
+                'last_modified': query.excluded.last_modified,
+                'crawled_at': query.excluded.crawled_at,
+            }
+        )
 
     async def get(self, parent: str, limit: int = 10) -> List[Dict[str, str]]:
         """
@@ -159,27 +333,86 @@ class PostgresDatabase(BaseDatabase, Borg):
         except asyncpg.exceptions.UndefinedTableError:
             raise TableNotFoundError(self.table.name, self.__db_name)
 
-    async def update(
-        self, url: URL, content: str, connection: PoolConnectionProxy, silent: bool,
-        overwrite: bool
-    ) -> str:
+    async def get_validators(self, key: URL) -> Optional[Dict[str, Optional[str]]]:
         """
-        Delete HTML file and store a new one if URL was previously crawled.
+        Select ETag, Last-Modified, crawl time and the file path of the entry by
+        :param key:.
         """
-        query = (
-            select([self.table.c.html])
-            .where(self.table.c.url == str(url))
-        )
+        try:
+            pg = await self.connect()
+            async with pg.transaction() as conn:
+                query = (
+                    select([
+                        self.table.c.etag, self.table.c.last_modified,
+                        self.table.c.crawled_at, self.table.c.html,
+                    ])
+                    .where(self.table.c.url == str(key))
+                )
+                record = await conn.fetchrow(query)
+            return dict(record) if record else None
+        except asyncpg.exceptions.UndefinedTableError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
 
-        old_html = await connection.fetchval(query)
+    async def get_crawl_times(self, keys: List[URL]) -> Dict[str, datetime]:
+        """
+        Select the crawl times of the entries by :param keys:.
+        """
+        try:
+            pg = await self.connect()
+            async with pg.transaction() as conn:
+                query = (
+                    select([self.table.c.url, self.table.c.crawled_at])
+                    .where(self.table.c.url == any_(array([str(key) for key in keys])))
+                )
+                rows = await conn.fetch(query)
+        except asyncpg.exceptions.UndefinedTableError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
+        return {row['url']: row['crawled_at'] for row in rows if row['crawled_at']}
 
-        if old_html:
-            if overwrite:
-                self.file_controller.delete(old_html)
-                logger.crawl_info(f'Overwrite file: {old_html}')
-            else:
-                return old_html
-        return await self.file_controller.write(url, content)
+    async def touch(self, key: URL):
+        """
+        Set the crawl time of the entry by :param key: to now.
+        """
+        try:
+            pg = await self.connect()
+            async with pg.transaction() as conn:
+                query = (
+                    update(self.table)
+                    .where(self.table.c.url == str(key))
+                    # `title` has onupdate set, so it is kept explicitly
+                    .values(title=self.table.c.title, crawled_at=datetime.utcnow())
+                )
+
+                # a hack to avoid asyncpgsa throwing
+                # AttributeError: 'Update' object has no attribute 'parameters'.
+                setattr(query, 'parameters', query.compile().params)
+
+                await conn.execute(query)
+        except asyncpg.exceptions.UndefinedTableError:
+            raise TableNotFoundError(self.table.name, self.__db_name)
+
+    async def iter_urls(self, batch_size: int = 10000) -> AsyncIterator[List[str]]:
+        """
+        Select all stored URLs in batches of :param batch_size:, paginated by id.
+        """
+        pg = await self.connect()
+        last_id = 0
+        while True:
+            try:
+                async with pg.transaction() as conn:
+                    query = (
+                        select([self.table.c.id, self.table.c.url])
+                        .where(self.table.c.id > last_id)
+                        .order_by(self.table.c.id)
+                        .limit(batch_size)
+                    )
+                    records = await conn.fetch(query)
+            except asyncpg.exceptions.UndefinedTableError:
+                raise TableNotFoundError(self.table.name, self.__db_name)
+            if not records:
+                return
+            last_id = records[-1]['id']
+            yield [record['url'] for record in records]
 
     async def count_all(self) -> int:
         """
@@ -204,7 +437,9 @@ class PostgresDatabase(BaseDatabase, Borg):
         Drop the table.
         """
         try:
-            self.table.drop(self.engine(silent), check_first)
+            engine = self.engine(silent)
+            self.staging_table.drop(engine, checkfirst=True)
+            self.table.drop(engine, check_first)
         except sqlalchemy.exc.OperationalError as exc:
             raise DatabaseError(base_error=exc)
         except sqlalchemy.exc.ProgrammingError:
@@ -212,11 +447,28 @@ class PostgresDatabase(BaseDatabase, Borg):
 
     async def create_table(self, check_first: bool = False, silent: bool = False):
         """
-        Create the table.
+        Create the table. With :param check_first:, the table may exist already, and
+        the columns it misses are added to it.
         """
         try:
-            self.table.create(self.engine(silent), check_first)
+            engine = self.engine(silent)
+            self.table.create(engine, check_first)
+            if check_first:
+                self.__add_missing_columns(engine)
         except sqlalchemy.exc.OperationalError as exc:
             raise DatabaseError(base_error=exc)
         except sqlalchemy.exc.ProgrammingError:
             raise TableAlreadyExists(self.table.name, self.__db_name)
+
+    def __add_missing_columns(self, engine: Engine):
+        """
+        Add the columns of :param urls_added_columns: to a table that was created
+        without them.
+        """
+        clauses = ', '.join(
+            f'ADD COLUMN IF NOT EXISTS {column.name} '
+            f'{column.type.compile(dialect=postgresql.dialect())}'
+            for column in (self.table.c[name] for name in urls_added_columns)
+        )
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {self.table.name} {clauses}'))
@@ -1,4 +1,8 @@
+import asyncio
+from datetime import datetime
 from typing import (
+    Any,
+    AsyncIterator,
     Dict,
     List,
     Optional,
@@ -7,15 +11,11 @@ from typing import (
 import aioredis
 from yarl import URL
 
-from spider.controllers.core.loggers import logger
 from spider.db.core import (
     BaseDatabase,
     Borg,
 )
-from spider.db.exceptions import (
-    CredentialsError,
-    DatabaseError,
-)
+from spider.db.implementations.redis_pool import RedisPool
 from spider.file_storage import BaseFileWriter
 from spider.file_storage import HTMLFileWriter
 
@@ -33,12 +33,7 @@ class RedisDatabase(BaseDatabase, Borg):
         self, host: str, login: str, pwd: str, db: str, driver: str = default_driver
     ):
         super().__init__(host, login, pwd, db, driver)
-        if login and pwd:
-            self.__conn_string = f'{driver}://{login}:{pwd}@{host}/{db}'
-        else:
-            self.__conn_string = f'{driver}://{host}/{db}'
-
-        self.__db_host = host
+        self.__pool = RedisPool.from_login_args(host, login, pwd, db, driver)
 
         self.__redis: Optional[aioredis.commands.Redis] = None
         self.is_initialized = False
@@ -47,32 +42,9 @@ class RedisDatabase(BaseDatabase, Borg):
         """
         Initiate database connection.
         """
-        try:
-            if not self.is_initialized:
-                self.__redis: aioredis.commands.Redis = (
-                    await aioredis.create_redis_pool(
-                        self.__conn_string,
-                        minsize=5,
-                        maxsize=10
-                    )
-                )
-                self.is_initialized = True
-        except AssertionError:
-            raise DatabaseError(
-                base_error='DB name for a Redis database should be a digit (0-15)'
-            )
-        except ConnectionRefusedError:
-            raise DatabaseError(
-                base_error='Connection failed. Check if your Redis instance is up'
-            )
-        except aioredis.errors.AuthError as exc:
-            if "ERR invalid password" in str(exc):
-                raise CredentialsError(db_host=self.__db_host)
-            else:
-                raise DatabaseError(
-                    base_error='Authentication failed. Your Redis instance does not have '
-                               'a password set'
-                )
+        if not self.is_initialized:
+            self.__redis = await self.__pool.connect()
+            self.is_initialized = True
 
     async def disconnect(self):
         """
@@ -80,30 +52,91 @@ class RedisDatabase(BaseDatabase, Borg):
         """
         if self.is_initialized:
             self.is_initialized = not self.is_initialized
-            self.__redis.quit()
+            await self.__pool.close()
 
     def engine(self, orm_logging: bool = True):
         return self.__redis
 
-    async def save(
-        self, key: URL, name: str, content: str, parent: str, silent: bool = False,
-        overwrite: bool = True
-    ):
+    async def upsert(
+        self, record: Dict[str, Any], overwrite: bool, silent: bool = False
+    ) -> Optional[str]:
         """
-        Save an entry to the DB.
+        Insert or update a single entry, see upsert_many().
         """
-        if name is None:
-            return
+        return (await self.upsert_many([record], overwrite, silent))[0]
 
-        html = await self.update(key, content, None, silent, overwrite)
-        await self.__redis.hmset_dict(
-            str(key),
-            {
-                'title': name,
-                'html': html,
-                'parent': parent,
+    async def upsert_many(
+        self, records: List[Dict[str, Any]], overwrite: bool, silent: bool = False
+    ) -> List[Optional[str]]:
+        """
+        Read the old file paths and set the fields of the hashes in one MULTI/EXEC
+        transaction, which is sent as a single pipeline. The file path is set with
+        HSETNX if :param overwrite: is off.
+        """
+        transaction = self.__redis.multi_exec()
+        old_htmls = []
+        for record in records:
+            key = record['url']
+            fields = {
+                'title': record['title'] or '',
+                'parent': record['parent'],
+                'etag': record['etag'] or '',
+                'last_modified': record['last_modified'] or '',
+                'crawled_at': record['crawled_at'].isoformat(),
             }
+            old_htmls.append(transaction.hget(key, 'html'))
+            if overwrite:
+                transaction.hmset_dict(key, {**fields, 'html': record['html']})
+            else:
+                transaction.hmset_dict(key, fields)
+                transaction.hsetnx(key, 'html', record['html'])
+        await transaction.execute()
+
+        return [
+            old_html.decode('utf-8') if old_html else None
+            for old_html in await asyncio.gather(*old_htmls)
+        ]
+
+    async def get_validators(self, key: URL) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Get ETag, Last-Modified, crawl time and the file path of the entry by
+        :param key:.
+        """
+        etag, last_modified, crawled_at, html = await self.__redis.hmget(
+            str(key), 'etag', 'last_modified', 'crawled_at', 'html'
         )
+        if not html:
+            return None
+        return {
+            'etag': etag.decode('utf-8') if etag else None,
+            'last_modified': last_modified.decode('utf-8') if last_modified else None,
+            'crawled_at': (
+                datetime.fromisoformat(crawled_at.decode('utf-8')) if crawled_at
+                else None
+            ),
+            'html': html.decode('utf-8'),
+        }
+
+    async def get_crawl_times(self, keys: List[URL]) -> Dict[str, datetime]:
+        """
+        Get the crawl times of the entries by :param keys:, the concurrent HGETs are
+        sent as one pipeline.
+        """
+        urls = [str(key) for key in keys]
+        crawl_times = await asyncio.gather(
+            *(self.__redis.hget(url, 'crawled_at') for url in urls)
+        )
+        return {
+            url: datetime.fromisoformat(crawled_at.decode('utf-8'))
+            for url, crawled_at in zip(urls, crawl_times) if crawled_at
+        }
+
+    async def touch(self, key: URL):
+        """
+        Set the crawl time of the entry by :param key: to now, if it exists.
+        """
+        if await self.__redis.exists(str(key)):
+            await self.__redis.hset(str(key), 'crawled_at', datetime.utcnow().isoformat())
 
     async def get(self, parent: str, limit: int = 10) -> List[Dict[str, str]]:
         """
@@ -133,6 +166,16 @@ class RedisDatabase(BaseDatabase, Borg):
         await self.disconnect()
         return data
 
+    async def iter_urls(self, batch_size: int = 10000) -> AsyncIterator[List[str]]:
+        """
+        Scan all stored URLs (keys), :param batch_size: is a hint for SCAN.
+        """
+        cur = b'0'
+        while cur:
+            cur, keys = await self.__redis.scan(cur, match='*', count=batch_size)
+            if keys:
+                yield [key.decode('utf-8') for key in keys]
+
     async def count_all(self) -> int:
         """
         Count all entries in the DB.
@@ -147,22 +190,6 @@ class RedisDatabase(BaseDatabase, Borg):
         await self.disconnect()
         return counter
 
-    async def update(
-        self, key: URL, content: str, _, silent: bool, overwrite: bool
-    ) -> str:
-        """
-        Delete HTML file and store a new one if URL was previously crawled.
-        """
-        old_html = await self.__redis.hmget(str(key), 'html')
-        if len(old_html) == 1 and old_html[0]:
-            old_html = old_html[0].decode('utf-8')
-            if overwrite:
-                self.file_controller.delete(old_html)
-                logger.crawl_info(f'Overwrite file: {old_html}')
-            else:
-                return old_html
-        return await self.file_controller.write(key, content)
-
     async def drop_table(self, check_first: bool = False, silent: bool = False):
         """
         DROP TABLE operation.
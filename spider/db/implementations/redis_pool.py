@@ -0,0 +1,76 @@
+from typing import Optional
+
+import aioredis
+
+from spider.db.exceptions import (
+    CredentialsError,
+    DatabaseError,
+)
+
+
+class RedisPool:
+    """
+    Connection pool of a Redis instance, shared by the Redis DAO and the distributed
+    frontier. Connection errors are turned into the DB exceptions of the project.
+    """
+
+    def __init__(
+        self, conn_string: str, host: str, minsize: int = 5, maxsize: int = 10
+    ):
+        self.conn_string = conn_string
+        self.host = host
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.redis: Optional[aioredis.commands.Redis] = None
+
+    @classmethod
+    def from_login_args(
+        cls, host: str, login: str, pwd: str, db: str, driver: str = 'redis',
+        **kwargs,
+    ) -> 'RedisPool':
+        if login and pwd:
+            conn_string = f'{driver}://{login}:{pwd}@{host}/{db}'
+        else:
+            conn_string = f'{driver}://{host}/{db}'
+        return cls(conn_string, host, **kwargs)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.redis is not None
+
+    async def connect(self) -> aioredis.commands.Redis:
+        """
+        Create the pool, unless it is created already.
+        """
+        if self.redis is not None:
+            return self.redis
+        try:
+            self.redis = await aioredis.create_redis_pool(
+                self.conn_string, minsize=self.minsize, maxsize=self.maxsize
+            )
+        except AssertionError:
+            raise DatabaseError(
+                base_error='DB name for a Redis database should be a digit (0-15)'
+            )
+        except OSError:
+            raise DatabaseError(
+                base_error='Connection failed. Check if your Redis instance is up'
+            )
+        except aioredis.errors.AuthError as exc:
+            if "ERR invalid password" in str(exc):
+                raise CredentialsError(db_host=self.host)
+            else:
+                raise DatabaseError(
+                    base_error='Authentication failed. Your Redis instance does not have '
+                               'a password set'
+                )
+        return self.redis
+
+    async def close(self):
+        """
+        Close the pool.
+        """
+        if self.redis is not None:
+            redis, self.redis = self.redis, None
+            redis.close()
+            await redis.wait_closed()
@@ -1,5 +1,7 @@
 from sqlalchemy import (
+    BigInteger,
     Column,
+    DateTime,
     Integer,
     MetaData,
     String,
@@ -16,6 +18,29 @@ urls_table = Table(
     Column('title', Text, onupdate=True),
     Column('parent', Text, nullable=False),
     Column('html', Text),
+    Column('etag', Text),
+    Column('last_modified', Text),
+    Column('crawled_at', DateTime),
 )
 
 urls_unique_constraint = f'{urls_table.name}_url_key'
+
+# columns added to `urls_table` after its first release: create_table() adds them to
+# the tables that were created without them
+urls_added_columns = ('etag', 'last_modified', 'crawled_at')
+
+# rows stream into this table with COPY, and are merged into `urls_table` in bulk.
+# UNLOGGED skips the WAL: it is faster, but the table is emptied after a crash.
+urls_staging_table = Table(
+    f'{urls_table.name}_staging',
+    MetaData(),
+    Column('seq', BigInteger, primary_key=True, autoincrement=True),
+    Column('url', String(600), nullable=False),
+    Column('title', Text),
+    Column('parent', Text, nullable=False),
+    Column('html', Text),
+    Column('etag', Text),
+    Column('last_modified', Text),
+    Column('crawled_at', DateTime),
+    prefixes=['UNLOGGED'],
+)
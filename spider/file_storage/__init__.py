@@ -1,7 +1,17 @@
 from .core import BaseFileWriter
-from .implementations import HTMLFileWriter
+from .implementations import (
+    ContentAddressedFileWriter,
+    HTMLFileWriter,
+)
+from .storages import (
+    FileStorages,
+    get_file_writer,
+)
 
 __all__ = [
     'BaseFileWriter',
+    'ContentAddressedFileWriter',
     'HTMLFileWriter',
+    'FileStorages',
+    'get_file_writer',
 ]
@@ -29,6 +29,14 @@ class BaseFileWriter(abc.ABC):
         """
         pass
 
+    @classmethod
+    @abc.abstractmethod
+    async def read(cls, file_name: Any) -> str:
+        """
+        Read the contents of the file by :param file_name:.
+        """
+        pass
+
     @classmethod
     @abc.abstractmethod
     def delete(cls, file_name: Any):
@@ -1,5 +1,7 @@
 from .html_file_writer import HTMLFileWriter
+from .content_addressed_file_writer import ContentAddressedFileWriter
 
 __all__ = [
     'HTMLFileWriter',
+    'ContentAddressedFileWriter',
 ]
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import uuid
+
+from aiofile import (
+    AIOFile,
+    Writer,
+)
+from yarl import URL
+
+from spider.file_storage.implementations.html_file_writer import HTMLFileWriter
+
+
+class ContentAddressedFileWriter(HTMLFileWriter):
+    """
+    HTML file writer that names the files by the BLAKE2b hash of their content, so
+    identical pages (mirrors, error pages, unchanged re-crawls) are stored once.
+
+    Every write() of a content counts as one reference to its file, and delete()
+    releases one reference: the file is removed with the last one. A file with a
+    single reference has no counter; the counters of shared files are kept next to
+    them, in `<file name>.refs`.
+    """
+
+    verbose = 'content'
+    DIGEST_SIZE = 20
+
+    deduplicated_counter: int = 0
+
+    @classmethod
+    async def write(cls, url: URL, html: str) -> str:
+        """
+        Write HTML content into a file, unless the file with that content exists.
+        """
+        os.makedirs(cls.PATH_TO_FILES, exist_ok=True)
+
+        path = cls.build_file_path(cls.__generate_file_name(html))
+        if path.exists():
+            cls.set_references(path, cls.references(path) + 1)
+            cls.deduplicated_counter += 1
+            return str(path)
+
+        # the file is written under a temporary name and renamed, so a file that is
+        # found by its name is never a partial one
+        temp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+        async with AIOFile(temp_path, mode='w+') as file:
+            writer = Writer(file)
+            await writer(html)
+        if path.exists():
+            os.remove(temp_path)
+            cls.set_references(path, cls.references(path) + 1)
+            cls.deduplicated_counter += 1
+        else:
+            os.replace(temp_path, path)
+        return str(path)
+
+    @classmethod
+    def __generate_file_name(cls, html: str) -> str:
+        """
+        Format: `<hash>.html`, where hash is the hex BLAKE2b digest of the content.
+        """
+        digest = hashlib.blake2b(
+            html.encode('utf-8', errors='surrogatepass'), digest_size=cls.DIGEST_SIZE
+        )
+        return f'{digest.hexdigest()}.html'
@@ -5,6 +5,7 @@ import uuid
 
 from aiofile import (
     AIOFile,
+    Reader,
     Writer,
 )
 from yarl import URL
@@ -15,8 +16,15 @@ from spider.file_storage import BaseFileWriter
 class HTMLFileWriter(BaseFileWriter):
     """
     HTML file writer, async implementation.
+
+    Every file name is unique, so the files are not shared, but a table may also hold
+    the shared files of ContentAddressedFileWriter from an earlier crawl. delete()
+    honors their reference counters (`<file name>.refs`) whichever writer is used.
     """
 
+    verbose = 'uuid'
+    REFS_SUFFIX = '.refs'
+
     FOLDER_NAME = 'html_files'
     PATH_TO_FILES = Path(__file__).parent.parent.absolute().joinpath(FOLDER_NAME)
 
@@ -35,24 +43,70 @@ class HTMLFileWriter(BaseFileWriter):
             await writer(html)
         return str(path)
 
+    @classmethod
+    async def read(cls, file_name: Any) -> str:
+        """
+        Read HTML content from a file.
+        """
+        path = cls.build_file_path(file_name)
+        chunks = []
+        async with AIOFile(path, mode='r') as file:
+            async for chunk in Reader(file):
+                chunks.append(chunk)
+        return ''.join(chunks)
+
     @classmethod
     def delete(cls, file_name: Any):
         """
-        Delete the file by filename.
+        Release a reference to the file, and delete it if it was the last one.
         """
-        file_path = cls.build_file_path(file_name)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        path = cls.build_file_path(file_name)
+        if not path.exists():
+            return
+        refs = cls.references(file_name)
+        if refs > 1:
+            cls.set_references(path, refs - 1)
+        else:
+            os.remove(path)
 
     @classmethod
     def drop_all(cls):
         """
-        Delete all files in the folder, but not drop the folder itself.
+        Delete all files in the folder, with their reference counters, but not drop
+        the folder itself.
         """
         if cls.__is_folder_exists():
-            files = os.listdir(cls.PATH_TO_FILES)
-            for file in files:
-                cls.delete(file)
+            for file in os.listdir(cls.PATH_TO_FILES):
+                os.remove(cls.build_file_path(file))
+
+    @classmethod
+    def references(cls, file_name: Any) -> int:
+        """
+        Return the number of references to the file: a file without a counter has
+        one.
+        """
+        path = cls.build_file_path(file_name)
+        if not path.exists():
+            return 0
+        try:
+            return int(cls.__refs_path(path).read_text())
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    @classmethod
+    def set_references(cls, path: Path, refs: int):
+        """
+        Store the number of references to the file at :param path:. A single
+        reference is stored as no counter at all.
+        """
+        refs_path = cls.__refs_path(path)
+        if refs <= 1:
+            if refs_path.exists():
+                os.remove(refs_path)
+            return
+        temp_path = refs_path.with_name(f'{refs_path.name}.tmp')
+        temp_path.write_text(str(refs))
+        os.replace(temp_path, refs_path)
 
     @classmethod
     def __generate_file_name(cls, url: URL) -> str:
@@ -61,6 +115,10 @@ class HTMLFileWriter(BaseFileWriter):
         """
         return f'{url.host.replace(".", "_")}_{uuid.uuid4()}.html'
 
+    @classmethod
+    def __refs_path(cls, path: Path) -> Path:
+        return path.with_name(f'{path.name}{cls.REFS_SUFFIX}')
+
     @classmethod
     def __is_folder_exists(cls) -> bool:
         return os.path.exists(cls.PATH_TO_FILES)
@@ -0,0 +1,34 @@
+from typing import (
+    Dict,
+    Type,
+)
+
+from spider.controllers.core.types.abstract_types import AbstractEnumType
+from spider.file_storage.core import BaseFileWriter
+from spider.file_storage.implementations import (
+    ContentAddressedFileWriter,
+    HTMLFileWriter,
+)
+
+
+class FileStorages(AbstractEnumType):
+    """
+    How the HTML files are named: `uuid` gives every saved page a new file,
+    `content` names the files by the hash of the page, so identical pages share one.
+    """
+
+    UUID = HTMLFileWriter.verbose
+    CONTENT = ContentAddressedFileWriter.verbose
+
+
+FILE_WRITERS: Dict[str, Type[BaseFileWriter]] = {
+    FileStorages.UUID: HTMLFileWriter,
+    FileStorages.CONTENT: ContentAddressedFileWriter,
+}
+
+
+def get_file_writer(kind: str = FileStorages.UUID) -> Type[BaseFileWriter]:
+    """
+    Return the file writer of the :param kind:.
+    """
+    return FILE_WRITERS[kind]
@@ -54,6 +54,24 @@ class TestConfigController:
         assert config_controller.get_db_config('host') == db_credentials.db_host
         assert config_controller.get_db_config('name') == db_credentials.db_name
 
+    def test_get_http_config(self, config_controller):
+        assert config_controller.get_http_config('max_connections') is None
+        assert config_controller.get_http_flag('http2') is False
+        config_controller.set_config(ConfigSections.HTTP, 'max_connections', '50')
+        config_controller.set_config(ConfigSections.HTTP, 'http2', 'yes')
+        assert config_controller.get_http_config('max_connections') == '50'
+        assert config_controller.get_http_flag('http2') is True
+
+    def test_add_missing_sections(self, tmpdir):
+        config_file_path = f"{tmpdir}/old_config.ini"
+        with open(config_file_path, 'w') as config_file:
+            config_file.write('[DATABASE]\n[INFRASTRUCTURE]\n')
+        config_controller = ConfigController(config_file_path=config_file_path)
+        assert tuple(config_controller.config.sections()) == (
+            ConfigSections.DATABASE, ConfigSections.INFRASTRUCTURE, ConfigSections.HTTP
+        )
+        assert config_controller.get_http_config('read_timeout') is None
+
     def test_create_custom_path(self, tmpdir):
         ConfigController.DEFAULT_FILE_NAME = (
             f"{tmpdir}/{ConfigController.DEFAULT_FILE_NAME}"
@@ -1,5 +1,6 @@
 import pytest
 from pytest_postgresql import factories
+from sqlalchemy import text
 from yarl import URL
 
 from tests.utils import with_database_janitor
@@ -11,6 +12,10 @@ except ImportError:
     sys.path.append('../spider')
     from spider.controllers import DatabaseOperationsController
 
+from spider.db.core import (
+    IngestionModes,
+    PageRecord,
+)
 from spider.db.implementations import PostgresDatabase
 
 
@@ -146,3 +151,109 @@ class TestDatabaseOperationsController:
         )
         await controller3.get(url='https://example.com/', limit=5)
         assert '#1 https://example.com | Example Domain' in caplog.text
+
+    @pytest.mark.asyncio
+    @with_database_janitor
+    async def test_iter_urls(self, test_db, caplog):
+        controller = DatabaseOperationsController(
+            db_type='postgresql', host=f"{test_db.host}:{test_db.port}",
+            login=test_db.user, pwd=test_db.password,
+            db_name=test_db.dbname
+        )
+        await controller.run_action(action='create')
+        urls = [f'https://example.com/{page}' for page in range(3)]
+        for url in urls:
+            await controller.db.save(
+                key=URL(url), name='Example Domain', content='test',
+                parent='https://example.com/', silent=False, overwrite=False
+            )
+
+        batches = [batch async for batch in controller.db.iter_urls(batch_size=2)]
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert sorted(url for batch in batches for url in batch) == urls
+
+    @pytest.mark.asyncio
+    @with_database_janitor
+    async def test_create_table_adds_missing_columns(self, test_db, caplog):
+        controller = DatabaseOperationsController(
+            db_type='postgresql', host=f"{test_db.host}:{test_db.port}",
+            login=test_db.user, pwd=test_db.password,
+            db_name=test_db.dbname
+        )
+        db = controller.db
+        with db.engine(silent=True).begin() as conn:
+            conn.execute(text(
+                'CREATE TABLE url (id SERIAL PRIMARY KEY, url VARCHAR(600) NOT NULL '
+                'UNIQUE, title TEXT, parent TEXT NOT NULL, html TEXT)'
+            ))
+
+        await db.create_table(check_first=True, silent=True)
+        await db.create_table(check_first=True, silent=True)
+        await db.save(
+            URL('https://example.com/'), 'Example Domain', 'page', 'https://example.com/',
+            etag='"v1"',
+        )
+        validators = await db.get_validators(URL('https://example.com/'))
+        assert validators['etag'] == '"v1"'
+        assert validators['crawled_at'] is not None
+        await db.disconnect()
+
+    @pytest.mark.asyncio
+    @with_database_janitor
+    async def test_touch(self, test_db, caplog):
+        controller = DatabaseOperationsController(
+            db_type='postgresql', host=f"{test_db.host}:{test_db.port}",
+            login=test_db.user, pwd=test_db.password,
+            db_name=test_db.dbname
+        )
+        await controller.run_action(action='create')
+        db = controller.db
+        url = URL('https://example.com/')
+        await db.save(url, 'Example Domain', 'page', 'https://example.com/')
+        before = await db.get_validators(url)
+
+        await db.touch(url)
+        after = await db.get_validators(url)
+        assert after['crawled_at'] > before['crawled_at']
+        assert after['html'] == before['html']
+        assert (await db.get(parent='https://example.com/'))[0]['title'] == (
+            'Example Domain'
+        )
+        await db.disconnect()
+
+    @pytest.mark.asyncio
+    @with_database_janitor
+    async def test_copy_ingestion(self, test_db, caplog):
+        controller = DatabaseOperationsController(
+            db_type='postgresql', host=f"{test_db.host}:{test_db.port}",
+            login=test_db.user, pwd=test_db.password,
+            db_name=test_db.dbname
+        )
+        await controller.run_action(action='create')
+        db = controller.db
+        db.ingestion = IngestionModes.COPY
+        try:
+            await db.save_many([
+                PageRecord(
+                    URL(f'https://example.com/{page}'), 'Example Domain',
+                    f'first {page}', 'https://example.com/',
+                )
+                for page in range(3)
+            ])
+            await db.save_many([
+                PageRecord(
+                    URL('https://example.com/0'), 'Example Domain', 'second',
+                    'https://example.com/',
+                )
+            ])
+            assert await db.get(parent='https://example.com/', limit=5) == []
+
+            assert await db.merge() == 4
+            assert 'Merged 4 staged entries.' in caplog.text
+            assert len(await db.get(parent='https://example.com/', limit=5)) == 3
+            validators = await db.get_validators(URL('https://example.com/0'))
+            assert await db.file_controller.read(validators['html']) == 'second'
+            assert await db.merge() == 0
+        finally:
+            db.ingestion = IngestionModes.UPSERT
+            await db.disconnect()
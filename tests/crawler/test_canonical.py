@@ -0,0 +1,85 @@
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.canonical import (
+        TrailingSlash,
+        URLCanonicalizer,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.canonical import (
+        TrailingSlash,
+        URLCanonicalizer,
+    )
+
+
+class TestURLCanonicalizer:
+    @pytest.mark.parametrize('url, expected', [
+        ('HTTP://Example.COM:80/a/./b/../c#top', 'http://example.com/a/c'),
+        ('https://example.com:443', 'https://example.com/'),
+        ('https://example.com:8443/', 'https://example.com:8443/'),
+        (
+            'https://example.com/p?b=2&a=1&utm_source=x&fbclid=1',
+            'https://example.com/p?a=1&b=2',
+        ),
+        ('https://example.com/p?PHPSESSID=abc', 'https://example.com/p'),
+        ('https://example.com/p;jsessionid=ABC?page=2', 'https://example.com/p?page=2'),
+    ])
+    def test_canonicalize(self, url, expected):
+        assert URLCanonicalizer().canonicalize(URL(url)) == URL(expected)
+
+    def test_fragments_are_equivalent(self):
+        canonicalizer = URLCanonicalizer()
+        assert (
+            canonicalizer.canonicalize(URL('https://a.com/page#a'))
+            == canonicalizer.canonicalize(URL('https://a.com/page#b'))
+        )
+
+    def test_relative(self):
+        canonicalizer = URLCanonicalizer()
+        base = URL('https://a.com/blog/post/')
+        assert canonicalizer.canonicalize(URL('../other'), base) == URL(
+            'https://a.com/blog/other'
+        )
+        assert canonicalizer.canonicalize(URL('../other')) is None
+
+    @pytest.mark.parametrize(
+        'url', ['mailto:me@a.com', 'javascript:void(0)', 'ftp://a.com/']
+    )
+    def test_unsupported_schemes(self, url):
+        assert URLCanonicalizer().canonicalize(URL(url), URL('https://a.com/')) is None
+
+    def test_trailing_slash(self):
+        strip = URLCanonicalizer(trailing_slash=TrailingSlash.STRIP)
+        add = URLCanonicalizer(trailing_slash=TrailingSlash.ADD)
+        assert strip.canonicalize(URL('https://a.com/docs/')) == URL(
+            'https://a.com/docs'
+        )
+        assert add.canonicalize(URL('https://a.com/docs')) == URL('https://a.com/docs/')
+        assert add.canonicalize(URL('https://a.com/a.html')) == URL(
+            'https://a.com/a.html'
+        )
+        assert strip.canonicalize(URL('https://a.com/')) == URL('https://a.com/')
+
+    def test_query_rules(self):
+        canonicalizer = URLCanonicalizer(
+            allow_query=[r'[?&]page=\d+$'], deny_query=[r'/search'],
+            strip_params=['ref'],
+        )
+        assert canonicalizer.canonicalize(URL('https://a.com/list?page=2&ref=x')) == URL(
+            'https://a.com/list?page=2'
+        )
+        assert canonicalizer.canonicalize(URL('https://a.com/list?sort=asc')) is None
+        assert canonicalizer.canonicalize(URL('https://a.com/search?page=2')) is None
+        assert canonicalizer.canonicalize(URL('https://a.com/list')) == URL(
+            'https://a.com/list'
+        )
+
+    def test_no_queries(self):
+        canonicalizer = URLCanonicalizer(allow_queries=False)
+        assert canonicalizer.canonicalize(URL('https://a.com/?page=2')) is None
+        assert canonicalizer.canonicalize(URL('https://a.com/?utm_source=x')) == URL(
+            'https://a.com/'
+        )
@@ -0,0 +1,302 @@
+import asyncio
+import functools
+import os
+import signal
+
+import httpx
+import pytest
+from yarl import URL
+
+try:
+    from spider.controllers.core.context_managers import StopOnKeyboardInterrupt
+    from spider.crawler import Crawler
+    from spider.crawler.checkpoint import Checkpoint
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.controllers.core.context_managers import StopOnKeyboardInterrupt
+    from spider.crawler import Crawler
+    from spider.crawler.checkpoint import Checkpoint
+
+
+START_URL = 'https://example.com/'
+PAGES = {
+    '/': ''.join(f'<a href="/{page}">{page}</a>' for page in range(1, 6)),
+    **{f'/{page}': '<a href="/">home</a>' for page in range(1, 6)},
+}
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    """
+    Response body of :param chunks: chunks of :param chunk_size: bytes, that counts
+    how many of them were read.
+    """
+
+    def __init__(self, chunks: int, chunk_size: int = 500):
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.read = 0
+
+    async def __aiter__(self):
+        for _ in range(self.chunks):
+            self.read += 1
+            yield b'a' * self.chunk_size
+
+
+def make_site(requests, pages=None, on_request=None, delay: float = 0):
+    """
+    Serve :param pages: (path to body) as HTML, and record the requested paths.
+    :param on_request: may return its own response for a request.
+    """
+    pages = PAGES if pages is None else pages
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if delay:
+            await asyncio.sleep(delay)
+        if on_request:
+            response = on_request(request)
+            if response is not None:
+                return response
+        if request.url.path not in pages:
+            return httpx.Response(404, headers={'content-type': 'text/html'})
+        return httpx.Response(
+            200, headers={'content-type': 'text/html'},
+            text=f'<html><head><title>{request.url.path}</title></head>'
+                 f'<body>{pages[request.url.path]}</body></html>',
+        )
+    return httpx.MockTransport(handler)
+
+
+def make_crawler(database, transport, depth: int = 1, **kwargs) -> Crawler:
+    """
+    Crawler of START_URL that requests the pages through :param transport:.
+    """
+    kwargs = {
+        'silent': True, 'should_log_time': False, 'respect_robots': False,
+        'dns_cache': False, 'conditional_requests': False, 'flush_interval': 0.01,
+        'concurrency_limit': 1, 'host_concurrency_limit': 1, **kwargs,
+    }
+    crawler = Crawler(database, START_URL, depth, **kwargs)
+    crawler.client = httpx.AsyncClient(transport=transport)
+    return crawler
+
+
+class TestCheckpoint:
+    @pytest.mark.asyncio
+    async def test_interrupted_crawl_is_resumed(self, memory_database, tmp_path):
+        checkpoint_path = str(tmp_path / 'crawl.checkpoint')
+
+        def interrupt(request: httpx.Request):
+            if request.url.path == '/2':
+                os.kill(os.getpid(), signal.SIGINT)
+
+        first_requests = []
+        crawler = make_crawler(
+            memory_database, make_site(first_requests, on_request=interrupt),
+            checkpoint_path=checkpoint_path,
+        )
+        with StopOnKeyboardInterrupt(
+            functools.partial(crawler.stop, 'interrupted by the user')
+        ):
+            await crawler.crawl()
+
+        assert crawler.stop_reason == 'interrupted by the user'
+        assert os.path.exists(checkpoint_path)
+        assert first_requests[:3] == ['/', '/1', '/2']
+        assert len(first_requests) < len(PAGES)
+
+        second_requests = []
+        resumed = make_crawler(
+            memory_database, make_site(second_requests), resume_path=checkpoint_path,
+        )
+        await resumed.crawl()
+
+        assert resumed.stop_reason is None
+        assert sorted(first_requests + second_requests) == sorted(PAGES)
+        assert sorted(memory_database.rows) == sorted(
+            f'https://example.com{path}' for path in PAGES
+        )
+        assert not os.path.exists(checkpoint_path)
+
+
+    @pytest.mark.asyncio
+    async def test_unsaved_pages_are_checkpointed(self, memory_database, tmp_path):
+        checkpoint_path = str(tmp_path / 'crawl.checkpoint')
+        saving = asyncio.Event()
+        upsert = memory_database.upsert
+
+        async def blocked_upsert(record, overwrite, silent=False):
+            await saving.wait()
+            return await upsert(record, overwrite, silent)
+
+        memory_database.upsert = blocked_upsert
+        requests = []
+        crawler = make_crawler(
+            memory_database, make_site(requests, delay=0.2),
+            checkpoint_path=checkpoint_path, checkpoint_interval=0.02,
+        )
+        crawl = asyncio.ensure_future(crawler.crawl())
+        while '/5' not in requests:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        # /5 is in flight, the other pages wait in the write queue
+        state = Checkpoint(checkpoint_path).load()
+        assert sorted(str(url) for url, _ in state['frontier']) == sorted(
+            f'https://example.com{path}' for path in PAGES
+        )
+        assert {level for _, level in state['frontier']} == {1}
+
+        saving.set()
+        await crawl
+        assert len(memory_database.rows) == len(PAGES)
+        assert not os.path.exists(checkpoint_path)
+
+
+class TestDownload:
+    @pytest.mark.asyncio
+    async def test_non_html_response_is_not_downloaded(self, memory_database):
+        pdf = ChunkedStream(3)
+
+        def serve_pdf(request: httpx.Request):
+            if request.url.path == '/1':
+                return httpx.Response(
+                    200, headers={'content-type': 'application/pdf'}, stream=pdf
+                )
+
+        requests = []
+        crawler = make_crawler(
+            memory_database, make_site(requests, on_request=serve_pdf)
+        )
+        await crawler.crawl()
+
+        assert '/1' in requests
+        assert pdf.read == 0
+        assert crawler.skipped_pages_counter == 1
+        assert 'https://example.com/1' not in memory_database.rows
+        assert len(memory_database.rows) == len(PAGES) - 1
+
+    @pytest.mark.asyncio
+    async def test_max_page_bytes(self, memory_database):
+        chunked = ChunkedStream(10)
+
+        def serve_big_pages(request: httpx.Request):
+            if request.url.path == '/1':
+                return httpx.Response(
+                    200, headers={'content-type': 'text/html'}, stream=chunked
+                )
+            if request.url.path == '/2':
+                return httpx.Response(
+                    200, headers={'content-type': 'text/html'}, content=b'a' * 5000
+                )
+
+        crawler = make_crawler(
+            memory_database, make_site([], on_request=serve_big_pages),
+            max_page_bytes=1000,
+        )
+        await crawler.crawl()
+
+        # the body without Content-Length is cut off as soon as it exceeds the limit
+        assert chunked.read == 3
+        assert crawler.skipped_pages_counter == 2
+        assert 'https://example.com/1' not in memory_database.rows
+        assert 'https://example.com/2' not in memory_database.rows
+        assert len(memory_database.rows) == len(PAGES) - 2
+
+
+class TestConditionalRequests:
+    @pytest.mark.asyncio
+    async def test_not_modified_page_is_not_stored_again(self, memory_database):
+        for path in ('/', '/1'):
+            await memory_database.save(
+                URL(f'https://example.com{path}'), 'stored', PAGES[path],
+                START_URL, etag='"v1"',
+            )
+        stored = {url: dict(row) for url, row in memory_database.rows.items()}
+        writes = memory_database.file_writes_counter
+
+        def not_modified(request: httpx.Request):
+            if request.headers.get('if-none-match') == '"v1"':
+                return httpx.Response(304)
+
+        requests = []
+        crawler = make_crawler(
+            memory_database, make_site(requests, on_request=not_modified),
+            conditional_requests=True,
+        )
+        await crawler.crawl()
+
+        # the links of the start page are read from its stored file
+        assert sorted(requests) == sorted(PAGES)
+        assert crawler.not_modified_counter == 2
+        assert crawler.successful_crawls_counter == len(PAGES) - 2
+        assert memory_database.file_writes_counter == writes + len(PAGES) - 2
+        # only the crawl time of the not modified pages is updated
+        for url, row in stored.items():
+            assert memory_database.rows[url].pop('crawled_at') > row.pop('crawled_at')
+            assert memory_database.rows[url] == row
+
+
+class TestSitemap:
+    @pytest.mark.asyncio
+    async def test_unchanged_pages_are_skipped(self, memory_database, monkeypatch):
+        monkeypatch.setattr(Crawler, 'SITEMAP_BATCH_SIZE', 2)
+        for page in range(1, 4):
+            await memory_database.save(
+                URL(f'https://example.com/{page}'), 'stored', PAGES[f'/{page}'],
+                START_URL,
+            )
+        urls = ''.join(
+            f'<url><loc>https://example.com/{page}</loc>'
+            f'<lastmod>{"2000-01-01" if page % 2 else "2999-01-01"}</lastmod></url>'
+            for page in range(1, 6)
+        )
+
+        def serve_sitemap(request: httpx.Request):
+            if request.url.path == '/sitemap.xml':
+                return httpx.Response(200, text=f'<urlset>{urls}</urlset>')
+
+        requests = []
+        crawler = make_crawler(
+            memory_database, make_site(requests, on_request=serve_sitemap), depth=0,
+            sitemap=True,
+        )
+        await crawler.crawl()
+
+        # /1 and /3 were crawled after their lastmod, /5 was never crawled
+        assert crawler.sitemap_unchanged_counter == 2
+        assert crawler.sitemap_urls_counter == 3
+        assert sorted(requests) == ['/', '/2', '/4', '/5', '/sitemap.xml']
+        assert memory_database.crawl_time_queries == 3
+
+
+class TestBudgets:
+    @pytest.mark.asyncio
+    async def test_max_pages(self, memory_database):
+        requests = []
+        crawler = make_crawler(
+            memory_database, make_site(requests), max_pages=2,
+            batch_size=100, flush_interval=60,
+        )
+        await crawler.crawl()
+
+        assert crawler.stop_reason == '2 pages are stored'
+        assert requests == ['/', '/1']
+        # the partial batch is flushed when the crawl stops
+        assert len(memory_database.rows) == 2
+        assert crawler.writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_max_duration(self, memory_database):
+        requests = []
+        crawler = make_crawler(
+            memory_database, make_site(requests, delay=0.1), max_duration=0.25,
+            batch_size=100, flush_interval=60,
+        )
+        await crawler.crawl()
+
+        assert crawler.stop_reason == '0.25s have passed'
+        assert 0 < crawler.successful_crawls_counter < len(PAGES)
+        assert len(memory_database.rows) == crawler.successful_crawls_counter
+        assert crawler.writer.pending == 0
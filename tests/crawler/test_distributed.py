@@ -0,0 +1,71 @@
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.distributed import RedisFrontier
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.distributed import RedisFrontier
+
+
+def urls(*pages):
+    return [(URL(f'https://a.com/{page}'), 1) for page in pages]
+
+
+class TestRedisFrontier:
+    @pytest.mark.asyncio
+    async def test_add(self, fake_redis):
+        frontier = RedisFrontier(fake_redis, 'job')
+        assert await frontier.add(urls(0, 1, 2)) == 3
+        assert await frontier.add(urls(1, 2, 3)) == 1
+
+        other_node = RedisFrontier(fake_redis, 'job')
+        assert await other_node.add(urls(3)) == 0
+        assert await RedisFrontier(fake_redis, 'other-job').add(urls(3)) == 1
+
+    @pytest.mark.asyncio
+    async def test_lease_and_ack(self, fake_redis):
+        frontier = RedisFrontier(fake_redis, 'job')
+        await frontier.add(urls(0, 1, 2))
+
+        lease = await frontier.lease(2)
+        assert lease.items == urls(0, 1)
+        last = await frontier.lease(2)
+        assert last.items == urls(2)
+        assert await frontier.lease(2) is None
+        assert not await frontier.is_drained()
+
+        await frontier.ack(lease.id)
+        await frontier.ack(last.id)
+        assert await frontier.is_drained()
+
+    @pytest.mark.asyncio
+    async def test_requeue_expired(self, fake_redis):
+        frontier = RedisFrontier(fake_redis, 'job', lease_ttl=10)
+        await frontier.add(urls(0, 1, 2))
+        dead = await frontier.lease(2)
+        alive = await frontier.lease(2)
+
+        fake_redis.now += 8
+        await frontier.extend([alive.id])
+        assert await frontier.requeue_expired() == 0
+
+        fake_redis.now += 5
+        assert await frontier.requeue_expired() == 2
+        lease = await frontier.lease(5)
+        assert sorted(lease.items) == sorted(dead.items)
+
+        await frontier.ack(lease.id)
+        await frontier.ack(alive.id)
+        assert await frontier.is_drained()
+
+    @pytest.mark.asyncio
+    async def test_release(self, fake_redis):
+        frontier = RedisFrontier(fake_redis, 'job')
+        await frontier.add(urls(0, 1))
+        lease = await frontier.lease(5)
+
+        assert await frontier.release(lease.id) == 2
+        assert await fake_redis.zcard(frontier.leases_key) == 0
+        assert len((await frontier.lease(5)).items) == 2
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+try:
+    from spider.crawler.dns_cache import (
+        DNSCache,
+        DNSCachingTransport,
+        StaticResolver,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.dns_cache import (
+        DNSCache,
+        DNSCachingTransport,
+        StaticResolver,
+    )
+
+
+async def serve_ok(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    await reader.readuntil(b'\r\n\r\n')
+    writer.write(
+        b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok'
+    )
+    await writer.drain()
+    writer.close()
+
+
+class TestDNSCache:
+    @pytest.mark.asyncio
+    async def test_hits_and_misses(self):
+        resolver = StaticResolver({'a.test': ['10.0.0.1']})
+        cache = DNSCache(resolver)
+
+        assert await cache.resolve('a.test') == ['10.0.0.1']
+        assert await cache.resolve('a.test') == ['10.0.0.1']
+        assert await cache.resolve('127.0.0.1') == ['127.0.0.1']
+        assert resolver.lookups_counter == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_rate == 0.5
+
+    @pytest.mark.asyncio
+    async def test_ttl(self):
+        resolver = StaticResolver({'a.test': ['10.0.0.1']}, ttl=0)
+        cache = DNSCache(resolver)
+
+        await cache.resolve('a.test')
+        await cache.resolve('a.test')
+        assert resolver.lookups_counter == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_and_prefetch(self):
+        resolver = StaticResolver({'a.test': ['10.0.0.1'], 'b.test': ['10.0.0.2']})
+        cache = DNSCache(resolver)
+
+        await asyncio.gather(*(cache.resolve('a.test') for _ in range(10)))
+        cache.prefetch('b.test')
+        cache.prefetch('b.test')
+        await asyncio.sleep(0)
+        assert await cache.resolve('b.test') == ['10.0.0.2']
+        assert resolver.lookups_counter == 2
+        assert cache.prefetched == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_host(self):
+        resolver = StaticResolver({})
+        cache = DNSCache(resolver)
+
+        for _ in range(2):
+            with pytest.raises(OSError):
+                await cache.resolve('missing.test')
+        assert resolver.lookups_counter == 1
+
+    @pytest.mark.asyncio
+    async def test_transport(self):
+        server = await asyncio.start_server(serve_ok, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        resolver = StaticResolver({'site.test': ['127.0.0.1']})
+        cache = DNSCache(resolver)
+
+        transport = DNSCachingTransport(cache)
+        async with server, httpx.AsyncClient(transport=transport) as client:
+            for _ in range(2):
+                response = await client.get(f'http://site.test:{port}/')
+                assert response.text == 'ok'
+            with pytest.raises(httpx.ConnectError):
+                await client.get(f'http://missing.test:{port}/')
+
+        assert resolver.lookups_counter == 2
+        assert cache.hits == 1
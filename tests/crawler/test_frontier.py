@@ -0,0 +1,263 @@
+import asyncio
+import time
+
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.frontier import (
+        AIMDLimiter,
+        Frontier,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.frontier import (
+        AIMDLimiter,
+        Frontier,
+    )
+
+
+class TestAIMDLimiter:
+    def test_additive_increase(self):
+        limiter = AIMDLimiter(2, maximum=4)
+        for _ in range(2):
+            limiter.record_success(0.1, in_flight=2)
+        assert limiter.value == 2
+        limiter.record_success(0.1, in_flight=2)
+        assert limiter.value == 3
+
+        limiter.record_success(0.1, in_flight=1)
+        assert limiter.value == 3
+        for _ in range(10):
+            limiter.record_success(0.1, in_flight=4)
+        assert limiter.value == 4
+
+    def test_unhealthy_latency(self):
+        limiter = AIMDLimiter(2, latency_tolerance=2.0)
+        limiter.record_success(0.1, in_flight=2)
+        for _ in range(10):
+            limiter.record_success(1.0, in_flight=2)
+        assert not limiter.is_healthy()
+        assert limiter.value == 2
+
+    def test_multiplicative_decrease(self):
+        limiter = AIMDLimiter(8, backoff=0.5)
+        limiter.record_success(1.0, in_flight=1)
+        limiter.record_failure(now=10.0)
+        limiter.record_failure(now=10.5)
+        assert limiter.value == 4
+        assert limiter.decreases == 1
+
+        for now in (11.0, 12.0, 13.0):
+            limiter.record_failure(now)
+        assert limiter.value == 1
+
+
+class TestFrontier:
+    @pytest.mark.asyncio
+    async def test_interleave_hosts(self):
+        frontier = Frontier(host_concurrency_limit=5)
+        for page in range(3):
+            frontier.put(URL(f'https://a.com/{page}'), 1)
+        frontier.put(URL('https://b.com/0'), 1)
+        assert frontier.queued == 4
+        assert frontier.hosts == 2
+
+        hosts = [(await frontier.get())[0].host for _ in range(3)]
+        assert hosts == ['a.com', 'b.com', 'a.com']
+        assert frontier.queued == 1
+        assert frontier.in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_host_concurrency_limit(self):
+        frontier = Frontier(host_concurrency_limit=1)
+        frontier.put(URL('https://a.com/0'), 0)
+        frontier.put(URL('https://a.com/1'), 0)
+
+        url, level = await frontier.get()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(frontier.get(), timeout=0.05)
+
+        frontier.task_done(url)
+        url, level = await asyncio.wait_for(frontier.get(), timeout=0.05)
+        assert url == URL('https://a.com/1')
+
+    @pytest.mark.asyncio
+    async def test_host_rate_limit(self):
+        frontier = Frontier(host_concurrency_limit=5, host_rate_limit=10)
+        for page in range(3):
+            frontier.put(URL(f'https://a.com/{page}'), 0)
+
+        start = time.monotonic()
+        for _ in range(3):
+            await frontier.get()
+        assert time.monotonic() - start >= 0.18
+
+    @pytest.mark.asyncio
+    async def test_join(self):
+        frontier = Frontier()
+        await asyncio.wait_for(frontier.join(), timeout=0.05)
+
+        frontier.put(URL('https://a.com/'), 0)
+        url, level = await frontier.get()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(frontier.join(), timeout=0.05)
+
+        frontier.task_done(url)
+        await asyncio.wait_for(frontier.join(), timeout=0.05)
+        assert frontier.hosts == 0
+
+    @pytest.mark.asyncio
+    async def test_level_synchronous(self):
+        frontier = Frontier(host_concurrency_limit=5, level_synchronous=True)
+        frontier.put(URL('https://a.com/'), 0)
+        frontier.put(URL('https://a.com/deep'), 1)
+        assert frontier.queued == 2
+
+        url, level = await frontier.get()
+        assert level == 0
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(frontier.get(), timeout=0.05)
+        frontier.put(URL('https://b.com/'), 1)
+        assert len(frontier.pending()) == 3
+
+        frontier.task_done(url)
+        assert frontier.level == 1
+        levels = [(await frontier.get())[1] for _ in range(2)]
+        assert levels == [1, 1]
+
+    @pytest.mark.asyncio
+    async def test_retry(self):
+        frontier = Frontier(host_concurrency_limit=5)
+        frontier.put(URL('https://a.com/0'), 0)
+        frontier.put(URL('https://b.com/0'), 0)
+
+        url, level = await frontier.get()
+        frontier.retry(url, level, delay=0.1)
+        frontier.task_done(url)
+        assert frontier.queued == 2
+
+        url, level = await frontier.get()
+        assert url == URL('https://b.com/0')
+        frontier.task_done(url)
+
+        start = time.monotonic()
+        url, level = await asyncio.wait_for(frontier.get(), timeout=1)
+        assert url == URL('https://a.com/0')
+        assert time.monotonic() - start >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_circuit_breaker(self):
+        frontier = Frontier(breaker_threshold=2, breaker_cooldown=0.1)
+        frontier.put(URL('https://a.com/0'), 0)
+        frontier.put(URL('https://a.com/1'), 0)
+
+        url, level = await frontier.get()
+        assert not frontier.record_failure(url)
+        assert frontier.record_failure(url)
+        frontier.task_done(url)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(frontier.get(), timeout=0.05)
+
+        url, level = await asyncio.wait_for(frontier.get(), timeout=1)
+        assert url == URL('https://a.com/1')
+        frontier.record_success(url)
+        assert not frontier.record_failure(url)
+
+    @pytest.mark.asyncio
+    async def test_idle_hosts_are_dropped(self):
+        frontier = Frontier(host_concurrency_limit=5)
+        for host in range(100):
+            frontier.put(URL(f'https://{host}.com/'), 0)
+        assert frontier.tracked_hosts == 100
+
+        for _ in range(100):
+            url, level = await frontier.get()
+            frontier.task_done(url)
+        assert frontier.hosts == 0
+        assert frontier.tracked_hosts == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_host_is_kept_until_it_recovers(self):
+        frontier = Frontier(
+            host_concurrency_limit=5, breaker_threshold=1, breaker_cooldown=0.1
+        )
+        frontier.put(URL('https://a.com/'), 0)
+        frontier.put(URL('https://b.com/'), 0)
+        frontier.set_host_rate('b.com', 10)
+
+        url, level = await frontier.get()
+        assert frontier.record_failure(url)
+        frontier.task_done(url)
+        url, level = await frontier.get()
+        frontier.task_done(url)
+        # a.com is parked by its breaker, b.com has no token left
+        assert frontier.hosts == 0
+        assert frontier.tracked_hosts == 2
+
+        await asyncio.sleep(0.15)
+        frontier.put(URL('https://c.com/'), 0)
+        url, level = await frontier.get()
+        frontier.task_done(url)
+        assert frontier.tracked_hosts == 0
+
+    @pytest.mark.asyncio
+    async def test_held_host_keeps_its_rate(self):
+        frontier = Frontier(host_concurrency_limit=5, level_synchronous=True)
+        frontier.put(URL('https://a.com/'), 0)
+        frontier.put(URL('https://b.com/'), 0)
+        frontier.put(URL('https://a.com/deep'), 1)
+        frontier.set_host_rate('a.com', 10)
+
+        for _ in range(2):
+            url, level = await frontier.get()
+            await asyncio.sleep(0.11)
+            frontier.task_done(url)
+        assert frontier.level == 1
+
+        start = time.monotonic()
+        url, level = await frontier.get()
+        assert url == URL('https://a.com/deep')
+        assert time.monotonic() - start < 0.05
+        frontier.task_done(url)
+        frontier.put(URL('https://a.com/deeper'), 1)
+        await frontier.get()
+        assert time.monotonic() - start >= 0.08
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        frontier = Frontier(host_concurrency_limit=1)
+        frontier.put(URL('https://a.com/0'), 0)
+        frontier.put(URL('https://a.com/1'), 0)
+
+        url, level = await frontier.get()
+        waiting = asyncio.ensure_future(frontier.get())
+        await asyncio.sleep(0.01)
+        frontier.close()
+        assert await asyncio.wait_for(waiting, timeout=1) is None
+        await asyncio.wait_for(frontier.join(), timeout=1)
+
+        frontier.task_done(url)
+        assert frontier.pending() == [(URL('https://a.com/1'), 0)]
+
+    @pytest.mark.asyncio
+    async def test_adaptive_concurrency_limit(self):
+        frontier = Frontier(
+            host_concurrency_limit=5, adaptive=True, concurrency_limit=2,
+            max_concurrency_limit=4,
+        )
+        for page in range(4):
+            frontier.put(URL(f'https://a.com/{page}'), 0)
+        first, _ = await frontier.get()
+        second, _ = await frontier.get()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(frontier.get(), timeout=0.05)
+
+        for url in (first, second, first):
+            frontier.record_success(url, 0.01)
+        assert frontier.concurrency_limit == 3
+        await asyncio.wait_for(frontier.get(), timeout=0.05)
+
+        frontier.record_failure(first)
+        assert frontier.concurrency_limit == 1
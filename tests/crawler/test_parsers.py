@@ -0,0 +1,68 @@
+import pytest
+
+try:
+    from spider.crawler.parsing import (
+        parse_html,
+        ParserEngines,
+        ParserExecutors,
+        ParserPool,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.parsing import (
+        parse_html,
+        ParserEngines,
+        ParserExecutors,
+        ParserPool,
+    )
+
+from spider.crawler.parsers import (
+    LxmlParser,
+    SoupParser,
+)
+
+
+PAGE = (
+    '<html><head><title>\n  Example &amp; Co  </title></head><body>'
+    '<a href="/first">First</a><a name="anchor">No href</a>'
+    '<div><A HREF="https://example.com/second">Second</A></div>'
+    '<svg><title>Icon</title></svg></body></html>'
+)
+
+
+class TestParsers:
+    @pytest.mark.parametrize('parser', [LxmlParser, SoupParser])
+    def test_parse(self, parser):
+        title, hrefs = parser.parse(PAGE)
+        assert title == 'Example & Co'
+        assert hrefs == ['/first', 'https://example.com/second']
+
+    @pytest.mark.parametrize('parser', [LxmlParser, SoupParser])
+    def test_parse_without_title(self, parser):
+        assert parser.parse('<p>text</p>') == (None, [])
+
+    def test_parse_html(self):
+        title, hrefs, started_at, finished_at = parse_html(PAGE, 'lxml')
+        assert title == 'Example & Co'
+        assert len(hrefs) == 2
+        assert finished_at >= started_at
+
+
+class TestParserPool:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('executor', ParserExecutors.all())
+    @pytest.mark.parametrize('engine', ParserEngines.all())
+    async def test_parse(self, executor, engine):
+        pool = ParserPool(executor, workers=2, engine=engine)
+        try:
+            results = [await pool.parse(PAGE) for _ in range(3)]
+        finally:
+            pool.shutdown()
+
+        assert results == [('Example & Co', ['/first', 'https://example.com/second'])] * 3
+        assert pool.parsed_counter == 3
+        assert pool.total_parse_time > 0
+        # the clock is shared by the processes, so the wait is never negative
+        assert pool.total_wait_time >= 0
+        assert f'parsed 3 pages with {engine} by 2 {executor} workers' in pool.summary()
@@ -0,0 +1,42 @@
+from email.utils import format_datetime
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+try:
+    from spider.crawler.retry import RetryPolicy
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.retry import RetryPolicy
+
+
+class TestRetryPolicy:
+    def test_should_retry(self):
+        policy = RetryPolicy(retries=2)
+        assert policy.should_retry(1)
+        assert policy.should_retry(2)
+        assert not policy.should_retry(3)
+
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=1, max_delay=3)
+        for attempt, limit in ((1, 1), (2, 2), (3, 3), (10, 3)):
+            delays = [policy.delay(attempt) for _ in range(50)]
+            assert all(0 <= delay <= limit for delay in delays)
+            assert len(set(delays)) > 1
+
+    def test_retry_after_seconds(self):
+        policy = RetryPolicy()
+        assert policy.delay(1, '7') == 7
+        assert policy.delay(1, '100000') == RetryPolicy.MAX_RETRY_AFTER
+
+    def test_retry_after_date(self):
+        date = datetime.now(timezone.utc) + timedelta(seconds=30)
+        delay = RetryPolicy().delay(1, format_datetime(date, usegmt=True))
+        assert 25 < delay <= 30
+
+    def test_invalid_retry_after(self):
+        assert RetryPolicy.parse_retry_after('soon') is None
+        assert RetryPolicy.parse_retry_after(None) is None
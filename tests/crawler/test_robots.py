@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.robots import RobotsCache
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.robots import RobotsCache
+
+
+ROBOTS_TXT = '''
+User-agent: *
+Disallow: /private/
+Crawl-delay: 2
+'''
+
+
+def make_client(responses, calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host)
+        status, text = responses[request.url.host]
+        return httpx.Response(status, text=text)
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestRobotsCache:
+    @pytest.mark.asyncio
+    async def test_rules(self):
+        calls = []
+        robots = RobotsCache(make_client({'a.com': (200, ROBOTS_TXT)}, calls))
+
+        assert await robots.allowed(URL('https://a.com/public/'))
+        assert not await robots.allowed(URL('https://a.com/private/page'))
+        assert await robots.crawl_delay(URL('https://a.com/')) == 2
+        assert robots.disallowed_counter == 1
+
+    @pytest.mark.asyncio
+    async def test_fetched_once_per_host(self):
+        calls = []
+        robots = RobotsCache(make_client({'a.com': (200, ROBOTS_TXT)}, calls))
+
+        await asyncio.gather(*(
+            robots.allowed(URL(f'https://a.com/{page}')) for page in range(10)
+        ))
+        await robots.allowed(URL('https://a.com/another'))
+        assert calls == ['a.com']
+
+    @pytest.mark.asyncio
+    async def test_ttl(self):
+        calls = []
+        robots = RobotsCache(make_client({'a.com': (200, ROBOTS_TXT)}, calls), ttl=0)
+
+        await robots.allowed(URL('https://a.com/'))
+        await robots.allowed(URL('https://a.com/'))
+        assert calls == ['a.com', 'a.com']
+
+    @pytest.mark.asyncio
+    async def test_unavailable_and_unreachable(self):
+        calls = []
+        robots = RobotsCache(
+            make_client({'a.com': (404, ''), 'b.com': (503, '')}, calls)
+        )
+
+        assert await robots.allowed(URL('https://a.com/private/'))
+        assert await robots.crawl_delay(URL('https://a.com/')) is None
+        assert not await robots.allowed(URL('https://b.com/'))
+
+    @pytest.mark.asyncio
+    async def test_redirects(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            hops = {
+                '/robots.txt': '/moved/robots.txt',
+                '/moved/robots.txt': 'https://b.com/robots.txt',
+            }
+            if request.url.host == 'a.com' and request.url.path in hops:
+                return httpx.Response(
+                    301, headers={'Location': hops[request.url.path]}
+                )
+            if request.url.host == 'b.com':
+                return httpx.Response(200, text=ROBOTS_TXT)
+            return httpx.Response(302, headers={'Location': '/loop'})
+
+        robots = RobotsCache(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        assert not await robots.allowed(URL('https://a.com/private/page'))
+        assert await robots.crawl_delay(URL('https://a.com/')) == 2
+        # more than five redirects: robots.txt is unavailable, everything is allowed
+        assert await robots.allowed(URL('https://c.com/private/page'))
+
+    @pytest.mark.asyncio
+    async def test_prefetch_fetches_hosts_concurrently(self):
+        in_flight, most_in_flight = 0, 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, most_in_flight
+            in_flight += 1
+            most_in_flight = max(most_in_flight, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return httpx.Response(200, text=ROBOTS_TXT)
+
+        robots = RobotsCache(
+            httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            concurrency_limit=3,
+        )
+        await robots.prefetch(
+            URL(f'https://host-{host}.com/page-{page}')
+            for host in range(6) for page in range(3)
+        )
+        assert robots.fetched_counter == 6
+        assert most_in_flight == 3
+        await robots.prefetch([URL('https://host-0.com/other')])
+        assert robots.fetched_counter == 6
@@ -0,0 +1,70 @@
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.scope import (
+        CrawlScope,
+        registrable_domain,
+        Scopes,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.scope import (
+        CrawlScope,
+        registrable_domain,
+        Scopes,
+    )
+
+
+START_URL = URL('https://www.example.co.uk/')
+
+
+class TestCrawlScope:
+    @pytest.mark.parametrize('host, expected', [
+        ('example.com', 'example.com'),
+        ('www.news.example.com', 'example.com'),
+        ('www.example.co.uk', 'example.co.uk'),
+        ('shop.example.com.au', 'example.com.au'),
+        ('www.example.co', 'example.co'),
+        ('localhost', 'localhost'),
+    ])
+    def test_registrable_domain(self, host, expected):
+        assert registrable_domain(host) == expected
+
+    @pytest.mark.parametrize('scope, url, expected', [
+        (Scopes.ANY, 'https://other.org/', True),
+        (Scopes.HOST, 'http://WWW.example.co.uk/a', True),
+        (Scopes.HOST, 'https://news.example.co.uk/', False),
+        (Scopes.DOMAIN, 'https://news.example.co.uk/', True),
+        (Scopes.DOMAIN, 'https://example.co.uk/', True),
+        (Scopes.DOMAIN, 'https://other.co.uk/', False),
+    ])
+    def test_scope(self, scope, url, expected):
+        assert CrawlScope(START_URL, scope).allows(URL(url)) is expected
+
+    @pytest.mark.parametrize('scope, url, expected', [
+        (Scopes.ANY, 'https://cdn.example.net/', True),
+        (Scopes.ANY, 'https://example.net/', True),
+        (Scopes.ANY, 'https://notexample.net/', False),
+        (Scopes.ANY, 'https://www.example.co.uk/', False),
+        (Scopes.HOST, 'https://www.example.co.uk/', True),
+        (Scopes.HOST, 'https://cdn.example.net/', True),
+        (Scopes.HOST, 'https://other.org/', False),
+    ])
+    def test_allowed_domains(self, scope, url, expected):
+        crawl_scope = CrawlScope(START_URL, scope, allowed_domains=['Example.net'])
+        assert crawl_scope.allows(URL(url)) is expected
+
+    @pytest.mark.parametrize('url, expected', [
+        ('https://www.example.co.uk/news/1', True),
+        ('https://www.example.co.uk/sport/1', True),
+        ('https://www.example.co.uk/news/1.pdf', False),
+        ('https://www.example.co.uk/weather/', False),
+    ])
+    def test_include_exclude(self, url, expected):
+        crawl_scope = CrawlScope(
+            START_URL, include=[r'/news/', r'/sport/'], exclude=[r'\.pdf$', r'\?'],
+        )
+        assert crawl_scope.include.pattern == '(?:/news/)|(?:/sport/)'
+        assert crawl_scope.allows(URL(url)) is expected
@@ -0,0 +1,73 @@
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.checkpoint import Checkpoint
+    from spider.crawler.seen import (
+        BloomSeenSet,
+        ExactSeenSet,
+        load_seen_set,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.checkpoint import Checkpoint
+    from spider.crawler.seen import (
+        BloomSeenSet,
+        ExactSeenSet,
+        load_seen_set,
+    )
+
+
+def make_urls(count: int, prefix: str = 'page'):
+    return [URL(f'https://a.com/{prefix}/{number}') for number in range(count)]
+
+
+class TestSeenSets:
+    @pytest.mark.parametrize('seen', [ExactSeenSet(16), BloomSeenSet(16)])
+    def test_add(self, seen):
+        urls = make_urls(5000)
+        added = sum(seen.add(url) for url in urls)
+        assert added >= len(urls) * 0.99
+        assert not any(seen.add(url) for url in urls)
+        assert all(url in seen for url in urls)
+        assert len(seen) == added
+
+    def test_exact_has_no_false_positives(self):
+        seen = ExactSeenSet()
+        assert all(seen.add(url) for url in make_urls(5000))
+        assert not any(url in seen for url in make_urls(5000, 'other'))
+        assert seen.memory_bytes / len(seen) <= 8 / ExactSeenSet.MAX_LOAD * 2
+
+    def test_bloom_error_rate(self):
+        seen = BloomSeenSet(1000, error_rate=0.01)
+        for url in make_urls(10000):
+            seen.add(url)
+        false_positives = sum(url in seen for url in make_urls(10000, 'other'))
+        assert false_positives / 10000 < 0.01
+        assert len(seen.filters) > 1
+        assert seen.memory_bytes < ExactSeenSet(10000).memory_bytes
+
+    @pytest.mark.parametrize('seen', [ExactSeenSet(), BloomSeenSet(100)])
+    def test_dump_and_load(self, seen):
+        urls = make_urls(300)
+        for url in urls:
+            seen.add(url)
+        restored = load_seen_set(seen.dump())
+        assert type(restored) is type(seen)
+        assert len(restored) == len(seen)
+        assert all(url in restored for url in urls)
+
+    @pytest.mark.asyncio
+    async def test_checkpoint(self, tmp_path):
+        seen = ExactSeenSet()
+        for url in make_urls(10):
+            seen.add(url)
+        checkpoint = Checkpoint(str(tmp_path / 'state.json.gz'))
+        await checkpoint.save(
+            URL('https://a.com/'), 2, [(URL('https://b.com/'), 1)], seen
+        )
+
+        state = checkpoint.load()
+        assert state['frontier'] == [(URL('https://b.com/'), 1)]
+        assert all(url in state['seen'] for url in make_urls(10))
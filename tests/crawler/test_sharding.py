@@ -0,0 +1,102 @@
+import multiprocessing
+import time
+
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.sharding import ShardCoordinator
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.sharding import ShardCoordinator
+
+
+def receive_all(coordinator: ShardCoordinator, shard: int, count: int, timeout=5.0):
+    """
+    Receive :param count: URLs of :param shard:, the queues of multiprocessing
+    deliver them through a feeder thread, so they may arrive with a delay.
+    """
+    items = []
+    deadline = time.monotonic() + timeout
+    while len(items) < count and time.monotonic() < deadline:
+        items.extend(coordinator.receive(shard))
+        time.sleep(0.01)
+    return items
+
+
+def forward_and_set_idle(coordinator: ShardCoordinator, shard: int, urls):
+    for url in urls:
+        coordinator.forward(0, URL(url), 1)
+    coordinator.set_idle(shard)
+
+
+@pytest.fixture
+def coordinator() -> ShardCoordinator:
+    return ShardCoordinator(3, multiprocessing.get_context('spawn'))
+
+
+class TestShardCoordinator:
+    def test_shard_of(self, coordinator):
+        shards = {
+            coordinator.shard_of(URL(f'https://host-{host}.com/')) for host in range(30)
+        }
+        assert shards == {0, 1, 2}
+        assert (
+            coordinator.shard_of(URL('https://a.com/1'))
+            == coordinator.shard_of(URL('https://a.com/2'))
+        )
+
+    def test_forward_and_receive(self, coordinator):
+        urls = [URL(f'https://a.com/{page}') for page in range(3)]
+        for url in urls:
+            coordinator.forward(1, url, 2)
+        assert coordinator.in_transit.value == 3
+
+        coordinator.set_idle(1)
+        assert receive_all(coordinator, 1, 3) == [(url, 2) for url in urls]
+        assert coordinator.in_transit.value == 0
+        assert coordinator.busy[1] == 1
+        assert coordinator.receive(1) == ()
+        assert coordinator.receive(0) == ()
+
+    def test_finished_only_when_idle_and_nothing_in_transit(self, coordinator):
+        assert not coordinator.set_idle(0)
+        assert not coordinator.set_idle(1)
+
+        # the last busy shard forwards a URL before it becomes idle
+        coordinator.forward(0, URL('https://a.com/'), 1)
+        assert not coordinator.set_idle(2)
+        assert receive_all(coordinator, 0, 1)
+        assert not coordinator.set_idle(2)
+        assert coordinator.set_idle(0)
+
+    def test_leave(self, coordinator):
+        # a shard that exits while the others still work has failed
+        coordinator.leave(0)
+        assert coordinator.stopped.value == 1
+
+    def test_leave_when_finished(self, coordinator):
+        coordinator.set_idle(0)
+        coordinator.set_idle(1)
+        coordinator.leave(2)
+        assert coordinator.stopped.value == 0
+
+    def test_forward_from_another_process(self, coordinator):
+        context = multiprocessing.get_context('spawn')
+        urls = [f'https://b.com/{page}' for page in range(5)]
+        process = context.Process(
+            target=forward_and_set_idle, args=(coordinator, 1, urls)
+        )
+        process.start()
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+        assert coordinator.in_transit.value == 5
+        assert coordinator.busy[1] == 0
+        assert [str(url) for url, _ in receive_all(coordinator, 0, 5)] == urls
+        assert coordinator.in_transit.value == 0
+        assert not coordinator.set_idle(2)
+        assert coordinator.set_idle(0)
+        coordinator.leave(0)
+        assert coordinator.stopped.value == 0
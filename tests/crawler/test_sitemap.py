@@ -0,0 +1,107 @@
+from datetime import datetime
+import gzip
+
+import httpx
+import pytest
+from yarl import URL
+
+try:
+    from spider.crawler.sitemap import SitemapReader
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.crawler.sitemap import SitemapReader
+
+
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+SITEMAP_INDEX = f'''<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="{NAMESPACE}">
+  <sitemap><loc>https://a.com/pages.xml</loc></sitemap>
+  <sitemap><loc>https://a.com/posts.xml.gz</loc></sitemap>
+  <sitemap><loc>https://a.com/pages.xml</loc></sitemap>
+</sitemapindex>
+'''
+
+PAGES = f'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="{NAMESPACE}">
+  <url><loc>https://a.com/</loc><lastmod>2023-01-31</lastmod></url>
+  <url><loc>https://a.com/about</loc></url>
+</urlset>
+'''
+
+POSTS = f'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="{NAMESPACE}">
+  <url><loc>/posts/1</loc><lastmod>2023-02-01T12:00:00+02:00</lastmod></url>
+</urlset>
+'''
+
+
+def make_client(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        content = {
+            '/sitemap.xml': SITEMAP_INDEX.encode(),
+            '/pages.xml': PAGES.encode(),
+            '/posts.xml.gz': gzip.compress(POSTS.encode()),
+        }.get(request.url.path)
+        if content is None:
+            return httpx.Response(404)
+        return httpx.Response(200, content=content)
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestSitemapReader:
+    @pytest.mark.asyncio
+    async def test_read_index(self):
+        calls = []
+        reader = SitemapReader(make_client(calls))
+        entries = [
+            entry async for entry in reader.read(URL('https://a.com/sitemap.xml'))
+        ]
+
+        assert [entry.url for entry in entries] == [
+            URL('https://a.com/'), URL('https://a.com/about'),
+            URL('https://a.com/posts/1'),
+        ]
+        assert [entry.lastmod for entry in entries] == [
+            datetime(2023, 1, 31), None, datetime(2023, 2, 1, 10),
+        ]
+        assert calls == ['/sitemap.xml', '/pages.xml', '/posts.xml.gz']
+
+    @pytest.mark.asyncio
+    async def test_missing_sitemap(self):
+        reader = SitemapReader(make_client([]))
+        entries = [
+            entry async for entry in reader.read(URL('https://a.com/missing.xml'))
+        ]
+        assert entries == []
+
+    @pytest.mark.asyncio
+    async def test_gzip_bomb(self, monkeypatch):
+        monkeypatch.setattr(SitemapReader, 'MAX_BYTES', 20000)
+        urls = ''.join(
+            f'<url><loc>https://a.com/{page}</loc></url>' for page in range(1000)
+        )
+        bomb = gzip.compress(
+            f'<urlset xmlns="{NAMESPACE}">{urls}{" " * 10 ** 6}</urlset>'.encode()
+        )
+        assert len(bomb) < SitemapReader.MAX_BYTES
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=bomb)
+
+        reader = SitemapReader(
+            httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        entries = [
+            entry async for entry in reader.read(URL('https://a.com/sitemap.xml.gz'))
+        ]
+        assert 0 < len(entries) < 1000
+
+    def test_parse_lastmod(self):
+        assert SitemapReader.parse_lastmod('2023-01-31T10:00Z') == datetime(
+            2023, 1, 31, 10
+        )
+        assert SitemapReader.parse_lastmod('yesterday') is None
+        assert SitemapReader.parse_lastmod(None) is None
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+from yarl import URL
+
+try:
+    from spider.db.core import PageRecord
+    from spider.file_storage import (
+        ContentAddressedFileWriter,
+        HTMLFileWriter,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.db.core import PageRecord
+    from spider.file_storage import (
+        ContentAddressedFileWriter,
+        HTMLFileWriter,
+    )
+
+from tests.pytest_fixtures.database import InMemoryDatabase
+
+
+@pytest.fixture
+def database(memory_database):
+    return memory_database
+
+
+class TestSave:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('overwrite', [True, False])
+    async def test_one_file_write_per_page(self, database, tmp_path, overwrite):
+        urls = [URL(f'https://example.com/{i}') for i in range(3)]
+        for url in urls + urls:
+            await database.save(url, 'title', url.path, 'parent', overwrite=overwrite)
+
+        assert database.file_writes_counter == 6
+        assert database.round_trips == 6
+        stored = {row['html'] for row in database.rows.values()}
+        assert set(str(path) for path in tmp_path.iterdir()) == stored
+
+    @pytest.mark.asyncio
+    async def test_overwrite(self, database):
+        url = URL('https://example.com/')
+        await database.save(url, 'old', 'old content', 'parent')
+        old_html = database.rows[str(url)]['html']
+
+        await database.save(url, 'new', 'new content', 'parent', overwrite=True)
+        assert not os.path.exists(old_html)
+        assert await HTMLFileWriter.read(database.rows[str(url)]['html']) == (
+            'new content'
+        )
+
+        await database.save(url, 'newer', 'newer content', 'parent', overwrite=False)
+        assert await HTMLFileWriter.read(database.rows[str(url)]['html']) == (
+            'new content'
+        )
+        assert database.rows[str(url)]['title'] == 'newer'
+
+    @pytest.mark.asyncio
+    async def test_failed_upsert_removes_the_file(self, database, tmp_path):
+        async def fail(*_):
+            raise ConnectionError
+
+        database.upsert = fail
+        with pytest.raises(ConnectionError):
+            await database.save(URL('https://example.com/'), 'title', '', 'parent')
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_unchanged_page_keeps_one_shared_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ContentAddressedFileWriter, 'PATH_TO_FILES', tmp_path)
+        database = InMemoryDatabase()
+        database.file_controller = ContentAddressedFileWriter
+        first, second = URL('https://example.com/1'), URL('https://example.com/2')
+
+        for _ in range(3):
+            await database.save(first, 'title', 'same', 'parent')
+        await database.save(second, 'title', 'same', 'parent')
+        html = database.rows[str(first)]['html']
+        assert database.rows[str(second)]['html'] == html
+        assert ContentAddressedFileWriter.references(html) == 2
+
+        await database.save(first, 'title', 'changed', 'parent')
+        assert ContentAddressedFileWriter.references(html) == 1
+        await database.save(second, 'title', 'changed', 'parent')
+        assert not os.path.exists(html)
+        assert len(list(tmp_path.glob('*.html'))) == 1
+
+    @pytest.mark.asyncio
+    async def test_save_many(self, database, tmp_path):
+        urls = [URL(f'https://example.com/{i}') for i in range(3)]
+        await database.save(urls[0], 'title', 'old', 'parent')
+        await database.save_many([
+            PageRecord(url, 'title', f'{url.path} {version}', 'parent')
+            for version in range(2) for url in urls
+        ])
+
+        assert database.file_writes_counter == 4
+        assert database.round_trips == 4
+        for url in urls:
+            html = database.rows[str(url)]['html']
+            assert await HTMLFileWriter.read(html) == f'{url.path} 1'
+        assert len(list(tmp_path.iterdir())) == 3
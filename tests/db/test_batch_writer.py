@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+try:
+    from spider.db.core import (
+        BatchWriter,
+        PageRecord,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.db.core import (
+        BatchWriter,
+        PageRecord,
+    )
+
+
+class RecordingDatabase:
+    def __init__(self, broken_urls=()):
+        self.batches = []
+        self.broken_urls = set(broken_urls)
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def save_many(self, records, silent=False, overwrite=True):
+        await self.unblocked.wait()
+        if any(record.url in self.broken_urls for record in records):
+            raise ValueError('value too long')
+        self.batches.append([record.url for record in records])
+
+
+def page(url: str) -> PageRecord:
+    return PageRecord(url, 'title', '<html></html>', 'parent')
+
+
+class TestBatchWriter:
+    @pytest.mark.asyncio
+    async def test_flush_by_size(self):
+        database = RecordingDatabase()
+        writer = BatchWriter(database, batch_size=2, flush_interval=60, workers=1)
+        for url in 'abcde':
+            await writer.put(page(url))
+        await asyncio.sleep(0.01)
+        assert database.batches == [['a', 'b'], ['c', 'd']]
+
+        await writer.close()
+        assert database.batches[-1] == ['e']
+        assert writer.batches_counter == 3
+        assert writer.saved_counter == 5
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_by_time(self):
+        database = RecordingDatabase()
+        writer = BatchWriter(database, batch_size=100, flush_interval=0.05)
+        await writer.put(page('a'))
+        await writer.put(page('b'))
+        await asyncio.sleep(0.01)
+        assert not database.batches
+        await asyncio.sleep(0.1)
+        assert database.batches == [['a', 'b']]
+        await writer.close()
+        assert writer.batches_counter == 1
+
+    @pytest.mark.asyncio
+    async def test_backpressure(self):
+        database = RecordingDatabase()
+        database.unblocked.clear()
+        writer = BatchWriter(
+            database, batch_size=2, flush_interval=60, max_pending=4, workers=1
+        )
+        for url in 'abcd':
+            await writer.put(page(url))
+        await asyncio.sleep(0.01)
+        # the first batch is being saved, so two more records fit the queue
+        await writer.put(page('e'))
+        await writer.put(page('f'))
+
+        put = asyncio.create_task(writer.put(page('g')))
+        await asyncio.sleep(0.01)
+        assert not put.done()
+        assert writer.pending == 7
+
+        database.unblocked.set()
+        await put
+        await writer.close()
+        assert [url for batch in database.batches for url in batch] == list('abcdefg')
+        assert writer.waits_counter == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_records(self):
+        database = RecordingDatabase(broken_urls={'b'})
+        writer = BatchWriter(database, batch_size=3)
+        for url in 'abc':
+            await writer.put(page(url))
+        await writer.close()
+        assert database.batches == [['a'], ['c']]
+        assert writer.saved_counter == 2
+        assert writer.failed_counter == 1
+        assert 'ValueError: 1' in writer.summary()
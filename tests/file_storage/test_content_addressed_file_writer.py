@@ -0,0 +1,73 @@
+import os
+
+import pytest
+from yarl import URL
+
+try:
+    from spider.file_storage import (
+        ContentAddressedFileWriter,
+        HTMLFileWriter,
+    )
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.file_storage import (
+        ContentAddressedFileWriter,
+        HTMLFileWriter,
+    )
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(ContentAddressedFileWriter, 'PATH_TO_FILES', tmp_path)
+    monkeypatch.setattr(ContentAddressedFileWriter, 'deduplicated_counter', 0)
+    return ContentAddressedFileWriter
+
+
+class TestContentAddressedFileWriter:
+    @pytest.mark.asyncio
+    async def test_identical_content_is_written_once(self, writer, tmp_path):
+        first = await writer.write(URL('https://a.com/'), '<html>same</html>')
+        second = await writer.write(URL('https://b.com/'), '<html>same</html>')
+        other = await writer.write(URL('https://a.com/'), '<html>other</html>')
+
+        assert first == second != other
+        assert writer.deduplicated_counter == 1
+        assert writer.references(first) == 2
+        assert writer.references(other) == 1
+        assert await writer.read(first) == '<html>same</html>'
+        assert len(list(tmp_path.glob('*.html'))) == 2
+
+    @pytest.mark.asyncio
+    async def test_delete_removes_the_last_reference_only(self, writer, tmp_path):
+        path = await writer.write(URL('https://a.com/'), 'page')
+        await writer.write(URL('https://b.com/'), 'page')
+        await writer.write(URL('https://c.com/'), 'page')
+
+        writer.delete(path)
+        assert writer.references(path) == 2
+        writer.delete(path)
+        assert writer.references(path) == 1
+        assert not list(tmp_path.glob('*.refs'))
+        writer.delete(path)
+        assert not os.path.exists(path)
+        assert writer.references(path) == 0
+
+    @pytest.mark.asyncio
+    async def test_drop_all(self, writer, tmp_path):
+        await writer.write(URL('https://a.com/'), 'page')
+        await writer.write(URL('https://b.com/'), 'page')
+        writer.drop_all()
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_uuid_writer_honors_references(self, writer, tmp_path, monkeypatch):
+        monkeypatch.setattr(HTMLFileWriter, 'PATH_TO_FILES', tmp_path)
+        path = await writer.write(URL('https://a.com/'), 'page')
+        await writer.write(URL('https://b.com/'), 'page')
+
+        HTMLFileWriter.delete(path)
+        assert os.path.exists(path)
+        assert writer.references(path) == 1
+        HTMLFileWriter.delete(path)
+        assert not list(tmp_path.iterdir())
@@ -1 +1,3 @@
 from .controllers import config_controller
+from .database import memory_database
+from .redis import fake_redis
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+
+try:
+    from spider.db.core import BaseDatabase
+    from spider.file_storage import HTMLFileWriter
+except ImportError:
+    import sys
+    sys.path.append('../spider')
+    from spider.db.core import BaseDatabase
+    from spider.file_storage import HTMLFileWriter
+
+
+class InMemoryDatabase(BaseDatabase):
+    """
+    DAO that keeps the entries in a dict, to test the shared write path and
+    the crawler without a database server.
+    """
+
+    verbose = 'in-memory'
+    file_controller = HTMLFileWriter
+
+    def __init__(self):
+        super().__init__('', '', '', '')
+        self.rows = {}
+        self.round_trips = 0
+        self.crawl_time_queries = 0
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    def engine(self, orm_logging: bool = True):
+        pass
+
+    async def upsert(self, record, overwrite, silent=False):
+        self.round_trips += 1
+        old = self.rows.get(record['url'])
+        row = dict(record)
+        if old and not overwrite:
+            row['html'] = old['html']
+        self.rows[record['url']] = row
+        return old['html'] if old else None
+
+    async def get_validators(self, key):
+        return self.rows.get(str(key))
+
+    async def get_crawl_times(self, keys):
+        self.crawl_time_queries += 1
+        rows = [self.rows.get(str(key)) for key in keys]
+        return {row['url']: row['crawled_at'] for row in rows if row}
+
+    async def touch(self, key):
+        if str(key) in self.rows:
+            self.rows[str(key)]['crawled_at'] = datetime.utcnow()
+
+    async def iter_urls(self, batch_size=10000):
+        yield list(self.rows)
+
+    async def get(self, parent, limit=10):
+        return []
+
+    async def count_all(self):
+        return len(self.rows)
+
+    async def drop_table(self, check_first=False, silent=False):
+        pass
+
+    async def create_table(self, check_first=False, silent=False):
+        pass
+
+
+@pytest.fixture()
+def memory_database(tmp_path, monkeypatch) -> InMemoryDatabase:
+    monkeypatch.setattr(HTMLFileWriter, 'PATH_TO_FILES', tmp_path)
+    return InMemoryDatabase()
@@ -0,0 +1,91 @@
+from collections import deque
+from typing import (
+    Deque,
+    Dict,
+    Set,
+)
+
+import pytest
+
+
+class FakeRedis:
+    """
+    In-process stand-in for an aioredis pool, with the commands used by the shared
+    frontier. The clock is set by the tests.
+    """
+
+    ZSET_IF_EXIST = 'ZSET_IF_EXIST'
+
+    def __init__(self):
+        self.now = 1000.0
+        self.lists: Dict[str, Deque[bytes]] = {}
+        self.sets: Dict[str, Set[bytes]] = {}
+        self.zsets: Dict[str, Dict[bytes, float]] = {}
+
+    @classmethod
+    def __bytes(cls, value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode('utf-8')
+
+    async def time(self) -> float:
+        return self.now
+
+    async def sadd(self, key, member, *members) -> int:
+        values = self.sets.setdefault(key, set())
+        count = len(values)
+        values.update(self.__bytes(value) for value in (member, *members))
+        return len(values) - count
+
+    async def lpush(self, key, value, *values) -> int:
+        items = self.lists.setdefault(key, deque())
+        for item in (value, *values):
+            items.appendleft(self.__bytes(item))
+        return len(items)
+
+    async def rpoplpush(self, sourcekey, destkey):
+        source = self.lists.get(sourcekey)
+        if not source:
+            return None
+        value = source.pop()
+        self.lists.setdefault(destkey, deque()).appendleft(value)
+        return value
+
+    async def llen(self, key) -> int:
+        return len(self.lists.get(key, ()))
+
+    async def delete(self, key, *keys) -> int:
+        count = 0
+        for name in (key, *keys):
+            for storage in (self.lists, self.sets, self.zsets):
+                count += storage.pop(name, None) is not None
+        return count
+
+    async def zadd(self, key, score, member, *pairs, exist=None) -> int:
+        zset = self.zsets.setdefault(key, {})
+        member = self.__bytes(member)
+        if exist is self.ZSET_IF_EXIST and member not in zset:
+            return 0
+        is_new = member not in zset
+        zset[member] = score
+        return int(is_new)
+
+    async def zrem(self, key, member, *members) -> int:
+        zset = self.zsets.get(key, {})
+        return sum(
+            zset.pop(self.__bytes(name), None) is not None
+            for name in (member, *members)
+        )
+
+    async def zrangebyscore(self, key, min=float('-inf'), max=float('inf')):
+        zset = self.zsets.get(key, {})
+        return sorted(
+            (member for member, score in zset.items() if min <= score <= max),
+            key=zset.get,
+        )
+
+    async def zcard(self, key) -> int:
+        return len(self.zsets.get(key, ()))
+
+
+@pytest.fixture()
+def fake_redis() -> FakeRedis:
+    return FakeRedis()